@@ -0,0 +1,184 @@
+"""
+Benchmarks of reading, stacking, plotting, and converting OpenMDAO recorder histories and of
+parsing solver residual logs. Synthetic recorders and logs are generated in a work directory and
+the time and peak memory of each benchmark are appended as one JSON line per run to the results
+file so runs can be compared over time.
+om_dash is imported from the installed package, so install it with pip install -e . from the
+repository root before running this from the benchmarks directory.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from om_dash.bgs_residual_parser import BgsResidualParser
+from om_dash.om_convert_recorder_hist import write_data_to_file
+from om_dash.opt_hist_figure_generator import OptHistoryFigureGenerator
+from om_dash.recorder_history_stacker import RecorderHistoryStacker
+from om_dash.recorder_parser import RecorderParser
+from om_dash.streaming_history_converter import StreamingHistoryConverter
+
+from synthetic_data import write_synthetic_bgs_log, write_synthetic_recorder
+
+
+class BenchmarkRunner:
+    def __init__(self, work_dir: str, repeat: int = 3):
+        """
+        Times each benchmark repeat times and measures its peak memory in one more run with
+        tracemalloc, which is not included in the timings since tracing slows the run down
+        """
+        self.work_dir = work_dir
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, name: str, benchmark: Callable, setup: Callable = None):
+        times = []
+        for _ in range(self.repeat):
+            args = setup() if setup is not None else ()
+            start = time.perf_counter()
+            benchmark(*args)
+            times.append(time.perf_counter() - start)
+
+        args = setup() if setup is not None else ()
+        tracemalloc.start()
+        benchmark(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {'name': name,
+                  'times_in_seconds': times,
+                  'min_time_in_seconds': min(times),
+                  'peak_memory_in_bytes': peak_memory}
+        self.results.append(result)
+        print(f'{name:<40} {min(times):10.4f} s {peak_memory / 2**20:10.1f} MiB')
+
+    def get_path(self, filename: str) -> str:
+        return os.path.join(self.work_dir, filename)
+
+
+def run_recorder_benchmarks(runner: BenchmarkRunner, args):
+    recorder = runner.get_path('synthetic.sql')
+    write_synthetic_recorder(recorder, args.cases, args.dvs, args.cons, args.array_size)
+
+    runner.run('recorder_parser_read', lambda: RecorderParser(recorder))
+
+    stacked_recorders = [runner.get_path(f'synthetic_{i}.sql') for i in range(args.stack)]
+    for stacked_recorder in stacked_recorders:
+        shutil.copy(recorder, stacked_recorder)
+    runner.run('recorder_history_stacker', lambda: RecorderHistoryStacker(stacked_recorders, 1))
+
+    parser = RecorderParser(recorder)
+    runner.run('create_figure', lambda: OptHistoryFigureGenerator(parser).create_figure())
+
+    half_recorder = runner.get_path('synthetic_half.sql')
+    runner.run('generate_extend_data', lambda fig_generator: (
+        fig_generator.generate_extend_data_for_opt_hist_traces()),
+        setup=lambda: (_create_figure_of_first_half(recorder, half_recorder),))
+
+    stacker = RecorderHistoryStacker(stacked_recorders, 1)
+    for ext in ['dat', 'csv', 'plt', 'npz']:
+        output = runner.get_path(f'converted.{ext}')
+        runner.run(f'convert_write_{ext}', lambda: write_data_to_file(stacker, output))
+
+    output = runner.get_path('streamed.plt')
+    runner.run('convert_stream_plt', lambda: (
+        StreamingHistoryConverter(stacked_recorders, args.chunk_size).convert(output)))
+
+
+def _create_figure_of_first_half(recorder: str, half_recorder: str):
+    """
+    Plot the first half of the cases, then make the rest available to the parser
+    """
+    shutil.copy(recorder, half_recorder)
+    with sqlite3.connect(half_recorder) as con:
+        num_cases = con.execute('SELECT COUNT(*) FROM driver_iterations').fetchone()[0]
+        con.execute('DELETE FROM driver_iterations WHERE id > ?', (num_cases // 2,))
+    con.close()
+
+    parser = RecorderParser(half_recorder)
+    fig_generator = OptHistoryFigureGenerator(parser)
+    fig_generator.create_figure()
+
+    shutil.copy(recorder, half_recorder)
+    parser.update_histories_from_recorder(half_recorder)
+    return fig_generator
+
+
+def run_residual_log_benchmarks(runner: BenchmarkRunner, args):
+    log = runner.get_path('synthetic_solver_log.txt')
+    write_synthetic_bgs_log(log, args.log_solves)
+    print(f'solver log size: {os.path.getsize(log) / 2**20:.1f} MiB')
+
+    runner.run('parse_residuals_nlbgs', lambda: BgsResidualParser().parse_residuals(log, True))
+    runner.run('parse_residuals_lnbgs', lambda: BgsResidualParser().parse_residuals(log, False))
+    runner.run('parse_all_residuals', lambda: BgsResidualParser().parse_all_residuals(log))
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+                                         description=__doc__)
+    arg_parser.add_argument('--cases', type=int, default=2000,
+                            help='Number of driver cases in the synthetic recorder')
+    arg_parser.add_argument('--dvs', type=int, default=4, help='Number of design variables')
+    arg_parser.add_argument('--cons', type=int, default=4, help='Number of constraints')
+    arg_parser.add_argument('--array-size', type=int, default=25,
+                            help='Size of each design variable and constraint')
+    arg_parser.add_argument('--stack', type=int, default=3,
+                            help='Number of recorders in the restart chain that is stacked')
+    arg_parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Cases per chunk of the streaming conversion')
+    arg_parser.add_argument('--log-solves', type=int, default=20000,
+                            help='Number of nonlinear solves in the synthetic solver log')
+    arg_parser.add_argument('--repeat', type=int, default=3,
+                            help='Number of timed runs of each benchmark')
+    arg_parser.add_argument('--skip-recorders', action='store_true',
+                            help='Only run the solver log benchmarks')
+    arg_parser.add_argument('--skip-logs', action='store_true',
+                            help='Only run the recorder benchmarks')
+    arg_parser.add_argument('--work-dir', type=str, default=None,
+                            help='Directory for the synthetic data. Defaults to a temporary '
+                                 'directory that is deleted afterwards.')
+    arg_parser.add_argument('-o', '--output', type=str, default='om_dash_benchmarks.jsonl',
+                            help='File the results of this run are appended to as a JSON line')
+    args = arg_parser.parse_args()
+
+    work_dir = args.work_dir if args.work_dir is not None else tempfile.mkdtemp()
+    os.makedirs(work_dir, exist_ok=True)
+    runner = BenchmarkRunner(work_dir, args.repeat)
+    try:
+        if not args.skip_recorders:
+            run_recorder_benchmarks(runner, args)
+        if not args.skip_logs:
+            run_residual_log_benchmarks(runner, args)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir)
+
+    record = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'git_commit': get_git_commit(),
+              'python': platform.python_version(),
+              'machine': platform.node(),
+              'parameters': {key: value for key, value in vars(args).items()
+                             if key not in ['output', 'work_dir']},
+              'results': runner.results}
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Generators of synthetic OpenMDAO recorders and NLBGS/LNBGS solver logs for the benchmarks
+"""
+import os
+import random
+import numpy as np
+import openmdao.api as om
+
+
+def write_synthetic_recorder(filename: str, num_cases: int, num_dvs: int = 2,
+                             num_cons: int = 2, array_size: int = 1, seed: int = 0):
+    """
+    Run a DOE on a model with num_dvs design variables and num_cons constraints that are each
+    arrays of array_size and record num_cases driver cases to filename
+    """
+    prob = om.Problem(reports=False)
+    model = prob.model
+    ones = np.ones(array_size)
+
+    dv_names = [f'x{idv}' for idv in range(num_dvs)]
+    objective = ' + '.join(f'sum({name}**2)' for name in dv_names)
+    model.add_subsystem('objective', om.ExecComp(f'f = {objective}',
+                                                 **{name: ones for name in dv_names}),
+                        promotes=['*'])
+    for icon in range(num_cons):
+        dv_name = dv_names[icon % num_dvs]
+        model.add_subsystem(f'constraint{icon}',
+                            om.ExecComp(f'g{icon} = {icon + 1} * {dv_name}',
+                                        **{f'g{icon}': ones, dv_name: ones}),
+                            promotes=['*'])
+        model.add_constraint(f'g{icon}', upper=1.0)
+
+    for name in dv_names:
+        model.add_design_var(name, lower=-1.0, upper=1.0)
+    model.add_objective('f')
+
+    prob.driver = om.DOEDriver(om.UniformGenerator(num_samples=num_cases, seed=seed))
+    prob.driver.add_recorder(om.SqliteRecorder(os.path.abspath(filename)))
+    prob.setup()
+    prob.run_driver()
+    prob.cleanup()
+
+
+def write_synthetic_bgs_log(filename: str, num_nonlinear_solves: int,
+                            num_linear_solves_per_iteration: int = 2, seed: int = 0):
+    """
+    Write solver output with NLBGS iterations and nested LNBGS solves interleaved with
+    other lines the way a coupled analysis prints them
+    """
+    generator = random.Random(seed)
+    with open(filename, 'w') as f:
+        for _ in range(num_nonlinear_solves):
+            f.write('==========\ncycle\n==========\n')
+            nonlinear_residual = 1.0
+            for iteration in range(1, generator.randint(3, 12)):
+                f.write(f'NL: NLBGS {iteration} ; {2.3 * nonlinear_residual:.8e} '
+                        f'{nonlinear_residual:.8e}\n')
+                for _ in range(num_linear_solves_per_iteration):
+                    linear_residual = 1.0
+                    for linear_iteration in range(generator.randint(2, 20)):
+                        f.write(f'|  LN: LNBGS {linear_iteration} ; '
+                                f'{0.7 * linear_residual:.8e} {linear_residual:.8e}\n')
+                        linear_residual *= 0.3
+                    f.write('|  LN: LNBGS Converged in 4 iterations\n')
+                nonlinear_residual *= 0.1
+            f.write('NL: NLBGS Converged in 5 iterations\n')
@@ -0,0 +1,3 @@
+from om_dash.cli import main
+
+main()
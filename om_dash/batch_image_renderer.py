@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+image_formats = ['png', 'svg', 'pdf']
+
+
+def add_image_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument('--output-dir', type=str, default=None,
+                            help='Directory to write the figures in. '
+                                 'Defaults to writing them next to each input.')
+    arg_parser.add_argument('--render-workers', type=int, default=4,
+                            help='Number of figures rendered to images at the same time')
+    arg_parser.add_argument('--batch-size', type=int, default=16,
+                            help='Number of figures built before they are sent to be rendered')
+
+
+def set_figure_file_name(input: str, ext: str, output_dir: str = None, suffix: str = '') -> str:
+    root = os.path.splitext(input)[0] + suffix
+    if output_dir is not None:
+        root = os.path.join(output_dir, os.path.basename(root))
+    return f'{root}.{ext}'
+
+
+class BatchImageRenderer:
+    def __init__(self, render_workers=4, batch_size=16):
+        """
+        Writes static images of many figures with one image export engine.
+        The kaleido browser is started once, on the first batch, and renders render_workers
+        figures at a time in a background thread. Figures are sent in batches so the next batch
+        can be built while the last one renders, and at most two batches are held in memory.
+        Use it as a context manager so the engine is stopped when the figures are written.
+        """
+        self.render_workers = render_workers
+        self.batch_size = batch_size
+        self._figures: List['go.Figure'] = []
+        self._filenames: List[str] = []
+        self._executor = None
+        self._pending: Future = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._engine = None
+
+    def __enter__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.flush()
+                self._wait_for_pending_batch()
+        finally:
+            self._executor.submit(self._close_engine).result()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def add(self, fig: 'go.Figure', filename: str):
+        """
+        Queue a figure to be written to filename. The format comes from the file extension.
+        """
+        self._figures.append(fig)
+        self._filenames.append(filename)
+        if len(self._figures) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Send the queued figures to be rendered after the previous batch is done
+        """
+        if not self._figures:
+            return
+        self._wait_for_pending_batch()
+        figures, filenames = self._figures, self._filenames
+        self._figures, self._filenames = [], []
+        if self._executor is None:
+            self._write_images(figures, filenames)
+            self._close_engine()
+        else:
+            self._pending = self._executor.submit(self._write_images, figures, filenames)
+
+    def _wait_for_pending_batch(self):
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def _write_images(self, figures: List['go.Figure'], filenames: List[str]):
+        if self._loop is None:
+            self._open_engine()
+
+        if self._engine is None:
+            for fig, filename in zip(figures, filenames):
+                fig.write_image(filename)
+            return
+
+        specs = [dict(fig=fig, path=filename,
+                      opts=dict(format=os.path.splitext(filename)[1].lstrip('.')))
+                 for fig, filename in zip(figures, filenames)]
+        self._loop.run_until_complete(
+            self._engine.write_fig_from_object(specs, cancel_on_error=True))
+
+    def _open_engine(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            import kaleido
+        except ImportError:
+            # plotly's write_image explains how to install kaleido
+            return
+        # kaleido versions before 1.0 have no engine to keep open and write one image at a time
+        if not hasattr(kaleido, 'Kaleido'):
+            return
+        engine = kaleido.Kaleido(n=self.render_workers)
+        self._loop.run_until_complete(engine.open())
+        self._engine = engine
+
+    def _close_engine(self):
+        if self._engine is not None:
+            self._loop.run_until_complete(self._engine.close())
+            self._engine = None
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
@@ -1,42 +1,246 @@
 import os
-from typing import List
+import re
+from typing import BinaryIO, Dict, Iterator, List
 import numpy as np
 
+from .instrumentation import instrumentation
+
+
+class SolveHistory:
+    def __init__(self, records: np.ndarray = None, offsets: np.ndarray = None):
+        """
+        Residual history of all the solves of one solver stored like a CSR matrix.
+        The (iteration, absolute residual, relative residual) records of every solve are rows of
+        one contiguous array, and offsets holds the first row of each solve followed by the
+        total number of rows, so solve i is records[offsets[i]:offsets[i + 1]].
+        Indexing or iterating gives views of the solves, and the per-solve quantities are
+        computed for all the solves at once.
+        """
+        self.records = np.zeros((0, 3)) if records is None else records
+        self.offsets = np.zeros(1, dtype=np.int64) if offsets is None else offsets
+
+    @classmethod
+    def from_records(cls, records: np.ndarray, start_iteration: int) -> 'SolveHistory':
+        """
+        Split consecutive records into solves wherever the iteration number restarts
+        """
+        solve_starts = np.flatnonzero(records[1:, 0] == start_iteration) + 1
+        num_records = records.shape[0]
+        offsets = np.concatenate([[0], solve_starts, [num_records]]) if num_records > 0 else [0]
+        return cls(records, np.asarray(offsets, dtype=np.int64))
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def __getitem__(self, solve: int) -> np.ndarray:
+        if solve < 0:
+            solve += len(self)
+        if not 0 <= solve < len(self):
+            raise IndexError(f'solve {solve} out of range for {len(self)} solves')
+        return self.records[self.offsets[solve]:self.offsets[solve + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for start, end in zip(self.offsets[:-1], self.offsets[1:]):
+            yield self.records[start:end]
+
+    @property
+    def iterations(self) -> np.ndarray:
+        return self.records[:, 0]
+
+    @property
+    def absolute(self) -> np.ndarray:
+        return self.records[:, 1]
+
+    @property
+    def relative(self) -> np.ndarray:
+        return self.records[:, 2]
+
+    def get_num_records(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def get_solve_ids(self) -> np.ndarray:
+        """
+        The solve each record belongs to
+        """
+        return np.repeat(np.arange(len(self)), self.get_num_records())
+
+    def get_iteration_counts(self) -> np.ndarray:
+        """
+        The last iteration number reported by each solve
+        """
+        return self.iterations[self.offsets[1:] - 1]
+
+    def get_final_residuals(self):
+        last_records = self.offsets[1:] - 1
+        return self.absolute[last_records], self.relative[last_records]
+
+    def get_convergence_rates(self) -> np.ndarray:
+        """
+        The mean reduction factor of the absolute residual per iteration of each solve.
+        Solves with a single record have a rate of NaN.
+        """
+        num_steps = self.get_num_records() - 1
+        initial = self.absolute[self.offsets[:-1]]
+        final = self.absolute[self.offsets[1:] - 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = (final / initial) ** (1.0 / num_steps)
+        rates[num_steps < 1] = np.nan
+        return rates
+
+    def find_stalled_solves(self, window=5, max_reduction=0.5) -> np.ndarray:
+        """
+        Flags the solves whose absolute residual was reduced by less than a factor of
+        max_reduction over their last window iterations. Solves with no more than window
+        iterations are not flagged.
+        """
+        last_records = self.offsets[1:] - 1
+        long_enough = self.get_num_records() > window
+        earlier_records = np.where(long_enough, last_records - window, last_records)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            reduction = self.absolute[last_records] / self.absolute[earlier_records]
+        return long_enough & ~(reduction <= max_reduction)
+
 
 class BgsResidualParser:
+    # match lines like "NL: NLBGS 3 ; 1.2e-05 3.4e-07" and capture the iteration, absolute
+    # residual, and relative residual. A separate pattern for each solver starts with a literal
+    # that the regex engine can search for quickly.
+    _residual_fields = rb' ([0-9]+)[ \t]*;[ \t]*([^ \t\r\n]+)[ \t]+([^ \t\r\n]+)'
+    nlbgs_line_pattern = re.compile(rb'NL: NLBGS' + _residual_fields)
+    lnbgs_line_pattern = re.compile(rb'LN: LNBGS' + _residual_fields)
+    # the matches of a chunk take several times the chunk's size until they are converted
+    chunk_size = 8 * 1024 * 1024
+
     def __init__(self):
-        self.all_data: List[np.ndarray] = []
+        self.all_data = SolveHistory()
+        self.nlbgs_data = SolveHistory()
+        self.lnbgs_data = SolveHistory()
+        self.partial_line = b''
 
     def parse_residuals(self, filename: str, doing_nlbgs: bool):
-        lines = self._grep_for_lines_with_bgs_residuals(filename, doing_nlbgs)
-        self.all_data = self._get_residual_data_from_lines(lines, doing_nlbgs)
-
-    def _grep_for_lines_with_bgs_residuals(self, filename: str, doing_nlbgs: bool):
-        prefix = 'NL: NLBGS' if doing_nlbgs else 'LN: LNBGS'
-        return os.popen(f'grep -E "{prefix} [0-9]" {filename}').read().split('\n')[:-1]
-
-    def _split_line_into_residual_data(self, line: str, nlbgs: bool):
-        key = 'NLBGS' if nlbgs else 'LNBGS'
-        iteration = int(line.split(';')[0].split(key)[-1])
-        abs_resid = float(line.split(';')[-1].split(' ')[1])
-        rel_resid = float(line.split(';')[-1].split(' ')[2])
-        return iteration, abs_resid, rel_resid
-
-    def _get_residual_data_from_lines(self, lines: List[str],
-                                      doing_nlbgs: bool) -> List[np.ndarray]:
-        all_data = []
-        current_solve = []
-        start_iteration = 1 if doing_nlbgs else 0
-        for line in lines:
-            iteration, abs_resid, rel_resid = self._split_line_into_residual_data(line, doing_nlbgs)
-            if iteration == start_iteration and self._is_not_first_line(current_solve):
-                all_data.append(np.array(current_solve))
-                current_solve = []
-            current_solve.append([iteration, abs_resid, rel_resid])
-
-        # append the last solve
-        all_data.append(np.array(current_solve))
-        return all_data
-
-    def _is_not_first_line(self, current_solve):
-        return len(current_solve) > 0
+        self.parse_all_residuals(filename)
+        self.all_data = self.nlbgs_data if doing_nlbgs else self.lnbgs_data
+
+    @instrumentation.timed('bgs_residual_parser.parse')
+    def parse_all_residuals(self, filename: str):
+        """
+        Scan the file once and extract both the NLBGS and LNBGS residual histories.
+        The file is read in chunks so memory use does not depend on the size of the log.
+        """
+        # the records of each chunk are only concatenated at the end, so each record is copied
+        # once however many chunks the log has
+        nlbgs_records = [np.zeros((0, 3))]
+        lnbgs_records = [np.zeros((0, 3))]
+        with open(filename, 'rb') as f:
+            for nlbgs_values, lnbgs_values in self._scan_for_bgs_residuals(f):
+                nlbgs_records.append(nlbgs_values)
+                lnbgs_records.append(lnbgs_values)
+
+        self.nlbgs_data = SolveHistory.from_records(np.concatenate(nlbgs_records),
+                                                    start_iteration=1)
+        self.lnbgs_data = SolveHistory.from_records(np.concatenate(lnbgs_records),
+                                                    start_iteration=0)
+
+    def summarize_solves(self, doing_nlbgs: bool) -> Dict[str, np.ndarray]:
+        """
+        Per-solve number of iterations, final residuals, mean reduction factor of the
+        absolute residual per iteration, and whether the solve stalled
+        """
+        solves = self.nlbgs_data if doing_nlbgs else self.lnbgs_data
+        final_absolute, final_relative = solves.get_final_residuals()
+        return {'solve': np.arange(len(solves)),
+                'iterations': solves.get_iteration_counts(),
+                'final_absolute': final_absolute,
+                'final_relative': final_relative,
+                'reduction_rate': solves.get_convergence_rates(),
+                'stalled': solves.find_stalled_solves()}
+
+    def _scan_for_bgs_residuals(self, f: BinaryIO, remainder=b'',
+                                include_partial_line=True) -> Iterator[tuple]:
+        """
+        Yields arrays of the (iteration, absolute, relative) records of the NLBGS and LNBGS
+        iterations for each chunk of the file read from its current position.
+        The trailing partial line is searched too if include_partial_line is True,
+        otherwise it is stored as self.partial_line.
+        """
+        while True:
+            chunk = f.read(self.chunk_size)
+            if not chunk:
+                break
+            # only search complete lines; carry the partial last line to the next chunk
+            chunk = remainder + chunk
+            end_of_last_line = chunk.rfind(b'\n') + 1
+            remainder = chunk[end_of_last_line:]
+            yield self._find_residuals(chunk, end_of_last_line)
+
+        self.partial_line = remainder
+        if include_partial_line and remainder:
+            yield self._find_residuals(remainder, len(remainder))
+
+    def _find_residuals(self, chunk: bytes, end: int):
+        return tuple(self._convert_matches(pattern.findall(chunk, 0, end))
+                     for pattern in [self.nlbgs_line_pattern, self.lnbgs_line_pattern])
+
+    def _convert_matches(self, matches: List[tuple]) -> np.ndarray:
+        if not matches:
+            return np.zeros((0, 3))
+        return np.array(matches, dtype=float)
+
+
+class BgsResidualFollower(BgsResidualParser):
+    def __init__(self, filename: str = ''):
+        """
+        Follow a growing log file like 'tail -f' and parse only the bytes appended since the
+        previous poll. A partial trailing line is held until the rest of it is written.
+        If the file is truncated or replaced (log rotation), it is read again from the start.
+        """
+        super().__init__()
+        self.follow(filename)
+
+    def follow(self, filename: str):
+        self.filename = filename
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.partial_line = b''
+        self._file_id = None
+        self._started_over = False
+
+    @instrumentation.timed('bgs_residual_follower.poll')
+    def poll(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the (iteration, absolute residual, relative residual) records of the NLBGS
+        and LNBGS iterations written since the last poll. 'reset' is True if the file was
+        truncated or replaced since then, in which case the records were read from its start
+        and do not continue the ones returned before.
+        """
+        nlbgs_records = [np.zeros((0, 3))]
+        lnbgs_records = [np.zeros((0, 3))]
+        # only open the file if it grew since the last poll
+        if os.path.exists(self.filename) and self._file_has_new_bytes():
+            with open(self.filename, 'rb') as f:
+                f.seek(self.offset)
+                for nlbgs_values, lnbgs_values in self._scan_for_bgs_residuals(
+                        f, self.partial_line, include_partial_line=False):
+                    nlbgs_records.append(nlbgs_values)
+                    lnbgs_records.append(lnbgs_values)
+                self.offset = f.tell()
+
+        started_over, self._started_over = self._started_over, False
+        return {'NLBGS': np.concatenate(nlbgs_records),
+                'LNBGS': np.concatenate(lnbgs_records),
+                'reset': started_over}
+
+    def _file_has_new_bytes(self) -> bool:
+        """
+        Start over if the file was truncated or replaced.
+        Returns True if there are bytes after the offset to read.
+        """
+        stat = os.stat(self.filename)
+        file_id = (stat.st_dev, stat.st_ino)
+        if stat.st_size < self.offset or (self._file_id is not None and file_id != self._file_id):
+            self.reset()
+            self._started_over = True
+        self._file_id = file_id
+        return stat.st_size > self.offset
@@ -0,0 +1,465 @@
+"""
+Stream the driver cases of an optimization over a socket to the monitor.
+
+Each frame is two big-endian uint32 lengths followed by a JSON header and a payload.
+A layout frame lists the name, type, and flattened size of each variable, and each case frame
+holds the values of one driver case as little-endian doubles in the order of its layout.
+Addresses are "tcp://host:port" or "unix://path" for a Unix domain socket.
+"""
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import uuid
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, List, Tuple
+import numpy as np
+
+from .recorder_parser import RecorderParser
+
+if TYPE_CHECKING:
+    from .variable_filter import VariableFilter
+
+logger = logging.getLogger(__name__)
+
+stream_address_prefixes = ('tcp://', 'unix://')
+_frame_lengths = struct.Struct('!II')
+_value_dtype = np.dtype('<f8')
+
+
+def is_stream_address(address: str) -> bool:
+    return address.startswith(stream_address_prefixes)
+
+
+def parse_stream_address(address: str) -> Tuple[int, object]:
+    """
+    The socket family and socket address of a stream address
+    """
+    if address.startswith('unix://'):
+        return socket.AF_UNIX, address[len('unix://'):]
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        if host and port.isdigit():
+            return socket.AF_INET, (host, int(port))
+    raise ValueError(f'Stream addresses are tcp://host:port or unix://path, not "{address}"')
+
+
+def encode_frame(header: dict, values: np.ndarray = None) -> bytes:
+    header_bytes = json.dumps(header).encode()
+    payload = b'' if values is None else np.asarray(values, dtype=_value_dtype).tobytes()
+    return _frame_lengths.pack(len(header_bytes), len(payload)) + header_bytes + payload
+
+
+class FrameDecoder:
+    def __init__(self):
+        """
+        Splits the bytes received from a socket into (header, payload) frames.
+        Partial frames are kept until the rest of them arrives.
+        """
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[dict, bytes]]:
+        self._buffer += data
+        frames = []
+        start = 0
+        while len(self._buffer) - start >= _frame_lengths.size:
+            header_length, payload_length = _frame_lengths.unpack_from(self._buffer, start)
+            header_start = start + _frame_lengths.size
+            payload_start = header_start + header_length
+            end = payload_start + payload_length
+            if end > len(self._buffer):
+                break
+            header = json.loads(bytes(self._buffer[header_start:payload_start]))
+            frames.append((header, bytes(self._buffer[payload_start:end])))
+            start = end
+        del self._buffer[:start]
+        return frames
+
+
+class CaseLayout:
+    def __init__(self, variables: List[Tuple[str, str, int]]):
+        """
+        The name, type (objective, constraint, or desvar), and flattened size of the variables
+        in each case, in the order their values are concatenated
+        """
+        self.variables = [tuple(variable) for variable in variables]
+        sizes = [size for _, _, size in self.variables]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes, dtype=int)])
+
+    @property
+    def size(self) -> int:
+        return int(self.offsets[-1])
+
+    def __eq__(self, other):
+        return isinstance(other, CaseLayout) and self.variables == other.variables
+
+    def split(self, values: np.ndarray, variable_filter: 'VariableFilter' = None):
+        """
+        Views of the (cases x layout size) values of the objectives, constraints, and design
+        variables selected by the variable_filter
+        """
+        split_values = {'objective': {}, 'constraint': {}, 'desvar': {}}
+        for (name, var_type, _), start, end in zip(self.variables, self.offsets[:-1],
+                                                   self.offsets[1:]):
+            if variable_filter is not None and not (variable_filter.includes_type(var_type)
+                                                    and variable_filter.matches(name)):
+                continue
+            split_values[var_type][name] = values[:, start:end]
+        return split_values['objective'], split_values['constraint'], split_values['desvar']
+
+
+class CaseBatch:
+    def __init__(self, layout: CaseLayout, iterations: np.ndarray, counters: np.ndarray,
+                 timestamps: np.ndarray, values: np.ndarray):
+        """
+        Consecutive cases with the same layout received together
+        """
+        self.layout = layout
+        self.iterations = iterations
+        self.counters = counters
+        self.timestamps = timestamps
+        self.values = values
+
+    @property
+    def num_cases(self) -> int:
+        return self.iterations.size
+
+
+class CaseStreamSender:
+    def __init__(self, address: str, buffer_size: int = 1000,
+                 connect_interval_in_seconds: float = 1.0):
+        """
+        Sends case frames to the monitor from a background thread so recording a case never
+        waits on the network. Up to buffer_size frames are held while the monitor is not
+        connected, after which the oldest frames are dropped. The connection is retried every
+        connect_interval_in_seconds, and each layout is sent again on a new connection before
+        the cases that use it.
+        """
+        parse_stream_address(address)
+        self.address = address
+        self.connect_interval_in_seconds = connect_interval_in_seconds
+        self.run_id = uuid.uuid4().hex
+        self.num_dropped_frames = 0
+        self._frames = deque(maxlen=buffer_size)
+        self._layout_frames: Dict[int, bytes] = {}
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._send_frames, name='om_dash_case_sender',
+                                        daemon=True)
+        self._thread.start()
+
+    def close(self, timeout_in_seconds: float = 5.0):
+        """
+        Stop the sender after it sends the buffered frames, if the monitor is connected,
+        or after timeout_in_seconds
+        """
+        if self._thread is None:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout_in_seconds)
+        self._thread = None
+
+    def start_new_run(self):
+        """
+        The monitor starts a new history with the next layout sent. Layout ids keep counting up,
+        so the cases of the previous run that are still buffered are sent with their own layout.
+        """
+        self.run_id = uuid.uuid4().hex
+
+    def add_layout(self, layout: CaseLayout) -> int:
+        """
+        Returns the id that the cases with this layout are sent with
+        """
+        layout_id = len(self._layout_frames)
+        self._layout_frames[layout_id] = encode_frame(
+            {'kind': 'layout', 'run_id': self.run_id, 'layout_id': layout_id,
+             'variables': layout.variables})
+        return layout_id
+
+    def send_case(self, layout_id: int, iteration: int, counter: int, timestamp: float,
+                  values: np.ndarray):
+        frame = encode_frame({'kind': 'case', 'layout_id': layout_id, 'iteration': iteration,
+                              'counter': counter, 'timestamp': timestamp}, values)
+        with self._condition:
+            if len(self._frames) == self._frames.maxlen:
+                self.num_dropped_frames += 1
+            self._frames.append((layout_id, frame))
+            self._condition.notify()
+
+    def _send_frames(self):
+        connection = None
+        sent_layouts = set()
+        while True:
+            with self._condition:
+                while not self._frames and not self._stopping:
+                    self._condition.wait()
+                if not self._frames:
+                    break
+
+            if connection is None:
+                connection = self._connect()
+                sent_layouts = set()
+            if connection is None:
+                if self._stopping:
+                    break
+                with self._condition:
+                    self._condition.wait(self.connect_interval_in_seconds)
+                continue
+
+            with self._condition:
+                frames = list(self._frames)
+                self._frames.clear()
+            data = []
+            for layout_id, frame in frames:
+                if layout_id not in sent_layouts:
+                    data.append(self._layout_frames[layout_id])
+                    sent_layouts.add(layout_id)
+                data.append(frame)
+            try:
+                connection.sendall(b''.join(data))
+            except OSError:
+                # the monitor went away; its next connection gets the layouts again
+                self.num_dropped_frames += len(frames)
+                connection.close()
+                connection = None
+
+        if connection is not None:
+            connection.close()
+
+    def _connect(self):
+        family, address = parse_stream_address(self.address)
+        connection = socket.socket(family, socket.SOCK_STREAM)
+        connection.settimeout(self.connect_interval_in_seconds)
+        try:
+            connection.connect(address)
+        except OSError:
+            connection.close()
+            return None
+        connection.settimeout(None)
+        return connection
+
+
+class StreamedHistoryParser(RecorderParser):
+    def __init__(self, address: str, variable_filter: 'VariableFilter' = None):
+        """
+        Histories of the cases received from a case stream instead of read from a recorder file
+        """
+        self.variable_filter = variable_filter
+        self._reset_histories(address)
+
+    def update_histories_from_recorder(self, recorder_filename: str):
+        # the cases are pushed by the stream
+        pass
+
+    def reset(self):
+        self._reset_histories(self.recorder_filename)
+
+    def append_batch(self, batch: CaseBatch):
+        obj_values, con_values, dv_values = batch.layout.split(batch.values,
+                                                               self.variable_filter)
+        self.obj_history.append_rows(batch.num_cases, obj_values, index=batch.iterations)
+        self.con_history.append_rows(batch.num_cases, con_values)
+        self.dv_history.append_rows(batch.num_cases, dv_values)
+        self.num_cases_read += batch.num_cases
+        self.last_case_counter = int(batch.counters[-1])
+        self.last_case_timestamp = float(batch.timestamps[-1])
+
+
+class StreamedRecorder:
+    def __init__(self, address: str, variable_filter: 'VariableFilter' = None):
+        """
+        The cases received on a stream address, published as immutable snapshots of the
+        histories with incremented version numbers like a watched recorder file
+        """
+        self.recorder_filename = address
+        self.variable_filter = variable_filter
+        self.num_watchers = 0
+        self.last_error: str = None
+        self._parser = StreamedHistoryParser(address, variable_filter)
+        self._lock = threading.Lock()
+        self._latest = (0, self._parser.snapshot())
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        filter_key = '' if self.variable_filter is None else self.variable_filter.key
+        return self.recorder_filename, filter_key
+
+    @property
+    def latest(self) -> Tuple[int, RecorderParser]:
+        return self._latest
+
+    def update(self) -> bool:
+        # new cases are published as they are received
+        return False
+
+    def reset(self):
+        with self._lock:
+            self._parser.reset()
+            self._publish()
+
+    def append_batch(self, batch: CaseBatch):
+        with self._lock:
+            self._parser.append_batch(batch)
+            self._publish()
+
+    def _publish(self):
+        version = self._latest[0]
+        self._latest = (version + 1, self._parser.snapshot())
+
+
+class CaseStreamListener:
+    def __init__(self, address: str, max_replayed_cases: int = 10000):
+        """
+        Listens on a stream address for the cases sent by a SocketRecorder.
+        The last max_replayed_cases cases received are kept so recorders subscribed later,
+        e.g. when the variable filter changes, start with them. Earlier cases are only in the
+        histories of the recorders that were subscribed when they arrived. The recorders are
+        reset when a new run connects.
+        """
+        self.address = address
+        self.max_replayed_cases = max_replayed_cases
+        self._recorders: List[StreamedRecorder] = []
+        self._batches: Deque[CaseBatch] = deque()
+        self._num_replayed_cases = 0
+        self._run_id = None
+        self._layouts: Dict[int, CaseLayout] = {}
+        self._lock = threading.Lock()
+        self._server_socket = None
+        self._connections: List[socket.socket] = []
+
+    def __len__(self):
+        return len(self._recorders)
+
+    def start(self) -> bool:
+        try:
+            server_socket = self._open_server_socket()
+        except (OSError, ValueError) as error:
+            logger.warning('om_dash: failed to listen on %s: %s', self.address, error)
+            return False
+        self._server_socket = server_socket
+        threading.Thread(target=self._accept_connections, args=(server_socket,),
+                         name='om_dash_case_listener', daemon=True).start()
+        return True
+
+    def _open_server_socket(self) -> socket.socket:
+        family, address = parse_stream_address(self.address)
+        server_socket = socket.socket(family, socket.SOCK_STREAM)
+        if family != socket.AF_UNIX:
+            # the port can be listened on again while a closed connection is in TIME_WAIT
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            if family == socket.AF_UNIX and os.path.exists(address):
+                os.remove(address)
+            server_socket.bind(address)
+            server_socket.listen()
+        except OSError:
+            server_socket.close()
+            raise
+        return server_socket
+
+    def close(self):
+        if self._server_socket is None:
+            return
+        server_socket, self._server_socket = self._server_socket, None
+        # shutdown wakes the threads blocked in accept and recv
+        with self._lock:
+            sockets = [server_socket] + self._connections
+        for open_socket in sockets:
+            try:
+                open_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        server_socket.close()
+        family, address = parse_stream_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.remove(address)
+
+    def subscribe(self, recorder: StreamedRecorder):
+        with self._lock:
+            for batch in self._batches:
+                recorder.append_batch(batch)
+            self._recorders.append(recorder)
+
+    def unsubscribe(self, recorder: StreamedRecorder):
+        with self._lock:
+            self._recorders.remove(recorder)
+
+    def _accept_connections(self, server_socket: socket.socket):
+        while True:
+            try:
+                connection, _ = server_socket.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._connections.append(connection)
+            threading.Thread(target=self._receive_cases, args=(connection,),
+                             name='om_dash_case_receiver', daemon=True).start()
+
+    def _receive_cases(self, connection: socket.socket):
+        decoder = FrameDecoder()
+        with connection:
+            while True:
+                try:
+                    data = connection.recv(1 << 20)
+                except OSError:
+                    break
+                if not data:
+                    break
+                self._process_frames(decoder.feed(data))
+        with self._lock:
+            self._connections.remove(connection)
+
+    def _process_frames(self, frames: List[Tuple[dict, bytes]]):
+        with self._lock:
+            cases = []
+            for header, payload in frames:
+                if header['kind'] == 'layout':
+                    self._add_batch(cases)
+                    cases = []
+                    self._add_layout(header)
+                elif header['kind'] == 'case':
+                    if cases and cases[-1][0]['layout_id'] != header['layout_id']:
+                        self._add_batch(cases)
+                        cases = []
+                    cases.append((header, payload))
+            self._add_batch(cases)
+
+    def _add_layout(self, header: dict):
+        if header['run_id'] != self._run_id:
+            self._run_id = header['run_id']
+            self._layouts = {}
+            self._batches.clear()
+            self._num_replayed_cases = 0
+            for recorder in self._recorders:
+                recorder.reset()
+        self._layouts[header['layout_id']] = CaseLayout(header['variables'])
+
+    def _add_batch(self, cases: List[Tuple[dict, bytes]]):
+        layout = self._layouts.get(cases[0][0]['layout_id']) if cases else None
+        if layout is None:
+            return
+        values = np.frombuffer(b''.join(payload for _, payload in cases), dtype=_value_dtype)
+        batch = CaseBatch(layout,
+                          np.array([header['iteration'] for header, _ in cases], dtype=int),
+                          np.array([header['counter'] for header, _ in cases], dtype=int),
+                          np.array([header['timestamp'] for header, _ in cases], dtype=float),
+                          values.reshape(len(cases), layout.size))
+        for recorder in self._recorders:
+            recorder.append_batch(batch)
+        self._keep_for_replay(batch)
+
+    def _keep_for_replay(self, batch: CaseBatch):
+        self._batches.append(batch)
+        self._num_replayed_cases += batch.num_cases
+        while self._num_replayed_cases > self.max_replayed_cases:
+            self._num_replayed_cases -= self._batches.popleft().num_cases
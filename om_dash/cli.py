@@ -0,0 +1,42 @@
+"""
+Post-process and monitor OpenMDAO optimizations.
+Run "om_dash <subcommand> --help" for the options of each subcommand.
+"""
+import argparse
+import importlib
+import sys
+
+# subcommands and the script modules that implement them. Each module defines add_arguments
+# and run and only imports openmdao, pandas, plotly, and dash inside run, so parsing the
+# arguments of any subcommand stays fast.
+subcommands = {'monitor': ('om_dash.monitor_opt',
+                           'Monitor an optimization in a dash gui'),
+               'plot': ('om_dash.om_plot_recorder_hist',
+                        'Plot the optimization history of recorders to html or an image'),
+               'convert': ('om_dash.om_convert_recorder_hist',
+                           'Convert the optimization history of recorders to a data file'),
+               'plot-bgs': ('om_dash.om_plot_bgs_history',
+                            'Plot the NLBGS and LNBGS residuals of a captured solver log')}
+
+
+def create_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog='om_dash', description=__doc__)
+    subparsers = arg_parser.add_subparsers(dest='subcommand', metavar='subcommand',
+                                           required=True)
+    for name, (module_name, help) in subcommands.items():
+        module = importlib.import_module(module_name)
+        subparser = subparsers.add_parser(
+            name, help=help, description=module.__doc__,
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+        module.add_arguments(subparser)
+        subparser.set_defaults(run=module.run)
+    return arg_parser
+
+
+def main(argv=None):
+    args = create_arg_parser().parse_args(argv if argv is not None else sys.argv[1:])
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
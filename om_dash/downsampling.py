@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def minmax_downsample_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of a shape-preserving subset of at most about max_points points of y.
+    The interior points are split into buckets and the minimum and maximum of each bucket are
+    kept along with the first and last points, so spikes in the history are not lost.
+    """
+    num_points = y.size
+    if num_points <= max_points or num_points <= 2:
+        return np.arange(num_points)
+
+    num_buckets = max(1, (max_points - 2) // 2)
+    interior = y[1:-1]
+    bucket_size = int(np.ceil(interior.size / num_buckets))
+    padded = np.full(num_buckets * bucket_size, np.nan)
+    padded[:interior.size] = interior
+    buckets = padded.reshape(num_buckets, bucket_size)
+
+    offsets = 1 + bucket_size * np.arange(num_buckets)
+    nan_buckets = np.isnan(buckets)
+    imin = np.argmin(np.where(nan_buckets, np.inf, buckets), axis=1) + offsets
+    imax = np.argmax(np.where(nan_buckets, -np.inf, buckets), axis=1) + offsets
+
+    indices = np.unique(np.concatenate([[0, num_points - 1], imin, imax]))
+    return indices[indices < num_points]
+
+
+def lttb_downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of max_points points of (x, y) selected with the Largest-Triangle-Three-Buckets
+    algorithm, which keeps the points that contribute most to the visual shape of the line.
+    """
+    num_points = y.size
+    if num_points <= max_points or max_points < 3:
+        return np.arange(num_points)
+
+    x = np.asarray(x, dtype=float)
+    y = np.where(np.isnan(y), 0.0, y)
+    edges = np.linspace(1, num_points - 1, max_points - 1).astype(int)
+
+    indices = np.zeros(max_points, dtype=int)
+    indices[-1] = num_points - 1
+    selected = 0
+    for ibucket in range(max_points - 2):
+        start, end = edges[ibucket], edges[ibucket + 1]
+        next_end = edges[ibucket + 2] if ibucket + 2 < edges.size else num_points
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        areas = np.abs((x[selected] - next_x) * (y[start:end] - y[selected])
+                       - (x[selected] - x[start:end]) * (next_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[ibucket + 1] = selected
+    return indices
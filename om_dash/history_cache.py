@@ -0,0 +1,114 @@
+import hashlib
+import os
+import zipfile
+import numpy as np
+
+
+class HistoryCache:
+    # bump when the layout of the cache files changes
+    cache_version = 2
+
+    def __init__(self, cache_dir: str = None):
+        """
+        On-disk cache of the objective, constraint, and design variable histories parsed from
+        an OpenMDAO recorder, stored as a .npz file.
+        The cache is keyed on the recorder's path, size, modification time and the counter
+        (and timestamp) of the last case that was read. By default the cache is written next to
+        the recorder, otherwise in cache_dir. Histories read with a variable filter are cached in
+        a separate file for each filter.
+        """
+        self.cache_dir = cache_dir
+
+    def get_cache_filename(self, recorder_filename: str, filter_key: str = '') -> str:
+        filter_suffix = ''
+        if filter_key:
+            filter_suffix = '_' + hashlib.sha1(filter_key.encode()).hexdigest()[:8]
+        if self.cache_dir is None:
+            return f'{recorder_filename}.om_dash_cache{filter_suffix}.npz'
+
+        path_hash = hashlib.sha1(os.path.abspath(recorder_filename).encode()).hexdigest()[:12]
+        root = os.path.splitext(os.path.basename(recorder_filename))[0]
+        return os.path.join(self.cache_dir, f'{root}_{path_hash}{filter_suffix}.npz')
+
+    def restore(self, parser, recorder_filename: str) -> bool:
+        """
+        Load the cached histories into the parser if the recorder has not shrunk since they were
+        cached. The parser can then append any new cases with its incremental read, which
+        verifies that the cached cases are still in the recorder.
+        Returns True if the recorder is unchanged so no read is necessary.
+        """
+        filter_key = _get_filter_key(parser)
+        cache_filename = self.get_cache_filename(recorder_filename, filter_key)
+        if not os.path.exists(cache_filename) or not os.path.exists(recorder_filename):
+            return False
+
+        try:
+            with np.load(cache_filename, allow_pickle=False) as cache:
+                arrays = dict(cache)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return False
+
+        stat = os.stat(recorder_filename)
+        if not self._cache_is_for_recorder(arrays, recorder_filename, stat):
+            return False
+        if str(arrays['variable_filter']) != filter_key:
+            return False
+
+        parser.obj_history.load_arrays(arrays, 'objs_')
+        parser.con_history.load_arrays(arrays, 'cons_')
+        parser.dv_history.load_arrays(arrays, 'dvs_')
+        parser.num_cases_read = int(arrays['num_cases_read'])
+        last_case_counter = int(arrays['last_case_counter'])
+        parser.last_case_counter = None if last_case_counter < 0 else last_case_counter
+        last_case_timestamp = float(arrays['last_case_timestamp'])
+        parser.last_case_timestamp = None if np.isnan(last_case_timestamp) else last_case_timestamp
+
+        return (int(arrays['recorder_size']) == stat.st_size
+                and int(arrays['recorder_mtime_ns']) == stat.st_mtime_ns)
+
+    def store(self, parser, recorder_stat: os.stat_result):
+        """
+        Write the parser's histories to the cache. recorder_stat should be taken before the
+        recorder was read so cases recorded during the read are picked up next time.
+        """
+        recorder_filename = parser.recorder_filename
+        filter_key = _get_filter_key(parser)
+        last_case_counter = -1 if parser.last_case_counter is None else parser.last_case_counter
+        last_case_timestamp = (np.nan if parser.last_case_timestamp is None
+                               else parser.last_case_timestamp)
+        arrays = {'cache_version': np.array(self.cache_version),
+                  'recorder_path': np.array(os.path.abspath(recorder_filename)),
+                  'variable_filter': np.array(filter_key),
+                  'recorder_size': np.array(recorder_stat.st_size),
+                  'recorder_mtime_ns': np.array(recorder_stat.st_mtime_ns),
+                  'num_cases_read': np.array(parser.num_cases_read),
+                  'last_case_counter': np.array(last_case_counter),
+                  'last_case_timestamp': np.array(last_case_timestamp)}
+        arrays.update(parser.obj_history.to_arrays('objs_'))
+        arrays.update(parser.con_history.to_arrays('cons_'))
+        arrays.update(parser.dv_history.to_arrays('dvs_'))
+
+        cache_filename = self.get_cache_filename(recorder_filename, filter_key)
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        # write to a temporary file first so a reader never sees a partially written cache
+        temp_filename = f'{cache_filename}.{os.getpid()}.tmp'
+        with open(temp_filename, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_filename, cache_filename)
+
+    def _cache_is_for_recorder(self, arrays: dict, recorder_filename: str,
+                               stat: os.stat_result) -> bool:
+        if 'cache_version' not in arrays or int(arrays['cache_version']) != self.cache_version:
+            return False
+        if str(arrays['recorder_path']) != os.path.abspath(recorder_filename):
+            return False
+        return stat.st_size >= int(arrays['recorder_size'])
+
+
+def _get_filter_key(parser) -> str:
+    variable_filter = parser.variable_filter
+    if variable_filter is None or variable_filter.is_selecting_everything():
+        return ''
+    return variable_filter.key
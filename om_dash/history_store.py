@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+from .instrumentation import instrumentation
+
+
+class ColumnarHistory:
+    def __init__(self, index_name: str = None, initial_capacity: int = 64):
+        """
+        Growable columnar storage for the history of a set of variables.
+        Each variable is stored in a 2D numpy block (rows x flattened elements) whose
+        capacity doubles when it fills up, so appending a case is amortized O(1).
+        The dataframe view is built on demand and cached until the next append.
+
+        If index_name is given, an integer index column with that name (e.g. 'Iteration')
+        is stored and placed first in the dataframe view.
+        """
+        self.index_name = index_name
+        self.initial_capacity = initial_capacity
+        self.clear()
+
+    def clear(self):
+        self.num_rows = 0
+        self._capacity = 0
+        self._index = np.zeros(0, dtype=int)
+        self._blocks: Dict[str, np.ndarray] = {}
+        self._column_names: Dict[str, List[str]] = {}
+        self._dataframe = None
+
+    @property
+    def columns(self) -> List[str]:
+        columns = [] if self.index_name is None else [self.index_name]
+        for names in self._column_names.values():
+            columns.extend(names)
+        return columns
+
+    @property
+    def variable_sizes(self) -> Dict[str, int]:
+        return {key: block.shape[1] for key, block in self._blocks.items()}
+
+    def get_values(self, key: str) -> np.ndarray:
+        """
+        The history of a variable as a (rows x flattened elements) view
+        """
+        return self._blocks[key][:self.num_rows, :]
+
+    def get_column_names(self, key: str, prefixes: Dict[str, str] = None) -> List[str]:
+        prefix = '' if prefixes is None else prefixes.get(key, '')
+        if not prefix:
+            return self._column_names[key]
+        return [prefix + name for name in self._column_names[key]]
+
+    def get_index_since(self, first_row: int) -> np.ndarray:
+        return self._index[first_row:self.num_rows]
+
+    def get_rows_since(self, first_row: int,
+                       prefixes: Dict[str, str] = None) -> Dict[str, np.ndarray]:
+        """
+        The values of each column in the rows after the first first_row rows.
+        The columns of a variable are named with its prefix in prefixes, if it has one.
+        """
+        rows = {}
+        for key, block in self._blocks.items():
+            rows.update(zip(self.get_column_names(key, prefixes),
+                            block[first_row:self.num_rows, :].T))
+        return rows
+
+    def has_column(self, column: str) -> bool:
+        return any(column in names for names in self._column_names.values())
+
+    def reserve(self, num_rows: int):
+        """
+        Preallocate room for num_rows rows in total
+        """
+        self._ensure_capacity(num_rows)
+
+    def append(self, values: Dict[str, np.ndarray], index: int = None):
+        """
+        Add one row (case) to the history.
+        Array-valued variables are flattened into one column per element.
+        """
+        self._ensure_capacity(self.num_rows + 1)
+        if self.index_name is not None:
+            self._index[self.num_rows] = index
+
+        for key, vals in values.items():
+            vals = np.asarray(vals).ravel()
+            if key not in self._blocks:
+                self._add_variable(key, vals.size)
+            self._blocks[key][self.num_rows, :] = vals
+
+        self.num_rows += 1
+        self._dataframe = None
+
+    def append_rows(self, num_new_rows: int, values: Dict[str, np.ndarray],
+                    index: np.ndarray = None):
+        """
+        Add a block of rows to the history.
+        Each value is a 2D array with one row per case and one column per flattened element.
+        """
+        if num_new_rows == 0:
+            return
+        start = self.num_rows
+        end = start + num_new_rows
+        self._ensure_capacity(end)
+        if self.index_name is not None:
+            self._index[start:end] = index
+
+        for key, vals in values.items():
+            if key not in self._blocks:
+                self._add_variable(key, vals.shape[1])
+            self._blocks[key][start:end, :] = vals
+
+        self.num_rows = end
+        self._dataframe = None
+
+    def extend(self, other: 'ColumnarHistory', index_offset: int = 0):
+        """
+        Append all the rows of another history
+        """
+        if other.num_rows == 0:
+            return
+        start = self.num_rows
+        end = start + other.num_rows
+        self._ensure_capacity(end)
+        if self.index_name is not None:
+            self._index[start:end] = other._index[:other.num_rows] + index_offset
+
+        for key, block in other._blocks.items():
+            if key not in self._blocks:
+                self._add_variable(key, block.shape[1])
+            self._blocks[key][start:end, :] = block[:other.num_rows, :]
+
+        self.num_rows = end
+        self._dataframe = None
+
+    def snapshot(self) -> 'ColumnarHistory':
+        """
+        A read-only view of the rows stored so far that shares their memory.
+        Rows and variables appended to this history later are not visible in the view.
+        """
+        snapshot = ColumnarHistory(self.index_name, self.initial_capacity)
+        snapshot.num_rows = self.num_rows
+        snapshot._capacity = self.num_rows
+        snapshot._index = self._read_only_rows(self._index)
+        snapshot._blocks = {key: self._read_only_rows(block) for key, block in self._blocks.items()}
+        snapshot._column_names = dict(self._column_names)
+        return snapshot
+
+    def _read_only_rows(self, array: np.ndarray) -> np.ndarray:
+        view = array[:self.num_rows]
+        view.flags.writeable = False
+        return view
+
+    def to_arrays(self, prefix: str = '') -> Dict[str, np.ndarray]:
+        """
+        The stored rows as a flat dictionary of arrays, e.g. for writing with np.savez
+        """
+        arrays = {f'{prefix}num_rows': np.array(self.num_rows),
+                  f'{prefix}index': self._index[:self.num_rows],
+                  f'{prefix}variables': np.array(list(self._blocks.keys()), dtype=str)}
+        for ivar, block in enumerate(self._blocks.values()):
+            arrays[f'{prefix}block_{ivar}'] = block[:self.num_rows, :]
+        return arrays
+
+    def load_arrays(self, arrays: Dict[str, np.ndarray], prefix: str = ''):
+        """
+        Replace the contents of the history with arrays created by to_arrays
+        """
+        self.clear()
+        num_rows = int(arrays[f'{prefix}num_rows'])
+        self._ensure_capacity(num_rows)
+        if self.index_name is not None:
+            self._index[:num_rows] = arrays[f'{prefix}index']
+        for ivar, key in enumerate(arrays[f'{prefix}variables']):
+            block = arrays[f'{prefix}block_{ivar}']
+            self._add_variable(str(key), block.shape[1])
+            self._blocks[str(key)][:num_rows, :] = block
+        self.num_rows = num_rows
+
+    def to_dataframe(self) -> pd.DataFrame:
+        if self._dataframe is None:
+            self._dataframe = self._build_dataframe()
+        return self._dataframe
+
+    @instrumentation.timed('columnar_history.build_dataframe')
+    def _build_dataframe(self) -> pd.DataFrame:
+        if len(self._blocks) == 0 and self.num_rows > 0 and self.index_name is not None:
+            # every variable was filtered out but the rows still have an index
+            dataframe = pd.DataFrame(index=pd.RangeIndex(self.num_rows))
+        elif len(self._blocks) == 0:
+            dataframe = pd.DataFrame({'empty': []})
+        else:
+            values = np.hstack([block[:self.num_rows, :] for block in self._blocks.values()])
+            columns = [name for names in self._column_names.values() for name in names]
+            dataframe = pd.DataFrame(values, columns=columns)
+
+        if self.index_name is not None:
+            dataframe.insert(0, self.index_name, self._index[:dataframe.shape[0]].copy())
+        return dataframe
+
+    def _add_variable(self, key: str, size: int):
+        self._blocks[key] = np.full((self._capacity, size), np.nan)
+        if size == 1:
+            self._column_names[key] = [key]
+        else:
+            self._column_names[key] = [f'{key}_{i}' for i in range(size)]
+
+    def _ensure_capacity(self, required_rows: int):
+        if required_rows <= self._capacity:
+            return
+        capacity = max(self._capacity, self.initial_capacity)
+        while capacity < required_rows:
+            capacity *= 2
+
+        self._index = self._grow(self._index, capacity)
+        for key, block in self._blocks.items():
+            self._blocks[key] = self._grow(block, capacity)
+        self._capacity = capacity
+
+    def _grow(self, array: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:self.num_rows] = array[:self.num_rows]
+        if grown.dtype.kind == 'f':
+            grown[self.num_rows:] = np.nan
+        return grown
@@ -0,0 +1,273 @@
+import importlib.util
+import os
+import tempfile
+import zipfile
+from typing import BinaryIO, Callable, List
+import numpy as np
+import pandas as pd
+
+
+def write_tecplot_binary(filename: str, column_names: List[str], columns: List[np.ndarray]):
+    """
+    Write the columns as one ordered zone of a binary Tecplot (.plt, version 112) file
+    """
+    num_rows = columns[0].size if columns else 0
+    writer = TecplotBinaryStreamWriter(filename, column_names, num_rows)
+    writer.write_rows(columns)
+    writer.close()
+
+
+class TecplotAsciiStreamWriter:
+    def __init__(self, filename: str, column_names: List[str], num_rows: int):
+        """
+        Tecplot ASCII (.dat) file in point format written a block of rows at a time.
+        The zone size is in the header, so the total number of rows must be known up front.
+        """
+        self._file = open(filename, 'w')
+        vars = ''.join(f' "{var}"' for var in column_names)
+        self._file.write('TITLE     = "OpenMDAO Record"\n'
+                         + f'VARIABLES ={vars}\n'
+                         + f'ZONE T="OpenMDAO"  I={num_rows}, ZONETYPE=Ordered DATAPACKING=POINT\n')
+
+    def write_rows(self, columns: List[np.ndarray]):
+        np.savetxt(self._file, np.column_stack(columns))
+
+    def close(self):
+        self._file.close()
+
+
+class CsvStreamWriter:
+    def __init__(self, filename: str, column_names: List[str], num_rows: int):
+        """
+        Comma separated values file written a block of rows at a time in the same layout as
+        DataFrame.to_csv, including the row number column
+        """
+        self.column_names = column_names
+        self.num_rows_written = 0
+        self._file = open(filename, 'w', newline='')
+        pd.DataFrame(columns=column_names).to_csv(self._file)
+
+    def write_rows(self, columns: List[np.ndarray]):
+        num_new_rows = columns[0].size
+        index = pd.RangeIndex(self.num_rows_written, self.num_rows_written + num_new_rows)
+        rows = pd.DataFrame(dict(zip(self.column_names, columns)), index=index)
+        rows.to_csv(self._file, header=False)
+        self.num_rows_written += num_new_rows
+
+    def close(self):
+        self._file.close()
+
+
+class ColumnBlockStreamWriter:
+    def __init__(self, file: BinaryIO, data_offset: int, num_columns: int, num_rows: int):
+        """
+        Writes blocks of rows into a file laid out column by column starting at data_offset,
+        with 8 bytes per value, by seeking to each column's place for the rows.
+        Rows beyond num_rows (e.g., cases recorded after the rows were counted) are dropped.
+        """
+        self.num_rows = num_rows
+        self.num_rows_written = 0
+        self.dtypes = [None] * num_columns
+        self._file = file
+        self._data_offset = data_offset
+        self._file.truncate(data_offset + 8 * num_columns * num_rows)
+
+    def write_rows(self, columns: List[np.ndarray]):
+        num_new_rows = min(columns[0].size, self.num_rows - self.num_rows_written)
+        for icolumn, column in enumerate(columns):
+            column = self._as_8_byte_values(icolumn, column[:num_new_rows])
+            self._file.seek(self.get_column_offset(icolumn) + 8 * self.num_rows_written)
+            self._file.write(column.tobytes())
+        self.num_rows_written += num_new_rows
+
+    def get_column_offset(self, icolumn: int) -> int:
+        return self._data_offset + 8 * icolumn * self.num_rows
+
+    def _as_8_byte_values(self, icolumn: int, column: np.ndarray) -> np.ndarray:
+        if self.dtypes[icolumn] is None:
+            self.dtypes[icolumn] = np.dtype('<i8' if column.dtype.kind in 'iu' else '<f8')
+        return np.asarray(column, dtype=self.dtypes[icolumn])
+
+
+class TecplotBinaryStreamWriter:
+    def __init__(self, filename: str, column_names: List[str], num_rows: int):
+        """
+        Binary Tecplot (.plt, version 112) file with one ordered zone written a block of rows
+        at a time. Each variable's values are stored contiguously, so each block of rows is
+        written to its place in every variable's section, and the variable ranges in the
+        header are filled in when the file is closed.
+        """
+        num_columns = len(column_names)
+        self._min = np.full(num_columns, np.inf)
+        self._max = np.full(num_columns, -np.inf)
+        self._file = open(filename, 'w+b')
+        self._write_header(column_names, num_rows)
+        self._min_max_offset = self._file.tell()
+        self._write_min_max()
+        self._columns = ColumnBlockStreamWriter(self._file, self._file.tell(), num_columns,
+                                                num_rows)
+        # tecplot's double precision data
+        self._columns.dtypes = [np.dtype('<f8')] * num_columns
+
+    def write_rows(self, columns: List[np.ndarray]):
+        num_rows_left = self._columns.num_rows - self._columns.num_rows_written
+        columns = [column[:num_rows_left] for column in columns]
+        for icolumn, column in enumerate(columns):
+            finite_values = column[np.isfinite(column)]
+            if finite_values.size > 0:
+                self._min[icolumn] = min(self._min[icolumn], finite_values.min())
+                self._max[icolumn] = max(self._max[icolumn], finite_values.max())
+        self._columns.write_rows(columns)
+
+    def close(self):
+        self._file.seek(self._min_max_offset)
+        self._write_min_max()
+        self._file.close()
+
+    def _write_header(self, column_names: List[str], num_rows: int):
+        f = self._file
+        f.write(b'#!TDV112')
+        _write_int32(f, 1)  # byte order
+        _write_int32(f, 0)  # full file type
+        _write_tecplot_string(f, 'OpenMDAO Record')
+        _write_int32(f, len(column_names))
+        for name in column_names:
+            _write_tecplot_string(f, name)
+
+        _write_float32(f, 299.0)  # zone marker
+        _write_tecplot_string(f, 'OpenMDAO')
+        _write_int32(f, -1)  # parent zone
+        _write_int32(f, -1)  # strand id
+        f.write(np.array(0.0, dtype='<f8').tobytes())  # solution time
+        _write_int32(f, -1)  # unused zone color
+        _write_int32(f, 0)  # ordered zone
+        _write_int32(f, 0)  # all variables at the nodes
+        _write_int32(f, 0)  # no face neighbors
+        _write_int32(f, 0)  # no user defined face connections
+        f.write(np.array([num_rows, 1, 1], dtype='<i4').tobytes())
+        _write_int32(f, 0)  # no auxiliary data
+        _write_float32(f, 357.0)  # end of header
+
+        _write_float32(f, 299.0)
+        f.write(np.full(len(column_names), 2, dtype='<i4').tobytes())  # double precision data
+        _write_int32(f, 0)  # no passive variables
+        _write_int32(f, 0)  # no variable sharing
+        _write_int32(f, -1)  # no connectivity sharing
+
+    def _write_min_max(self):
+        have_values = self._min <= self._max
+        min_max = np.zeros((self._min.size, 2), dtype='<f8')
+        min_max[have_values, 0] = self._min[have_values]
+        min_max[have_values, 1] = self._max[have_values]
+        self._file.write(min_max.tobytes())
+
+
+def _write_int32(f: BinaryIO, value: int):
+    f.write(np.array(value, dtype='<i4').tobytes())
+
+
+def _write_float32(f: BinaryIO, value: float):
+    f.write(np.array(value, dtype='<f4').tobytes())
+
+
+def _write_tecplot_string(f: BinaryIO, string: str):
+    # one int32 per character followed by a null terminator
+    characters = [ord(character) for character in string] + [0]
+    f.write(np.array(characters, dtype='<i4').tobytes())
+
+
+def write_npz(filename: str, column_names: List[str], columns: List[np.ndarray]):
+    """
+    Write each column as an array named after the column in an uncompressed .npz file
+    """
+    # written entry by entry since np.savez reserves some keyword names
+    with zipfile.ZipFile(filename, 'w', allowZip64=True) as npz_file:
+        for name, column in zip(column_names, columns):
+            with npz_file.open(f'{name}.npy', 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, np.asarray(column), allow_pickle=False)
+
+
+class NpzStreamWriter:
+    def __init__(self, filename: str, column_names: List[str], num_rows: int):
+        """
+        .npz file written a block of rows at a time. The rows are collected column by column
+        in a temporary file next to the output, which is copied into the .npz on close.
+        """
+        self.filename = filename
+        self.column_names = column_names
+        directory = os.path.dirname(os.path.abspath(filename))
+        self._temp_file = tempfile.TemporaryFile(dir=directory)
+        self._columns = ColumnBlockStreamWriter(self._temp_file, 0, len(column_names), num_rows)
+
+    def write_rows(self, columns: List[np.ndarray]):
+        self._columns.write_rows(columns)
+
+    def close(self):
+        num_rows = self._columns.num_rows_written
+        with zipfile.ZipFile(self.filename, 'w', allowZip64=True) as npz_file:
+            for icolumn, name in enumerate(self.column_names):
+                dtype = self._columns.dtypes[icolumn] or np.dtype('<f8')
+                with npz_file.open(f'{name}.npy', 'w', force_zip64=True) as f:
+                    header = {'descr': dtype.str, 'fortran_order': False, 'shape': (num_rows,)}
+                    np.lib.format.write_array_header_1_0(f, header)
+                    self._copy_column(icolumn, num_rows, f)
+        self._temp_file.close()
+
+    def _copy_column(self, icolumn: int, num_rows: int, f: BinaryIO):
+        self._temp_file.seek(self._columns.get_column_offset(icolumn))
+        bytes_left = 8 * num_rows
+        while bytes_left > 0:
+            data = self._temp_file.read(min(bytes_left, 64 * 1024 * 1024))
+            f.write(data)
+            bytes_left -= len(data)
+
+
+def write_parquet(filename: str, column_names: List[str], columns: List[np.ndarray]):
+    pd.DataFrame(dict(zip(column_names, columns))).to_parquet(filename, index=False)
+
+
+def write_feather(filename: str, column_names: List[str], columns: List[np.ndarray]):
+    pd.DataFrame(dict(zip(column_names, columns))).to_feather(filename)
+
+
+# binary output writers by file extension and the packages one of which they need
+history_writers = {'plt': (write_tecplot_binary, []),
+                   'npz': (write_npz, []),
+                   'parquet': (write_parquet, ['pyarrow', 'fastparquet']),
+                   'feather': (write_feather, ['pyarrow'])}
+
+
+def get_history_writer(filename: str) -> Callable:
+    """
+    Returns the binary writer for the extension of filename or None if there isn't one.
+    Raises an ImportError if the writer needs a library that is not installed.
+    """
+    ext = os.path.splitext(filename)[1].lstrip('.').lower()
+    if ext not in history_writers:
+        return None
+
+    writer, packages = history_writers[ext]
+    if packages and not any(importlib.util.find_spec(package) for package in packages):
+        raise ImportError(f'Writing .{ext} files requires one of these packages: '
+                          + ', '.join(packages))
+    return writer
+
+
+# writers for converting histories a block of rows at a time by file extension
+streaming_history_writers = {'dat': TecplotAsciiStreamWriter,
+                             'csv': CsvStreamWriter,
+                             'plt': TecplotBinaryStreamWriter,
+                             'npz': NpzStreamWriter}
+
+
+def get_streaming_history_writer(filename: str) -> type:
+    """
+    Returns the streaming writer class for the extension of filename.
+    Files with an unknown extension are written as comma separated values.
+    """
+    ext = os.path.splitext(filename)[1].lstrip('.').lower()
+    if ext in streaming_history_writers:
+        return streaming_history_writers[ext]
+    if ext in history_writers:
+        raise ValueError(f'Streaming conversion to .{ext} files is not supported')
+    return CsvStreamWriter
@@ -0,0 +1,96 @@
+import functools
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class Instrumentation:
+    def __init__(self, num_recent_timings=100):
+        """
+        Lightweight timers and counters for finding where the time goes when reading recorders,
+        building figures, and serving the monitor's callbacks.
+        Each stage keeps its number of calls, total time, and its most recent timings.
+        """
+        self.num_recent_timings = num_recent_timings
+        self.enabled = True
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._num_calls: Dict[str, int] = defaultdict(int)
+            self._total_times: Dict[str, float] = defaultdict(float)
+            self._recent_times: Dict[str, deque] = defaultdict(
+                lambda: deque(maxlen=self.num_recent_timings))
+            self.counters: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def timer(self, stage: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str):
+        """
+        Decorator that times each call of a function
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def timed_function(*args, **kwargs):
+                with self.timer(stage):
+                    return function(*args, **kwargs)
+            return timed_function
+        return decorator
+
+    def record_time(self, stage: str, seconds: float):
+        with self._lock:
+            self._num_calls[stage] += 1
+            self._total_times[stage] += seconds
+            self._recent_times[stage].append(seconds)
+
+    def count(self, counter: str, amount: int = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[counter] += amount
+
+    def get_stage_summaries(self) -> List[dict]:
+        with self._lock:
+            summaries = []
+            for stage, num_calls in self._num_calls.items():
+                recent_times = self._recent_times[stage]
+                summaries.append({'stage': stage,
+                                  'calls': num_calls,
+                                  'total_seconds': self._total_times[stage],
+                                  'mean_seconds': self._total_times[stage] / num_calls,
+                                  'last_seconds': recent_times[-1],
+                                  'recent_max_seconds': max(recent_times)})
+        return sorted(summaries, key=lambda summary: summary['total_seconds'], reverse=True)
+
+    def format_report(self) -> str:
+        lines = [f'{"stage":<44}{"calls":>8}{"total [s]":>12}{"mean [ms]":>12}'
+                 f'{"last [ms]":>12}{"max [ms]":>12}']
+        for summary in self.get_stage_summaries():
+            lines.append(f'{summary["stage"]:<44}{summary["calls"]:>8}'
+                         f'{summary["total_seconds"]:>12.4f}'
+                         f'{1e3 * summary["mean_seconds"]:>12.2f}'
+                         f'{1e3 * summary["last_seconds"]:>12.2f}'
+                         f'{1e3 * summary["recent_max_seconds"]:>12.2f}')
+        with self._lock:
+            counters = sorted(self.counters.items())
+        if counters:
+            lines.append('')
+            lines.append(f'{"counter":<44}{"value":>20}')
+            for counter, value in counters:
+                lines.append(f'{counter:<44}{value:>20}')
+        return '\n'.join(lines)
+
+
+# the instrumentation shared by all of om_dash
+instrumentation = Instrumentation()
@@ -1,24 +1,48 @@
 """
 This script is a dash gui used to monitor an OpenMDAO optimization by periodically updating a
 plotly figure of the history from an OpenMDAO recorder.
+With --listen, the monitor receives the cases sent by an om_dash SocketRecorder on a tcp://host:port
+or unix://path address as soon as they are recorded.
 """
 
 import argparse
-import dash
-from om_dash.opt_hist_gui_core import GuiOptHistoryCore, add_callbacks
+import atexit
+from om_dash.instrumentation import instrumentation
 
 
-def main():
-    parser = argparse.ArgumentParser(description=__doc__)
-    args = parser.parse_args()
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--listen', type=str, default=None,
+                        help='Receive the cases of a SocketRecorder on this address '
+                             '(tcp://host:port or unix://path) from startup')
+    parser.add_argument('--profile', action='store_true',
+                        help='Show the diagnostics timings by default and print the time spent '
+                             'in each stage on exit')
+
+
+def run(args: argparse.Namespace):
+    import dash
+    from om_dash.opt_hist_gui_core import GuiOptHistoryCore, add_callbacks
+
+    if args.profile:
+        atexit.register(lambda: print(instrumentation.format_report()))
 
-    core = GuiOptHistoryCore()
+    core = GuiOptHistoryCore(show_diagnostics=args.profile)
+    if args.listen is not None:
+        # keep listening even when no browser session watches the stream
+        core.sessions.recorder_watcher.watch(args.listen)
+        core.default_recorder_file = args.listen
     monitor = dash.Dash()
-    monitor.layout = core.full_layout
+    monitor.layout = core.serve_layout
     add_callbacks(monitor, core)
 
-    monitor.run_server(debug=True, dev_tools_ui=True,
-                       dev_tools_hot_reload=False, use_reloader=False)
+    monitor.run(debug=True, dev_tools_ui=True,
+                dev_tools_hot_reload=False, use_reloader=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    run(parser.parse_args())
 
 
 if __name__ == '__main__':
@@ -10,5 +10,5 @@ from om_dash.opt_hist_gui_core import GuiOptHistoryCore, add_callbacks
 
 core = GuiOptHistoryCore()
 monitor = JupyterDash()
-monitor.layout = core.full_layout
+monitor.layout = core.serve_layout
 add_callbacks(monitor, core)
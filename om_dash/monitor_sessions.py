@@ -0,0 +1,165 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict
+
+from om_dash.opt_hist_figure_generator import OptHistoryFigureGenerator
+from om_dash.recorder_parser import RecorderParser
+from om_dash.recorder_watcher import RecorderWatcher, WatchedRecorder
+from om_dash.refresh_scheduler import AdaptiveRefreshScheduler
+from om_dash.bgs_residual_parser import BgsResidualFollower
+from om_dash.residual_figure_generator import ResidualHistoryFigureGenerator
+from om_dash.variable_filter import VariableFilter
+
+
+class MonitorSession:
+    def __init__(self, session_id: str):
+        """
+        The state of one browser session of the monitor: the recorder and solver log it is
+        watching, its figure settings, and which iterations its figures already show
+        """
+        self.session_id = session_id
+        self.lock = threading.RLock()
+        self.last_access_time = time.monotonic()
+        # set when the session was recreated for a browser page whose session had been evicted
+        self.expired = False
+
+        self.recorder_file = ''
+        self.variable_filter: VariableFilter = None
+        self.recorder: WatchedRecorder = None
+        self.snapshot_version = None
+        self.recorder_status = ''
+        self.fig_generator = OptHistoryFigureGenerator(RecorderParser())
+        self.opt_hist_fig = None
+        self.refresh_scheduler = AdaptiveRefreshScheduler()
+        self.refresh_interval_in_seconds = None
+
+        self.residual_log_file = ''
+        self.residual_follower = BgsResidualFollower(self.residual_log_file)
+        self.residual_fig_generator = ResidualHistoryFigureGenerator(self.residual_follower)
+        self.residual_hist_fig = None
+
+    def watch_recorder(self, recorder_file: str, watcher: RecorderWatcher,
+                       variable_filter: VariableFilter = None):
+        previous_recorder = self.recorder
+        if (previous_recorder is not None and self.recorder_file == recorder_file
+                and self.variable_filter == variable_filter):
+            return
+        # watch before unwatching so a stream that is still needed keeps its listener
+        self.recorder = watcher.watch(recorder_file, variable_filter)
+        self.recorder_file = recorder_file
+        self.variable_filter = variable_filter
+        if previous_recorder is not None:
+            watcher.unwatch(previous_recorder)
+        self.snapshot_version = None
+
+    def use_latest_snapshot(self) -> bool:
+        """
+        Point the figure generator at the latest published snapshot of the recorder.
+        Returns True if it is newer than the snapshot used before.
+        """
+        if self.recorder is None:
+            return False
+        version, snapshot = self.recorder.latest
+        if version == self.snapshot_version:
+            return False
+        self.snapshot_version = version
+        previous_snapshot, self.fig_generator.parser = self.fig_generator.parser, snapshot
+        self.refresh_scheduler.record_new_cases(_count_new_cases(previous_snapshot, snapshot))
+        return True
+
+    def update_recorder_status(self) -> bool:
+        """
+        Describe the last error reading the recorder, or nothing once it is read again.
+        Returns True if the description changed.
+        """
+        error = None if self.recorder is None else self.recorder.last_error
+        status = '' if error is None else f'{error}. Showing the cases read before the error.'
+        if status == self.recorder_status:
+            return False
+        self.recorder_status = status
+        return True
+
+    def update_refresh_interval(self) -> bool:
+        """
+        Adapt the refresh interval to the rate cases arrive.
+        Returns True if it changed by more than 10 percent.
+        """
+        interval = self.refresh_scheduler.get_interval_in_seconds()
+        if (self.refresh_interval_in_seconds is not None
+                and abs(interval - self.refresh_interval_in_seconds)
+                <= 0.1 * self.refresh_interval_in_seconds):
+            return False
+        self.refresh_interval_in_seconds = interval
+        return True
+
+    def close(self, watcher: RecorderWatcher):
+        if self.recorder is not None:
+            watcher.unwatch(self.recorder)
+            self.recorder = None
+
+
+def _count_new_cases(previous: RecorderParser, latest: RecorderParser) -> int:
+    if latest.history_id != previous.history_id:
+        return latest.num_cases_read
+    return latest.num_cases_read - previous.num_cases_read
+
+
+class SessionRegistry:
+    def __init__(self, max_sessions=32, idle_timeout_in_seconds=3600.0,
+                 poll_interval_in_seconds=1.0):
+        """
+        Bounded LRU registry of the monitor sessions keyed on a session id.
+        The least recently used sessions are closed when there are more than max_sessions,
+        and sessions that have not been accessed for idle_timeout_in_seconds are closed too.
+        The recorders of all the sessions are parsed by one background watcher.
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout_in_seconds = idle_timeout_in_seconds
+        self.recorder_watcher = RecorderWatcher(poll_interval_in_seconds)
+        self._sessions: Dict[str, MonitorSession] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str):
+        return session_id in self._sessions
+
+    def create_session_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def create_session(self) -> MonitorSession:
+        """
+        A new session with a new id for a page load
+        """
+        session = self.get(self.create_session_id())
+        session.expired = False
+        return session
+
+    def get(self, session_id: str) -> MonitorSession:
+        """
+        Returns the session with this id. If it was evicted, an empty session is created in its
+        place and marked as expired so the callbacks know the page's settings must be applied
+        again.
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                session = MonitorSession(session_id)
+                session.expired = True
+            session.last_access_time = time.monotonic()
+            self._sessions[session_id] = session
+            self._evict_sessions()
+            return session
+
+    def _evict_sessions(self):
+        oldest_allowed_access_time = time.monotonic() - self.idle_timeout_in_seconds
+        for session_id in list(self._sessions.keys()):
+            too_many_sessions = len(self._sessions) > self.max_sessions
+            session = self._sessions[session_id]
+            if not too_many_sessions and session.last_access_time >= oldest_allowed_access_time:
+                break
+            del self._sessions[session_id]
+            session.close(self.recorder_watcher)
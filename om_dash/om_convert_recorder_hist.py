@@ -1,13 +1,20 @@
 """
 This script will read the sql file from an OpenMDAO recorder and write a tecplot
-.dat file or csv file with the history of the optimization.
+.dat file, csv file, or a binary file (.plt, .npz, .parquet, or .feather) with the history of
+the optimization.
 If multiple record files are provided, the histories will be concatenated and a single file will
 be written.
+With --stream, the recorders are converted a chunk of cases at a time so the memory used does not
+depend on the length of the histories.
 """
 
 import argparse
-from om_dash.recorder_history_stacker import RecorderHistoryStacker
-from typing import List
+from om_dash.instrumentation import instrumentation
+from om_dash.variable_filter import add_variable_filter_arguments, create_variable_filter
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from om_dash.recorder_history_stacker import RecorderHistoryStacker
 
 
 def set_output_file_name(inputs: List[str], output_arg: str, default_ext='dat'):
@@ -17,28 +24,84 @@ def set_output_file_name(inputs: List[str], output_arg: str, default_ext='dat'):
     return output_arg
 
 
-def write_data_to_file(parser: RecorderHistoryStacker, filename: str):
+def write_data_to_file(parser: 'RecorderHistoryStacker', filename: str):
+    from om_dash.history_writers import get_history_writer
+
     ext = filename.split('.')[-1]
-    if ext == 'dat':
+    binary_writer = get_history_writer(filename)
+    if binary_writer is not None:
+        iterations, rows = parser.get_rows_since(0)
+        column_names = [parser.obj_history.index_name] + list(rows.keys())
+        binary_writer(filename, column_names, [iterations] + list(rows.values()))
+    elif ext == 'dat':
         parser.write_data_to_tecplot(filename)
     else:
         data = parser.get_dataframe_of_all_data()
         data.to_csv(filename)
 
 
-def main():
-    arg_parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-                                         description=__doc__)
+def add_arguments(arg_parser: argparse.ArgumentParser):
     arg_parser.add_argument('-i', '--inputs', nargs='+', type=str, required=True,
                             help='OpenMDAO recorder filenames (.sql file)')
     arg_parser.add_argument(
         '-o', '--output', type=str, default='{first_recorder_root}.dat',
-        help='Filename to write. Should have a ".dat" file extension for tecplot or ".csv" for comma separated values.')
-    args = arg_parser.parse_args()
+        help='Filename to write. Should have a ".dat" file extension for tecplot or ".csv" for comma separated values.'
+             ' Binary files are written for the ".plt" (tecplot), ".npz", ".parquet", and'
+             ' ".feather" extensions. Parquet files require pyarrow or fastparquet and feather'
+             ' files require pyarrow.')
+    add_variable_filter_arguments(arg_parser)
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='Number of processes used to read the recorders. '
+                                 'Defaults to one per recorder up to the number of cores.')
+    arg_parser.add_argument('--no-cache', dest='cache', action='store_false',
+                            help='Do not read or write the cache of parsed recorder histories')
+    arg_parser.add_argument('--cache-dir', type=str, default=None,
+                            help='Directory for the parsed history cache files. '
+                                 'Defaults to writing them next to each recorder.')
+    arg_parser.add_argument('--stream', action='store_true',
+                            help='Convert the recorders a chunk of cases at a time with bounded '
+                                 'memory instead of reading the whole history first. '
+                                 'Supports the .dat, .csv, .plt, and .npz formats and does not '
+                                 'use the workers or the cache.')
+    arg_parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of cases per chunk with --stream')
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='Print the time spent in each stage')
+
+
+def run(args: argparse.Namespace):
+    from om_dash.recorder_history_stacker import RecorderHistoryStacker
+    from om_dash.history_cache import HistoryCache
+    from om_dash.history_writers import get_history_writer, get_streaming_history_writer
+    from om_dash.streaming_history_converter import StreamingHistoryConverter
 
-    om_parser = RecorderHistoryStacker(args.inputs)
     outfile = set_output_file_name(args.inputs, args.output)
-    write_data_to_file(om_parser, outfile)
+    variable_filter = create_variable_filter(args)
+    if args.stream:
+        get_streaming_history_writer(outfile)
+        with instrumentation.timer('convert.stream'):
+            converter = StreamingHistoryConverter(args.inputs, args.chunk_size, variable_filter)
+            converter.convert(outfile)
+    else:
+        # fail before reading the recorders if the writer's library is missing
+        get_history_writer(outfile)
+
+        history_cache = HistoryCache(args.cache_dir) if args.cache else None
+        with instrumentation.timer('convert.read_recorders'):
+            om_parser = RecorderHistoryStacker(args.inputs, args.workers, history_cache,
+                                               variable_filter)
+        with instrumentation.timer('convert.write_file'):
+            write_data_to_file(om_parser, outfile)
+
+    if args.profile:
+        print(instrumentation.format_report())
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+                                         description=__doc__)
+    add_arguments(arg_parser)
+    run(arg_parser.parse_args())
 
 
 if __name__ == '__main__':
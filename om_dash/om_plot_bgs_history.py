@@ -1,23 +1,32 @@
 """
 This script will read the file that captured the screen output from an OpenMDAO optimization and
 create a plotly plot showing the convergence of the NLBGS and/or the LNBGS solvers.
+With --compact, all the solves are drawn as one absolute and one relative residual trace, which
+keeps the plot responsive for thousands of solves. --summary also plots the iterations, final
+residuals, and reduction rate of each solve.
+Several outputs can be plotted at once, and the plots can be written as html or as images in any
+of the --formats. The images are rendered concurrently by one image export engine.
 """
-import os
 import argparse
-from typing import List
-import numpy as np
-import plotly.graph_objects as go
-from om_dash.bgs_residual_parser import BgsResidualParser
+from typing import TYPE_CHECKING
+from om_dash.batch_image_renderer import add_image_arguments, image_formats, set_figure_file_name
+from om_dash.instrumentation import instrumentation
 
-from om_dash.om_convert_recorder_hist import set_output_file_name
-from om_dash.plotly_base import PlotlyBase
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+    from om_dash.bgs_residual_parser import SolveHistory
 
 
 def create_arg_parser():
     arg_parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
                                          description=__doc__)
-    arg_parser.add_argument('-i', '--input', type=str, required=True,
-                            help='captured OpenMDAO screen output')
+    add_arguments(arg_parser)
+    return arg_parser
+
+
+def add_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument('-i', '--input', nargs='+', type=str, required=True,
+                            help='captured OpenMDAO screen output(s)')
     arg_parser.add_argument('--nlbgs',
                             action='store_true',
                             dest='confirm',
@@ -38,19 +47,30 @@ def create_arg_parser():
                             dest='relative',
                             help='Whether to plot relative residuals')
     arg_parser.add_argument('--no-relative', dest='relative', action='store_false')
+    arg_parser.add_argument('--compact', action='store_true',
+                            help='Plot all the solves as one absolute and one relative residual '
+                                 'trace instead of two traces per solve')
+    arg_parser.add_argument('--summary', action='store_true',
+                            help='Also plot the iterations, final residuals, and mean reduction '
+                                 'factor per iteration of each solve')
+    arg_parser.add_argument('--formats', nargs='+', type=str, choices=['html'] + image_formats,
+                            default=['html'], help='Formats to write each plot in')
+    add_image_arguments(arg_parser)
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='Print the time spent in each stage')
     arg_parser.set_defaults(nlbgs=True, lnbgs=True, absolute=True, relative=True)
 
-    return arg_parser
-
 
-def set_output_file_name(input: str, ext: str, doing_nlbgs: bool) -> str:
+def set_output_file_name(input: str, ext: str, doing_nlbgs: bool, output_dir: str = None,
+                         suffix: str = '') -> str:
     bgs = 'nlbgs' if doing_nlbgs else 'lnbgs'
-    input_root = os.path.splitext(input)[0]
-    output_arg = f'{input_root}_{bgs}.{ext}'
-    return output_arg
+    return set_figure_file_name(input, ext, output_dir, suffix=f'_{bgs}{suffix}')
 
 
 def set_figure_settings(add_update_menus: bool):
+    import plotly.graph_objects as go
+    from om_dash.plotly_base import PlotlyBase
+
     base = PlotlyBase()
     fig = go.Figure()
     xaxis, yaxis = base.get_axis_settings()
@@ -61,31 +81,111 @@ def set_figure_settings(add_update_menus: bool):
     return fig
 
 
-def create_residual_figure(all_data: List[np.ndarray], outfile: str,
+def create_residual_figure(all_data: 'SolveHistory', outfile: str,
                            doing_nlbgs: bool, absolute: bool, relative: bool):
+    import plotly.graph_objects as go
+
     write_html = (outfile.split('.')[-1] == 'html')
-    start_iteration = 0
     fig = set_figure_settings(write_html)
 
     for solve, data_set in enumerate(all_data):
-        current_num_iterations = data_set.shape[0]
-        end_iteration = start_iteration + current_num_iterations
-        plot_iterations = np.arange(start_iteration, end_iteration)
+        # each solve's records start at its offset on the cumulative iteration axis
+        start_iteration = int(all_data.offsets[solve])
+        plot_iterations = dict(x0=start_iteration, dx=1)
         if absolute:
-            fig.add_trace(go.Scattergl(x=plot_iterations,
+            fig.add_trace(go.Scattergl(**plot_iterations,
                                        y=data_set[:, 1],
                                        mode='lines+markers',
                                        name=f'Solve {solve}: Absolute'))
         if relative:
-            fig.add_trace(go.Scattergl(x=plot_iterations,
+            fig.add_trace(go.Scattergl(**plot_iterations,
                                        y=data_set[:, 2],
                                        mode='lines+markers',
                                        name=f'Solve {solve}: Relative'))
-        start_iteration += current_num_iterations
     return fig
 
 
-def write_file(outfile: str, fig: go.Figure):
+def create_compact_residual_figure(all_data: 'SolveHistory', outfile: str,
+                                   doing_nlbgs: bool, absolute: bool, relative: bool):
+    """
+    All the solves as one absolute and one relative residual trace with a NaN point between
+    consecutive solves to break the line. The hover text shows the solve and its iteration.
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+
+    write_html = (outfile.split('.')[-1] == 'html')
+    fig = set_figure_settings(write_html)
+    if not all_data:
+        return fig
+
+    data = all_data.records
+    solves = all_data.get_solve_ids()
+
+    # one separator point ahead of every solve but the first
+    record_positions = np.arange(data.shape[0]) + solves
+    num_points = data.shape[0] + len(all_data) - 1
+    separator_positions = record_positions[all_data.offsets[1:-1]] - 1
+
+    # integer x and hover data take half the space of doubles in the figure's json
+    x = np.empty(num_points, dtype=np.int32)
+    x[record_positions] = np.arange(data.shape[0])
+    x[separator_positions] = x[separator_positions + 1]
+    solve_and_iteration = np.full((num_points, 2), -1, dtype=np.int32)
+    solve_and_iteration[record_positions, 0] = solves
+    solve_and_iteration[record_positions, 1] = data[:, 0]
+
+    for do_plot, label, column in [(absolute, 'Absolute', 1), (relative, 'Relative', 2)]:
+        if do_plot:
+            y = np.full(num_points, np.nan)
+            y[record_positions] = data[:, column]
+            fig.add_trace(go.Scattergl(x=x, y=y,
+                                       customdata=solve_and_iteration,
+                                       hovertemplate='Solve %{customdata[0]}, iteration '
+                                                     '%{customdata[1]}: %{y:.4e}',
+                                       mode='lines+markers',
+                                       connectgaps=False,
+                                       name=label))
+    return fig
+
+
+def create_solve_summary_figure(summary: dict):
+    """
+    The number of iterations, final residuals, and mean reduction factor of the absolute
+    residual per iteration of each solve with the stalled solves marked
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from om_dash.plotly_base import PlotlyBase
+
+    base = PlotlyBase()
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.05)
+    xaxis, yaxis = base.get_axis_settings()
+    base.set_default_figure_layout(fig, xaxis, yaxis, add_update_menus=False)
+    fig.update_xaxes(base.axis_settings)
+    fig.update_yaxes(base.axis_settings)
+    fig.update_xaxes(title='Solve', row=3, col=1)
+    fig.update_yaxes(title='Iterations', row=1, col=1)
+    fig.update_yaxes(title='Final Residual', type='log', row=2, col=1)
+    fig.update_yaxes(title='Reduction per Iteration', type='log', row=3, col=1)
+
+    solves = summary['solve']
+    for row, key, name in [(1, 'iterations', 'Iterations'),
+                           (2, 'final_absolute', 'Final Absolute'),
+                           (2, 'final_relative', 'Final Relative'),
+                           (3, 'reduction_rate', 'Reduction per Iteration')]:
+        fig.add_trace(go.Scattergl(x=solves, y=summary[key], mode='markers', name=name),
+                      row=row, col=1)
+
+    stalled = summary['stalled']
+    fig.add_trace(go.Scattergl(x=solves[stalled], y=summary['iterations'][stalled],
+                               mode='markers', marker=dict(symbol='x', size=10, color='red'),
+                               name='Stalled'),
+                  row=1, col=1)
+    return fig
+
+
+def write_file(outfile: str, fig: 'go.Figure'):
     write_html = (outfile.split('.')[-1] == 'html')
     if write_html:
         fig.write_html(outfile)
@@ -93,27 +193,56 @@ def write_file(outfile: str, fig: go.Figure):
         fig.write_image(outfile)
 
 
-def main():
-    arg_parser = create_arg_parser()
-    args = arg_parser.parse_args()
+def run(args: argparse.Namespace):
+    from om_dash.batch_image_renderer import BatchImageRenderer
+
+    with BatchImageRenderer(args.render_workers, args.batch_size) as renderer:
+        for input in args.input:
+            plot_residuals(args, input, renderer)
+
+    if args.profile:
+        print(instrumentation.format_report())
+
+
+def plot_residuals(args: argparse.Namespace, input: str, renderer):
+    from om_dash.bgs_residual_parser import BgsResidualParser
 
     parser = BgsResidualParser()
-    if args.nlbgs:
-        doing_nlbgs = True
-        outfile = set_output_file_name(args.input, 'html', doing_nlbgs)
-        parser.parse_residuals(args.input, doing_nlbgs)
-        fig = create_residual_figure(parser.all_data, outfile, doing_nlbgs,
-                                     args.absolute, args.relative)
-        write_file(outfile, fig)
-
-    if args.lnbgs:
-        doing_nlbgs = False
-        parser.parse_residuals(args.input, doing_nlbgs)
-        outfile = set_output_file_name(args.input, 'html', doing_nlbgs)
-        parser.parse_residuals(args.input, doing_nlbgs)
-        fig = create_residual_figure(parser.all_data, outfile, doing_nlbgs,
-                                     args.absolute, args.relative)
-        write_file(outfile, fig)
+    parser.parse_all_residuals(input)
+    create_figure = create_compact_residual_figure if args.compact else create_residual_figure
+    for doing_nlbgs, do_plot, all_data in [(True, args.nlbgs, parser.nlbgs_data),
+                                           (False, args.lnbgs, parser.lnbgs_data)]:
+        if not do_plot:
+            continue
+        write_figure_in_formats(args, input, doing_nlbgs, '', renderer,
+                                lambda outfile: create_figure(all_data, outfile, doing_nlbgs,
+                                                              args.absolute, args.relative))
+        if args.summary:
+            summary = parser.summarize_solves(doing_nlbgs)
+            write_figure_in_formats(args, input, doing_nlbgs, '_summary', renderer,
+                                    lambda outfile: create_solve_summary_figure(summary))
+
+
+def write_figure_in_formats(args: argparse.Namespace, input: str, doing_nlbgs: bool,
+                            suffix: str, renderer, create_figure):
+    image_fig = None
+    for ext in args.formats:
+        outfile = set_output_file_name(input, ext, doing_nlbgs, args.output_dir, suffix)
+        if ext == 'html':
+            with instrumentation.timer('plot_bgs.create_figure'):
+                fig = create_figure(outfile)
+            with instrumentation.timer('plot_bgs.write_file'):
+                write_file(outfile, fig)
+        else:
+            if image_fig is None:
+                with instrumentation.timer('plot_bgs.create_figure'):
+                    image_fig = create_figure(outfile)
+            renderer.add(image_fig, outfile)
+
+
+def main():
+    arg_parser = create_arg_parser()
+    run(arg_parser.parse_args())
 
 
 if __name__ == '__main__':
@@ -2,34 +2,90 @@
 This script will read the sql file from an OpenMDAO recorder(s) and use plotly
 to write an html or image of the optimization history. If multiple record files are provided,
 the histories will be concatenated and a single plot will be generated.
+With --batch, each recorder is plotted separately and written as an image in each of the
+--formats. The images are rendered concurrently by one image export engine.
 """
 
 import argparse
-from om_dash.recorder_history_stacker import RecorderHistoryStacker
-from om_dash.opt_hist_figure_generator import OptHistoryFigureGenerator
+from om_dash.batch_image_renderer import add_image_arguments, image_formats
+from om_dash.instrumentation import instrumentation
 from om_dash.om_convert_recorder_hist import set_output_file_name
+from om_dash.variable_filter import add_variable_filter_arguments, create_variable_filter
 
 
-def main():
-    arg_parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-                                         description=__doc__)
+def add_arguments(arg_parser: argparse.ArgumentParser):
     arg_parser.add_argument('-i', '--inputs', nargs='+', type=str, required=True,
                             help='OpenMDAO recorder filenames (.sql file)')
     arg_parser.add_argument('-o', '--output', type=str, default='{first_recorder_root}.html',
                             help='Filename to write to image or html.')
-    args = arg_parser.parse_args()
+    add_variable_filter_arguments(arg_parser)
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='Number of processes used to read the recorders. '
+                                 'Defaults to one per recorder up to the number of cores.')
+    arg_parser.add_argument('--no-cache', dest='cache', action='store_false',
+                            help='Do not read or write the cache of parsed recorder histories')
+    arg_parser.add_argument('--cache-dir', type=str, default=None,
+                            help='Directory for the parsed history cache files. '
+                                 'Defaults to writing them next to each recorder.')
+    arg_parser.add_argument('--batch', action='store_true',
+                            help='Plot each recorder separately and write the plots as images '
+                                 'named after the recorders instead of the output')
+    arg_parser.add_argument('--formats', nargs='+', type=str, choices=image_formats,
+                            default=['png'], help='Image formats to write with --batch')
+    add_image_arguments(arg_parser)
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='Print the time spent in each stage')
 
-    outfile = set_output_file_name(args.inputs, args.output, 'html')
 
-    om_parser = RecorderHistoryStacker(args.inputs)
-    fig_gen = OptHistoryFigureGenerator(om_parser)
+def run(args: argparse.Namespace):
+    from om_dash.recorder_history_stacker import RecorderHistoryStacker
+    from om_dash.history_cache import HistoryCache
+    from om_dash.opt_hist_figure_generator import OptHistoryFigureGenerator
 
-    write_html = (outfile.split('.')[-1] == 'html')
-    fig = fig_gen.create_figure(add_update_menus=write_html)
-    if write_html:
-        fig.write_html(outfile)
+    history_cache = HistoryCache(args.cache_dir) if args.cache else None
+    if args.batch:
+        plot_each_recorder(args, history_cache)
     else:
-        fig.write_image(outfile)
+        outfile = set_output_file_name(args.inputs, args.output, 'html')
+
+        with instrumentation.timer('plot.read_recorders'):
+            om_parser = RecorderHistoryStacker(args.inputs, args.workers, history_cache,
+                                               create_variable_filter(args))
+        fig_gen = OptHistoryFigureGenerator(om_parser)
+
+        write_html = (outfile.split('.')[-1] == 'html')
+        fig = fig_gen.create_figure(add_update_menus=write_html)
+        with instrumentation.timer('plot.write_file'):
+            if write_html:
+                fig.write_html(outfile)
+            else:
+                fig.write_image(outfile)
+
+    if args.profile:
+        print(instrumentation.format_report())
+
+
+def plot_each_recorder(args: argparse.Namespace, history_cache):
+    from om_dash.batch_image_renderer import BatchImageRenderer, set_figure_file_name
+    from om_dash.recorder_history_stacker import RecorderHistoryStacker
+    from om_dash.opt_hist_figure_generator import OptHistoryFigureGenerator
+
+    with instrumentation.timer('plot.batch'):
+        with BatchImageRenderer(args.render_workers, args.batch_size) as renderer:
+            for recorder in args.inputs:
+                with instrumentation.timer('plot.read_recorders'):
+                    om_parser = RecorderHistoryStacker([recorder], 1, history_cache,
+                                                       create_variable_filter(args))
+                fig = OptHistoryFigureGenerator(om_parser).create_figure(add_update_menus=False)
+                for ext in args.formats:
+                    renderer.add(fig, set_figure_file_name(recorder, ext, args.output_dir))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+                                         description=__doc__)
+    add_arguments(arg_parser)
+    run(arg_parser.parse_args())
 
 
 if __name__ == '__main__':
@@ -1,25 +1,63 @@
-import pandas as pd
 import numpy as np
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
 
 from om_dash.plotly_base import PlotlyBase
-from .recorder_parser import RecorderParser
+from .downsampling import lttb_downsample_indices, minmax_downsample_indices
+from .instrumentation import instrumentation
+from .recorder_parser import RecorderParser, get_variable_prefixes
+from .typed_arrays import encode_typed_array
 
 
 class OptHistoryFigureGenerator(PlotlyBase):
+    summary_statistics = ['min', 'max', 'mean', 'norm']
+
     def __init__(self, parser: RecorderParser = None):
         self.parser = parser
         self.include_dvs = True
-        super().__init__()
 
-    def create_figure(self, add_update_menus=True):
-        all_data = self._get_opt_history_data_from_parser()
+        # plot array-valued constraints and DVs as min/max/mean/norm summaries instead of
+        # one trace per element; variables in expanded_variables are still plotted per element
+        self.aggregate_arrays = False
+        self.expanded_variables = set()
+        self._summary_columns = {}
+
+        # downsample each trace to at most this many points; None plots every point
+        self.max_points_per_trace = None
+        # 'minmax' or 'lttb'
+        self.downsampling_method = 'minmax'
+
+        # send the trace arrays as base64 typed arrays instead of JSON lists of numbers,
+        # optionally rounding the values to single precision to halve the size again
+        self.binary_arrays = True
+        self.float32_arrays = False
+
+        # what the current figure shows, used to extend it with only the new rows
+        self._plotted_history_id = None
+        self._plotted_columns = []
+        self._implicit_x = False
+        self.num_plotted_rows = 0
+        super().__init__()
 
-        self.plotted_iterations = all_data['Iteration'].to_numpy()
-        on_secondary_y = self._determine_which_traces_to_put_on_2nd_y_axis(all_data)
+    @instrumentation.timed('opt_hist_figure.create_figure')
+    def create_figure(self, add_update_menus=True, x_range=None):
+        """
+        If x_range is given, only the iterations in that range are plotted and the x axis
+        is zoomed to it. This is used to refine a downsampled figure when zooming in.
+        """
+        iterations, trace_values = self._get_trace_values_since(0)
+        self._plotted_history_id = self.parser.history_id
+        self._plotted_columns = list(trace_values.keys())
+        self.num_plotted_rows = iterations.size
+
+        rows_in_range = self._get_rows_in_x_range(iterations, x_range)
+        on_secondary_y = self._determine_which_traces_to_put_on_2nd_y_axis(trace_values)
         need_y2_axis = any(on_secondary_y)
 
+        # consecutive iterations are sent as x0 and dx so new points only need their y values
+        self._implicit_x = (x_range is None and not self._will_downsample(iterations)
+                            and self._are_consecutive(iterations))
+
         xaxis, yaxis = self.get_axis_settings()
         xaxis['title'] = 'Iteration'
         yaxis['title'] = 'Objective'
@@ -29,66 +67,175 @@ class OptHistoryFigureGenerator(PlotlyBase):
         else:
             yaxis2 = None
 
+        if x_range is not None:
+            xaxis['range'] = list(x_range)
+
         fig = make_subplots(specs=[[{"secondary_y": True}]])
         self.set_default_figure_layout(fig, xaxis, yaxis, yaxis2, add_update_menus)
 
-        for sec_y, (key, vals) in zip(on_secondary_y, all_data.items()):
-            if key == 'Iteration':
-                continue
-
-            fig.add_trace(go.Scattergl(x=self.plotted_iterations,
-                                       y=vals,
-                                       mode='lines+markers',
-                                       name=key),
+        for sec_y, (key, vals) in zip(on_secondary_y, trace_values.items()):
+            x, y = self._downsample(iterations[rows_in_range], vals[rows_in_range])
+            x_settings = (dict(x0=iterations[0], dx=1) if self._implicit_x
+                          else dict(x=self._convert_iterations(x)))
+            fig.add_trace(go.Scattergl(**x_settings,
+                                       y=self._convert_trace_values(y),
+                                       name=key,
+                                       **self._get_trace_style(key)),
                           secondary_y=sec_y)
 
         return fig
 
-    def generate_extend_data_for_opt_hist_traces(self):
-        all_data = self._get_opt_history_data_from_parser()
-
-        iteration_column_offset = 1
-        n_traces = all_data.shape[1] - iteration_column_offset
-        new_data = dict(x=[[] for _ in range(n_traces)],
-                        y=[[] for _ in range(n_traces)])
-        if self._valid_data_was_read(all_data):
-            start = self.plotted_iterations[-1] + 1
-            new_iterations = np.arange(start, all_data.shape[0])
-
-            if self._have_new_data_to_plot(new_iterations):
-                new_data = dict(x=[new_iterations.copy() for _ in range(n_traces)], y=[
-                                val[new_iterations].to_numpy() for key, val in all_data.items() if key != 'Iteration'])
-                self.plotted_iterations = np.arange(new_iterations[-1]+1)
-        return new_data
-
-    def _valid_data_was_read(self, all_data: pd.DataFrame):
-        return all_data.shape[0] > 0
-
-    def _data_has_already_been_plotted(self):
-        return self.plotted_iterations.size > 0
-
-    def _have_new_data_to_plot(self, new_iterations):
-        return new_iterations.size > 0
-
-    def _get_opt_history_data_from_parser(self):
-        if self.include_dvs:
-            return self.parser.get_dataframe_of_all_data()
+    def get_array_variable_names(self):
+        return [prefixes[key] + key for history, prefixes in self._get_constraint_and_dv_histories()
+                for key, size in history.variable_sizes.items() if size > 1]
+
+    def _get_constraint_and_dv_histories(self):
+        histories = self.parser.get_histories(include_dvs=self.include_dvs)
+        prefixes = get_variable_prefixes(histories)
+        return [(history, history_prefixes)
+                for (_, history), history_prefixes in zip(histories[1:], prefixes[1:])]
+
+    def _get_trace_style(self, key):
+        if key not in self._summary_columns:
+            return dict(mode='lines+markers')
+
+        variable, statistic = self._summary_columns[key]
+        if statistic == 'min':
+            return dict(mode='lines', line=dict(width=0), legendgroup=variable, showlegend=False)
+        if statistic == 'max':
+            # shade the band between the min and max traces
+            return dict(mode='lines', line=dict(width=0), legendgroup=variable, fill='tonexty')
+        if statistic == 'norm':
+            return dict(mode='lines', line=dict(dash='dash'), legendgroup=variable)
+        return dict(mode='lines+markers', legendgroup=variable)
+
+    def get_x_range_from_relayout_data(self, relayout_data: dict):
+        """
+        Returns the x range the user zoomed to, None if the x axis was reset to autorange,
+        or False if the relayout event did not change the x range.
+        """
+        if relayout_data is None:
+            return False
+        if relayout_data.get('xaxis.autorange'):
+            return None
+        if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+            return [relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']]
+        if 'xaxis.range' in relayout_data:
+            return list(relayout_data['xaxis.range'])
+        return False
+
+    def _get_rows_in_x_range(self, iterations: np.ndarray, x_range):
+        if x_range is None:
+            return slice(None)
+        # keep one point beyond each end so lines run to the edges of the plot
+        start = max(np.searchsorted(iterations, x_range[0], side='left') - 1, 0)
+        end = np.searchsorted(iterations, x_range[1], side='right') + 1
+        return slice(start, end)
+
+    def _will_downsample(self, iterations: np.ndarray):
+        return self.max_points_per_trace is not None and iterations.size > self.max_points_per_trace
+
+    def _are_consecutive(self, iterations: np.ndarray):
+        return iterations.size > 0 and np.all(np.diff(iterations) == 1)
+
+    def _downsample(self, x: np.ndarray, y: np.ndarray):
+        if self.max_points_per_trace is None or y.size <= self.max_points_per_trace:
+            return x, y
+
+        if self.downsampling_method == 'lttb':
+            indices = lttb_downsample_indices(x, y, self.max_points_per_trace)
         else:
-            return self.parser.get_dataframe_of_objectives_and_constraints()
-
-    def _determine_which_traces_to_put_on_2nd_y_axis(self, all_data: pd.DataFrame):
-        secondary_y = []
-        for key in all_data.keys():
-            if self._key_is_a_constraint_key(key):
-                secondary_y.append(True)
-            elif self._key_is_a_dv_key(key):
-                secondary_y.append(True)
-            else:
-                secondary_y.append(False)
-        return secondary_y
-
-    def _key_is_a_constraint_key(self, key):
-        return key in self.parser.cons.keys()
-
-    def _key_is_a_dv_key(self, key):
-        return key in self.parser.dvs.keys()
+            indices = minmax_downsample_indices(y, self.max_points_per_trace)
+        return x[indices], y[indices]
+
+    @instrumentation.timed('opt_hist_figure.extend_data')
+    def generate_extend_data_for_opt_hist_traces(self, max_points: int = None):
+        """
+        The points read since the figure was created or last extended as
+        [new data, trace indices] for the figure's extendData, followed by max_points if it is
+        given so plotly only keeps that many points per trace.
+        Returns None if the histories were reset or the set of traces changed since the figure
+        was created, in which case the figure has to be created again.
+        """
+        if self.parser.history_id != self._plotted_history_id:
+            return None
+        iterations, trace_values = self._get_trace_values_since(self.num_plotted_rows)
+        if list(trace_values.keys()) != self._plotted_columns:
+            return None
+
+        trace_indices = list(range(len(trace_values)))
+        new_data = dict(y=[self._encode_extend_values(self._convert_trace_values(vals))
+                           for vals in trace_values.values()])
+        if not self._implicit_x:
+            x = self._encode_extend_values(self._convert_iterations(iterations))
+            new_data['x'] = [x for _ in trace_indices]
+        self.num_plotted_rows += iterations.size
+        instrumentation.count('opt_hist_figure.rows_sent', iterations.size)
+        instrumentation.count('opt_hist_figure.points_sent', iterations.size * len(trace_indices))
+
+        extend_data = [new_data, trace_indices]
+        if max_points is not None:
+            extend_data.append(max_points)
+        return extend_data
+
+    def _convert_trace_values(self, values: np.ndarray):
+        if not self.binary_arrays:
+            return values.tolist()
+        if self.float32_arrays:
+            return values.astype(np.float32)
+        return values
+
+    def _convert_iterations(self, iterations: np.ndarray):
+        if not self.binary_arrays:
+            return iterations.tolist()
+        # plotly narrows int64 arrays to the smallest type that fits, which new iterations
+        # appended by extendData could overflow
+        return iterations.astype(np.int32)
+
+    def _encode_extend_values(self, values):
+        # plotly encodes the numpy arrays in figures but extendData is plain JSON
+        if not self.binary_arrays:
+            return values
+        return encode_typed_array(values)
+
+    def _get_trace_values_since(self, first_row: int):
+        """
+        The iterations after the first first_row rows of the history and the values of
+        each trace at those iterations
+        """
+        if not self.aggregate_arrays:
+            return self.parser.get_rows_since(first_row, include_dvs=self.include_dvs)
+
+        iterations, values = self.parser.get_rows_since(first_row, include_constraints=False,
+                                                        include_dvs=False)
+        values.update(self._get_aggregated_rows_since(first_row))
+        return iterations, values
+
+    def _get_aggregated_rows_since(self, first_row: int):
+        self._summary_columns = {}
+        values = {}
+        for history, prefixes in self._get_constraint_and_dv_histories():
+            for key, size in history.variable_sizes.items():
+                new_values = history.get_values(key)[first_row:, :]
+                variable = prefixes[key] + key
+                if size == 1 or variable in self.expanded_variables:
+                    values.update(zip(history.get_column_names(key, prefixes), new_values.T))
+                else:
+                    values.update(self._summarize_array_variable(variable, new_values))
+        return values
+
+    def _summarize_array_variable(self, key, values: np.ndarray):
+        summaries = {'min': np.min(values, axis=1),
+                     'max': np.max(values, axis=1),
+                     'mean': np.mean(values, axis=1),
+                     'norm': np.linalg.norm(values, axis=1)}
+        columns = {}
+        for statistic in self.summary_statistics:
+            column = f'{key} ({statistic})'
+            self._summary_columns[column] = (key, statistic)
+            columns[column] = summaries[statistic]
+        return columns
+
+    def _determine_which_traces_to_put_on_2nd_y_axis(self, trace_values: dict):
+        objective_columns = set(self.parser.obj_history.columns)
+        return [key not in objective_columns for key in trace_values.keys()]
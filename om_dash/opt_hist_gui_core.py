@@ -1,29 +1,46 @@
+import time
 from om_dash.plotly_base import PlotlyBase
-from om_dash.opt_hist_figure_generator import OptHistoryFigureGenerator
-from om_dash.recorder_parser import RecorderParser
+from om_dash.monitor_sessions import MonitorSession, SessionRegistry
+from om_dash.instrumentation import instrumentation
+from om_dash.refresh_scheduler import AdaptiveRefreshScheduler
+from om_dash.typed_arrays import decode_extend_data_js
+from om_dash.variable_filter import VariableFilter, variable_types
 
-from dash import html, dcc
+from dash import html, dcc, no_update
+from flask import g, request
 from dash.dependencies import Input, Output, State
 
 
 class GuiOptHistoryCore(PlotlyBase):
-    def __init__(self):
+    def __init__(self, max_sessions=32, idle_timeout_in_seconds=3600.0,
+                 poll_interval_in_seconds=1.0, show_diagnostics=False):
         """
-        The primary dash and html elements in the GUI for monitoring the history of OpenMDAO optimizations
+        The primary dash and html elements in the GUI for monitoring the history of OpenMDAO optimizations.
+        Each browser session gets its own recorder, figures, and settings. The layout is served
+        per page load so each page gets a new session id.
+        Recorders are parsed by a background watcher thread and the callbacks only read the
+        latest snapshot of the histories it publishes. The refresh interval adapts to the rate
+        cases arrive between the minimum and maximum set in the GUI, and refreshes without new
+        cases send nothing. The solver residual panel refreshes at the minimum interval.
         """
         super().__init__()
 
-        self.recorder_file = 'nonexistent_history_file_to_start.sql'
-        self.default_refresh_time_in_seconds = 30
-
-        self.parser = RecorderParser(self.recorder_file)
-        self.fig_generator = OptHistoryFigureGenerator()
+        self.default_min_refresh_time_in_seconds = 2
+        self.default_max_refresh_time_in_seconds = 60
+        self.default_recorder_file = 'paraboloid.sql'
+        self.show_diagnostics = show_diagnostics
+        self.sessions = SessionRegistry(max_sessions, idle_timeout_in_seconds,
+                                        poll_interval_in_seconds)
 
+    def serve_layout(self):
+        session = self.sessions.create_session()
         sections = []
+        sections.append(dcc.Store(id='session_id', data=session.session_id))
         sections.append(self.create_optimization_information_div())
-        sections.append(self.create_graphs_div())
-        self.full_layout = html.Div(children=sections,
-                                    style=dict(backgroundColor=self.background_color))
+        sections.append(self.create_graphs_div(session))
+        sections.append(self.create_diagnostics_div())
+        return html.Div(children=sections,
+                        style=dict(backgroundColor=self.background_color))
 
     def create_optimization_information_div(self):
         start_button = html.Button('Start', id='start_button', n_clicks=0,
@@ -34,21 +51,48 @@ class GuiOptHistoryCore(PlotlyBase):
         children = [html.H1('Case Information'),
                     self.create_case_information_input_table(),
                     start_button,
-                    dcc.Interval(id='live_update_interval', interval=1e9, n_intervals=0)]
+                    dcc.Interval(id='live_update_interval', interval=1e9, n_intervals=0),
+                    # the solver log grows during analyses when the optimization's refresh
+                    # interval has backed off, so its panel refreshes at a fixed rate
+                    dcc.Interval(id='residual_update_interval', interval=1e9, n_intervals=0)]
         div = html.Div(children=children, id='div_case_info')
         return div
 
     def create_case_information_input_table(self):
         return html.Table([
-            html.Tr([html.Td('Refresh interval in seconds:'),
-                     dcc.Input(id='refresh_interval_input', type='number',
-                               value=self.default_refresh_time_in_seconds, style=dict(width='30%')),
+            html.Tr([html.Td('Minimum refresh interval in seconds:'),
+                     dcc.Input(id='refresh_interval_input', type='number', min=0.1,
+                               value=self.default_min_refresh_time_in_seconds,
+                               style=dict(width='30%')),
+                     ]),
+            html.Tr([html.Td('Maximum refresh interval in seconds:'),
+                     dcc.Input(id='max_refresh_interval_input', type='number', min=0.1,
+                               value=self.default_max_refresh_time_in_seconds,
+                               style=dict(width='30%')),
                      ]),
-            html.Tr([html.Td('Recorder file:'),
+            html.Tr([html.Td('Recorder file or stream address:'),
                      dcc.Input(id='recorder_file', type='text',
-                               value='paraboloid.sql', style=dict(width='300%'))
+                               value=self.default_recorder_file, style=dict(width='300%'))
+                     ]),
+            html.Tr([html.Td('Max points per trace (blank to plot all):'),
+                     dcc.Input(id='max_points_input', type='number', min=10,
+                               value=None, style=dict(width='30%')),
+                     ]),
+            html.Tr([html.Td('Variables to include (blank for all):'),
+                     dcc.Input(id='include_variables_input', type='text', value='',
+                               placeholder='e.g. traj.*, obj', style=dict(width='300%'))
+                     ]),
+            html.Tr([html.Td('Variables to exclude:'),
+                     dcc.Input(id='exclude_variables_input', type='text', value='',
+                               style=dict(width='300%'))
+                     ]),
+            html.Tr([html.Td('Solver output log (optional):'),
+                     dcc.Input(id='residual_log_file', type='text',
+                               value='', style=dict(width='300%'))
                      ]),
             html.Tr([self._create_checklist_for_including_dvs()]),
+            html.Tr([self._create_checklist_for_aggregating_arrays()]),
+            html.Tr([self._create_checklist_for_array_encoding()]),
         ])
 
     def _create_checklist_for_including_dvs(self):
@@ -56,64 +100,321 @@ class GuiOptHistoryCore(PlotlyBase):
                              value=['DVS'],
                              id='include_dvs_checklist')
 
-    def create_graphs_div(self):
-        div = html.Div(children=self.generate_graphs(),
+    def _create_checklist_for_aggregating_arrays(self):
+        return dcc.Checklist(options=[{'label': 'Summarize array variables (min/max/mean/norm)',
+                                       'value': 'AGGREGATE'}],
+                             value=[],
+                             id='aggregate_arrays_checklist')
+
+    def _create_checklist_for_array_encoding(self):
+        return dcc.Checklist(options=[{'label': 'Send plot data as binary arrays',
+                                       'value': 'BINARY'},
+                                      {'label': 'Send plot data in single precision',
+                                       'value': 'FLOAT32'}],
+                             value=['BINARY'],
+                             id='array_encoding_checklist')
+
+    def create_refresh_scheduler(self, min_interval_in_seconds, max_interval_in_seconds):
+        min_interval_in_seconds = float(min_interval_in_seconds or
+                                        self.default_min_refresh_time_in_seconds)
+        max_interval_in_seconds = float(max_interval_in_seconds or
+                                        self.default_max_refresh_time_in_seconds)
+        return AdaptiveRefreshScheduler(min_interval_in_seconds, max_interval_in_seconds)
+
+    def create_variable_filter(self, include_text: str, exclude_text: str, include_dvs: bool):
+        """
+        The filter of the variables read from the recorder, or None to read all of them.
+        The design variables are not read at all when they are not included.
+        """
+        types = [var_type for var_type in variable_types if include_dvs or var_type != 'desvar']
+        variable_filter = VariableFilter.from_text(include_text, exclude_text, types)
+        if variable_filter.is_selecting_everything():
+            return None
+        return variable_filter
+
+    def create_diagnostics_div(self):
+        checklist = dcc.Checklist(options=[{'label': 'Show timings', 'value': 'SHOW'}],
+                                  value=['SHOW'] if self.show_diagnostics else [],
+                                  id='show_diagnostics_checklist')
+        children = [html.H1('Diagnostics'),
+                    checklist,
+                    html.Pre(id='diagnostics_text'),
+                    dcc.Interval(id='diagnostics_interval', interval=2000, n_intervals=0,
+                                 disabled=not self.show_diagnostics)]
+        return html.Div(children=children, id='div_diagnostics')
+
+    def get_diagnostics_report(self):
+        return instrumentation.format_report()
+
+    def create_graphs_div(self, session: MonitorSession):
+        div = html.Div(children=self.generate_graphs(session),
                        id='div_outer_graphs')
         return div
 
-    def generate_graphs(self):
-        return [self.generate_opt_history_div()]
+    def generate_graphs(self, session: MonitorSession):
+        return [self.generate_opt_history_div(session),
+                self.generate_residual_history_div(session)]
 
-    def generate_opt_history_div(self):
-        fig = self.generate_opt_history_fig()
+    def generate_opt_history_div(self, session: MonitorSession):
+        fig = self.generate_opt_history_fig(session)
         export_html = self.generate_export_field_and_button(default_filename='opt_hist.html',
                                                             button_txt='Export interactive figure',
                                                             id_base='opt_export_html')
+        expand_dropdown = dcc.Dropdown(options=self.get_expandable_variable_options(session),
+                                       value=[], multi=True,
+                                       placeholder='Show every element of array variables...',
+                                       id='expand_variables_dropdown')
         children = [html.H1('Optimization History'),
-                    dcc.Graph(figure=fig, id='opt_hist_graph')]
+                    html.Div(session.recorder_status, id='recorder_status',
+                             style=dict(color='firebrick')),
+                    dcc.Graph(figure=fig, id='opt_hist_graph'),
+                    dcc.Store(id='opt_hist_extend_data'),
+                    expand_dropdown]
         children.extend(export_html)
         return html.Div(children=children)
 
-    def generate_opt_history_fig(self):
-        self.fig_generator.parser = self.parser
-        self.opt_hist_fig = self.fig_generator.create_figure()
-        return self.opt_hist_fig
+    def generate_opt_history_fig(self, session: MonitorSession, x_range=None):
+        session.use_latest_snapshot()
+        session.opt_hist_fig = session.fig_generator.create_figure(x_range=x_range)
+        return session.opt_hist_fig
+
+    def get_expandable_variable_options(self, session: MonitorSession):
+        if not session.fig_generator.aggregate_arrays:
+            return []
+        return [{'label': key, 'value': key}
+                for key in session.fig_generator.get_array_variable_names()]
+
+    def generate_residual_history_div(self, session: MonitorSession):
+        fig = self.generate_residual_history_fig(session)
+        children = [html.H1('Solver Residual History'),
+                    dcc.Graph(figure=fig, id='residual_hist_graph')]
+        return html.Div(children=children)
+
+    def generate_residual_history_fig(self, session: MonitorSession):
+        session.residual_follower.follow(session.residual_log_file)
+        session.residual_hist_fig = session.residual_fig_generator.create_figure()
+        return session.residual_hist_fig
 
 
 def add_callbacks(app, core: GuiOptHistoryCore):
+    add_request_instrumentation(app)
 
     @app.callback(
         [Output('live_update_interval', 'interval'),
-         Output('opt_hist_graph', 'figure')],
+         Output('residual_update_interval', 'interval'),
+         Output('opt_hist_graph', 'figure'),
+         Output('residual_hist_graph', 'figure'),
+         Output('expand_variables_dropdown', 'options')],
         [Input('start_button', 'n_clicks')],
         [State('refresh_interval_input', 'value'),
+         State('max_refresh_interval_input', 'value'),
          State('recorder_file', 'value'),
-         State('include_dvs_checklist', 'value')])
-    def set_live_update_interval_and_initial_plots_div(n_clicks, interval_in_seconds,
-                                                       recorder_file, dv_checklist):
-        core.fig_generator.include_dvs = True if 'DVS' in dv_checklist else False
-        if n_clicks > 0:
-            interval_in_milliseconds = interval_in_seconds * 1000
-            core.recorder_file = recorder_file
-            core.parser.update_histories_from_recorder(core.recorder_file)
-        else:
-            interval_in_milliseconds = 1e9
-        fig = core.generate_opt_history_fig()
-        return interval_in_milliseconds, fig
+         State('residual_log_file', 'value'),
+         State('include_dvs_checklist', 'value'),
+         State('include_variables_input', 'value'),
+         State('exclude_variables_input', 'value'),
+         State('max_points_input', 'value'),
+         State('aggregate_arrays_checklist', 'value'),
+         State('expand_variables_dropdown', 'value'),
+         State('array_encoding_checklist', 'value'),
+         State('session_id', 'data')])
+    @instrumentation.timed('callback.set_live_update_interval_and_initial_plots_div')
+    def set_live_update_interval_and_initial_plots_div(n_clicks, min_interval_in_seconds,
+                                                       max_interval_in_seconds, recorder_file,
+                                                       residual_log_file, dv_checklist,
+                                                       include_text, exclude_text, max_points,
+                                                       aggregate_checklist, expanded_variables,
+                                                       encoding_checklist, session_id):
+        session = core.sessions.get(session_id)
+        with session.lock:
+            session.expired = False
+            fig_generator = session.fig_generator
+            fig_generator.include_dvs = True if 'DVS' in dv_checklist else False
+            fig_generator.max_points_per_trace = int(max_points) if max_points else None
+            fig_generator.aggregate_arrays = 'AGGREGATE' in aggregate_checklist
+            fig_generator.expanded_variables = set(expanded_variables or [])
+            fig_generator.binary_arrays = 'BINARY' in encoding_checklist
+            fig_generator.float32_arrays = 'FLOAT32' in encoding_checklist
+            if n_clicks > 0:
+                variable_filter = core.create_variable_filter(include_text, exclude_text,
+                                                              fig_generator.include_dvs)
+                session.watch_recorder(recorder_file, core.sessions.recorder_watcher,
+                                       variable_filter)
+                session.residual_log_file = residual_log_file
+            fig = core.generate_opt_history_fig(session)
+            options = core.get_expandable_variable_options(session)
+            residual_fig = core.generate_residual_history_fig(session)
+
+            # the cases already recorded do not count toward the rate cases arrive
+            session.refresh_scheduler = core.create_refresh_scheduler(min_interval_in_seconds,
+                                                                      max_interval_in_seconds)
+            session.refresh_interval_in_seconds = None
+            if n_clicks > 0:
+                session.update_refresh_interval()
+                interval_in_milliseconds = session.refresh_interval_in_seconds * 1000
+            else:
+                interval_in_milliseconds = 1e9
+            if n_clicks > 0 and session.residual_log_file:
+                min_interval_in_seconds = session.refresh_scheduler.min_interval_in_seconds
+                residual_interval_in_milliseconds = min_interval_in_seconds * 1000
+            else:
+                residual_interval_in_milliseconds = 1e9
+        return (interval_in_milliseconds, residual_interval_in_milliseconds, fig, residual_fig,
+                options)
 
     @app.callback(
+        [Output('opt_hist_extend_data', 'data'),
+         Output('opt_hist_graph', 'figure', allow_duplicate=True),
+         Output('live_update_interval', 'interval', allow_duplicate=True),
+         Output('start_button', 'n_clicks')],
+        Input('live_update_interval', 'n_intervals'),
+        [State('session_id', 'data'),
+         State('start_button', 'n_clicks')],
+        prevent_initial_call=True)
+    @instrumentation.timed('callback.update_plot_data')
+    def update_plot_data(n_intervals, session_id, n_clicks):
+        session = core.sessions.get(session_id)
+        with session.lock:
+            if session.expired:
+                # the session was evicted while the page was open, so press Start for the page
+                # to watch its recorder again with the settings it shows
+                session.expired = False
+                instrumentation.count('callback.update_plot_data.restarted')
+                return no_update, no_update, no_update, n_clicks + 1
+
+            # the watcher only publishes a snapshot when the recorder has new cases
+            has_new_cases = session.use_latest_snapshot()
+            interval = no_update
+            if session.update_refresh_interval():
+                interval = session.refresh_interval_in_seconds * 1000
+            if not has_new_cases:
+                instrumentation.count('callback.update_plot_data.unchanged')
+                return no_update, no_update, interval, no_update
+
+            extend_data = session.fig_generator.generate_extend_data_for_opt_hist_traces()
+            if extend_data is None:
+                # the variables changed or the recorder was restarted
+                return no_update, core.generate_opt_history_fig(session), interval, no_update
+            if len(extend_data[1]) == 0:
+                return no_update, no_update, interval, no_update
+            return extend_data, no_update, interval, no_update
+
+    # the binary arrays of the extend data are decoded in the browser before extending the traces
+    app.clientside_callback(
+        decode_extend_data_js,
         Output('opt_hist_graph', 'extendData'),
-        Input('live_update_interval', 'n_intervals'))
-    def update_plot_data(n_intervals):
-        core.parser.update_histories_from_recorder(core.recorder_file)
-        return core.fig_generator.generate_extend_data_for_opt_hist_traces()
+        Input('opt_hist_extend_data', 'data'),
+        prevent_initial_call=True)
+
+    @app.callback(
+        Output('opt_hist_graph', 'figure', allow_duplicate=True),
+        Input('opt_hist_graph', 'relayoutData'),
+        State('session_id', 'data'),
+        prevent_initial_call=True)
+    @instrumentation.timed('callback.refine_opt_history_for_visible_range')
+    def refine_opt_history_for_visible_range(relayout_data, session_id):
+        session = core.sessions.get(session_id)
+        with session.lock:
+            if session.fig_generator.max_points_per_trace is None:
+                return no_update
+            x_range = session.fig_generator.get_x_range_from_relayout_data(relayout_data)
+            if x_range is False:
+                return no_update
+            return core.generate_opt_history_fig(session, x_range)
+
+    @app.callback(
+        Output('opt_hist_graph', 'figure', allow_duplicate=True),
+        Input('expand_variables_dropdown', 'value'),
+        State('session_id', 'data'),
+        prevent_initial_call=True)
+    @instrumentation.timed('callback.expand_selected_array_variables')
+    def expand_selected_array_variables(expanded_variables, session_id):
+        session = core.sessions.get(session_id)
+        with session.lock:
+            session.fig_generator.expanded_variables = set(expanded_variables or [])
+            if not session.fig_generator.aggregate_arrays:
+                return no_update
+            return core.generate_opt_history_fig(session)
+
+    @app.callback(
+        Output('recorder_status', 'children'),
+        Input('live_update_interval', 'n_intervals'),
+        State('session_id', 'data'),
+        prevent_initial_call=True)
+    @instrumentation.timed('callback.update_recorder_status')
+    def update_recorder_status(n_intervals, session_id):
+        session = core.sessions.get(session_id)
+        with session.lock:
+            if not session.update_recorder_status():
+                return no_update
+            return session.recorder_status
+
+    @app.callback(
+        [Output('residual_hist_graph', 'extendData'),
+         Output('residual_hist_graph', 'figure', allow_duplicate=True)],
+        Input('residual_update_interval', 'n_intervals'),
+        State('session_id', 'data'),
+        prevent_initial_call=True)
+    @instrumentation.timed('callback.update_residual_data')
+    def update_residual_data(n_intervals, session_id):
+        session = core.sessions.get(session_id)
+        with session.lock:
+            extend_data, fig = session.residual_fig_generator.generate_residual_trace_update()
+            if fig is not None:
+                # the log was truncated or replaced, so its residuals start over
+                session.residual_hist_fig = fig
+                return no_update, fig
+        if extend_data is None:
+            return no_update, no_update
+        return extend_data, no_update
 
     @app.callback(
         Output('opt_export_html_status', 'children'),
         [Input('opt_export_html_button', 'n_clicks')],
-        [State('opt_export_html_input', 'value')])
-    def export_opt_history_fig_to_html(n_clicks, filename):
+        [State('opt_export_html_input', 'value'),
+         State('session_id', 'data')])
+    @instrumentation.timed('callback.export_opt_history_fig_to_html')
+    def export_opt_history_fig_to_html(n_clicks, filename, session_id):
         status = ''
         if n_clicks > 0:
-            status = core.export_fig_as_html(core.opt_hist_fig, filename)
+            session = core.sessions.get(session_id)
+            status = core.export_fig_as_html(session.opt_hist_fig, filename)
         return status
+
+    @app.callback(
+        [Output('diagnostics_text', 'children'),
+         Output('diagnostics_interval', 'disabled')],
+        [Input('diagnostics_interval', 'n_intervals'),
+         Input('show_diagnostics_checklist', 'value')])
+    def update_diagnostics(n_intervals, show_diagnostics):
+        if 'SHOW' not in show_diagnostics:
+            return '', True
+        return core.get_diagnostics_report(), False
+
+
+def add_request_instrumentation(app):
+    """
+    Time the callback requests including the JSON serialization of the responses and
+    count the bytes sent
+    """
+    @app.server.before_request
+    def start_request_timer():
+        g.om_dash_request_start_time = time.perf_counter()
+
+    @app.server.after_request
+    def record_request_time_and_size(response):
+        if request.path.endswith('_dash-update-component') and response.content_length:
+            body = request.get_json(silent=True) or {}
+            stage = f'request.{_get_first_output_name(body)}'
+            instrumentation.record_time(stage, time.perf_counter() - g.om_dash_request_start_time)
+            instrumentation.count(f'{stage}.bytes_sent', response.content_length)
+        return response
+
+
+def _get_first_output_name(body: dict) -> str:
+    outputs = body.get('outputs', {})
+    if isinstance(outputs, list):
+        outputs = outputs[0] if outputs else {}
+    if 'id' not in outputs:
+        return 'unknown'
+    return f'{outputs["id"]}.{outputs["property"]}'
@@ -3,7 +3,6 @@ import numpy as np
 from typing import List
 
 import plotly.graph_objects as go
-from dash import dcc, html
 
 
 class PlotlyBase:
@@ -59,6 +58,9 @@ class PlotlyBase:
         return yaxis2
 
     def generate_export_field_and_button(self, default_filename, button_txt, id_base):
+        # dash is only needed by the gui, so the plotting scripts don't pay for importing it
+        from dash import dcc, html
+
         comps = []
         comps.append(dcc.Input(id=f'{id_base}_input', type='text',
                                value=default_filename,
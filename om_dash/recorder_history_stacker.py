@@ -1,32 +1,62 @@
-import pandas as pd
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
 
+from .history_cache import HistoryCache
 from .recorder_parser import RecorderParser
+from .variable_filter import VariableFilter
 
 
 class RecorderHistoryStacker(RecorderParser):
-    def __init__(self, recorder_filenames: List[str]):
+    def __init__(self, recorder_filenames: List[str], num_workers: int = None,
+                 history_cache: HistoryCache = None, variable_filter: VariableFilter = None):
         """
         A parser for OpenMDAO recorders that concatenates the histories.
+        The recorders are read in parallel by num_workers processes. By default there is one
+        worker per recorder file up to the number of cores.
+        If a history_cache is given, each recorder's parsed history is cached separately.
+        Only the variables selected by the variable_filter are read.
         """
+        self.num_workers = num_workers
+        self.history_cache = history_cache
+        self.variable_filter = variable_filter
         self.update_histories_from_recorder(recorder_filenames)
 
     def update_histories_from_recorder(self, recorder_filenames: List[str]):
+        self._reset_histories(recorder_filenames)
+        histories = self._read_all_histories(recorder_filenames)
+
+        total_rows = sum(objs.num_rows for objs, _, _ in histories)
+        self.obj_history.reserve(total_rows)
+        self.con_history.reserve(total_rows)
+        self.dv_history.reserve(total_rows)
+
         start_iteration = 0
-        self.objs = self._create_empty_dataframe()
-        self.dvs = self._create_empty_dataframe()
-        self.cons = self._create_empty_dataframe()
-        for i, recorder_file in enumerate(recorder_filenames):
-            objs, cons, dvs = self.read_histories_from_recorder(recorder_file, start_iteration)
+        for objs, cons, dvs in histories:
+            self.obj_history.extend(objs, index_offset=start_iteration)
+            self.con_history.extend(cons)
+            self.dv_history.extend(dvs)
 
             # subtract one since the first iteration of the next opt will have the final dvs of the previous
-            start_iteration += objs.shape[0] - 1
-
-            if i == 0:
-                self.objs = objs
-                self.cons = cons
-                self.dvs = dvs
-            else:
-                self.objs = pd.concat([self.objs, objs], axis=0)
-                self.cons = pd.concat([self.cons, cons], axis=0)
-                self.dvs = pd.concat([self.dvs, dvs], axis=0)
+            start_iteration += objs.num_rows - 1
+
+    def _read_all_histories(self, recorder_filenames: List[str]):
+        num_workers = self._get_number_of_workers(len(recorder_filenames))
+        read_args = [(recorder_file, self.use_bulk_reader, self.history_cache,
+                      self.variable_filter)
+                     for recorder_file in recorder_filenames]
+        if num_workers == 1:
+            return [_read_recorder_histories(*args) for args in read_args]
+
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            return list(executor.map(_read_recorder_histories, *zip(*read_args)))
+
+    def _get_number_of_workers(self, num_files: int) -> int:
+        num_workers = self.num_workers if self.num_workers is not None else os.cpu_count()
+        return max(1, min(num_workers, num_files))
+
+
+def _read_recorder_histories(recorder_file: str, use_bulk_reader: bool,
+                             history_cache: HistoryCache, variable_filter: VariableFilter):
+    reader = RecorderParser(recorder_file, variable_filter, use_bulk_reader, history_cache)
+    return reader.obj_history, reader.con_history, reader.dv_history
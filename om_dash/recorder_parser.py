@@ -1,79 +1,342 @@
+import itertools
 import os
+import sqlite3
+import warnings
 import numpy as np
 import pandas as pd
-import openmdao.api as om
-from openmdao.recorders.sqlite_reader import SqliteCaseReader
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple
+
+from .history_cache import HistoryCache
+from .history_store import ColumnarHistory
+from .instrumentation import instrumentation
+from .sqlite_bulk_reader import (SqliteBulkReader, UnsupportedRecorderError,
+                                 read_driver_case_signature)
+from .variable_filter import VariableFilter
+
+if TYPE_CHECKING:
+    from openmdao.recorders.case import Case
+    from openmdao.recorders.sqlite_reader import SqliteCaseReader
+
+# unique ids for each set of histories so clients can tell when the rows they consumed were reset
+_history_ids = itertools.count()
+
+
+def _open_case_reader(recorder_filename: str) -> 'SqliteCaseReader':
+    # openmdao is imported on first use since it takes most of the time of importing om_dash
+    import openmdao.api as om
+    return om.CaseReader(recorder_filename, pre_load=False)
+
+
+def get_variable_prefixes(histories: List[Tuple[str, ColumnarHistory]]) -> List[Dict[str, str]]:
+    """
+    The prefix of each variable of the histories when their rows are merged, e.g. into one
+    figure or file. A variable's columns keep their names unless an earlier history already has
+    a column by one of those names, e.g. a design variable that is also constrained, in which
+    case they are prefixed with the prefix of the variable's history ('con:' or 'dv:').
+    """
+    used_columns = set()
+    prefixes_of_histories = []
+    for history_prefix, history in histories:
+        prefixes = {}
+        columns = []
+        for key in history.variable_sizes:
+            names = history.get_column_names(key)
+            prefixes[key] = '' if used_columns.isdisjoint(names) else history_prefix
+            columns.extend(history.get_column_names(key, prefixes))
+        used_columns.update(columns)
+        prefixes_of_histories.append(prefixes)
+    return prefixes_of_histories
 
 
 class RecorderParser:
-    def __init__(self, recorder_filename: str = ''):
+    # query the recorder's driver_iterations table directly when its format is supported
+    use_bulk_reader = True
+    # optional on-disk cache of the parsed histories
+    history_cache: HistoryCache = None
+    # only the variables selected by the filter are read, or all of them if it is None
+    variable_filter: VariableFilter = None
+
+    def __init__(self, recorder_filename: str = '', variable_filter: VariableFilter = None,
+                 use_bulk_reader: bool = None, history_cache: HistoryCache = None):
         """
         Read OpenMDAO recorder and process into pandas dataframes.
         Designed to work within a Dash gui so it will generate empty dataframes
         if data isn't read.
         """
+        self.variable_filter = variable_filter
+        if use_bulk_reader is not None:
+            self.use_bulk_reader = use_bulk_reader
+        if history_cache is not None:
+            self.history_cache = history_cache
+        # start from no recorder so the first update restores the histories from the cache
+        self._reset_histories('')
         self.update_histories_from_recorder(recorder_filename)
 
+    @property
+    def objs(self) -> pd.DataFrame:
+        return self.obj_history.to_dataframe()
+
+    @property
+    def cons(self) -> pd.DataFrame:
+        return self.con_history.to_dataframe()
+
+    @property
+    def dvs(self) -> pd.DataFrame:
+        return self.dv_history.to_dataframe()
+
+    @instrumentation.timed('recorder_parser.update')
     def update_histories_from_recorder(self, recorder_filename: str):
-        self.objs, self.cons, self.dvs = self.read_histories_from_recorder(recorder_filename)
+        """
+        Append the cases added to the recorder since the last update to the histories.
+        The histories are read from the start if the recorder file changed or
+        no longer contains the cases that were already read.
+        """
+        if recorder_filename != self.recorder_filename:
+            self._reset_histories(recorder_filename)
+            if self._restore_histories_from_unchanged_cache(recorder_filename):
+                return
+
+        if not os.path.exists(recorder_filename):
+            self._reset_histories(recorder_filename)
+            return
+
+        recorder_stat = os.stat(recorder_filename)
+        if self._recorder_has_no_new_cases(recorder_filename):
+            return
+        self._read_new_cases_from_recorder(recorder_filename)
+        if self.history_cache is not None:
+            self.history_cache.store(self, recorder_stat)
+
+    def set_variable_filter(self, variable_filter: VariableFilter):
+        """
+        Change the variables that are read. The histories are reset if the filter selects
+        different variables so the next update reads them from the start.
+        """
+        if variable_filter != self.variable_filter:
+            self.variable_filter = variable_filter
+            self._reset_histories(self.recorder_filename)
+
+    def snapshot(self) -> 'RecorderParser':
+        """
+        A parser holding read-only views of the histories read so far.
+        It is not changed by later updates of this parser, so it can be read by other threads.
+        """
+        snapshot = RecorderParser()
+        snapshot.recorder_filename = self.recorder_filename
+        snapshot.history_id = self.history_id
+        snapshot.variable_filter = self.variable_filter
+        snapshot.num_cases_read = self.num_cases_read
+        snapshot.last_case_counter = self.last_case_counter
+        snapshot.last_case_timestamp = self.last_case_timestamp
+        snapshot.obj_history = self.obj_history.snapshot()
+        snapshot.con_history = self.con_history.snapshot()
+        snapshot.dv_history = self.dv_history.snapshot()
+        return snapshot
+
+    def _restore_histories_from_unchanged_cache(self, recorder_filename: str) -> bool:
+        if self.history_cache is None:
+            return False
+        return self.history_cache.restore(self, recorder_filename)
+
+    @instrumentation.timed('recorder_parser.check_for_new_cases')
+    def _recorder_has_no_new_cases(self, recorder_filename: str) -> bool:
+        """
+        Whether the recorder still has exactly the cases that were read. The file also changes
+        when other recorders in it write or the database is checkpointed, which does not need a
+        read.
+        """
+        if self.num_cases_read == 0:
+            return False
+        try:
+            num_cases, counter, timestamp = read_driver_case_signature(recorder_filename,
+                                                                       self.num_cases_read - 1)
+        except sqlite3.Error:
+            return False
+        return (num_cases == self.num_cases_read and counter == self.last_case_counter
+                and timestamp == self.last_case_timestamp)
+
+    def _read_new_cases_from_recorder(self, recorder_filename: str):
+        case_reader = _open_case_reader(recorder_filename)
+        case_ids = self._list_driver_cases(case_reader)
+        if not self._previously_read_cases_are_unchanged(case_reader, case_ids):
+            self._reset_histories(recorder_filename)
+
+        if len(case_ids) == self.num_cases_read:
+            return
+
+        num_new_cases, last_case_counter, last_case_timestamp = self._read_cases(
+            case_reader, self.num_cases_read, self.obj_history, self.con_history,
+            self.dv_history, self.num_cases_read)
+        if num_new_cases > 0:
+            self.num_cases_read += num_new_cases
+            self.last_case_counter = last_case_counter
+            self.last_case_timestamp = last_case_timestamp
+
+    def _reset_histories(self, recorder_filename):
+        self.recorder_filename = recorder_filename
+        self.history_id = next(_history_ids)
+        self.num_cases_read = 0
+        self.last_case_counter = None
+        self.last_case_timestamp = None
+        self.obj_history, self.con_history, self.dv_history = self._create_empty_histories()
+
+    def _create_empty_histories(self):
+        return ColumnarHistory(index_name='Iteration'), ColumnarHistory(), ColumnarHistory()
+
+    def _list_driver_cases(self, case_reader: 'SqliteCaseReader') -> List[str]:
+        return case_reader.list_cases('driver', recurse=False, out_stream=None)
+
+    def _previously_read_cases_are_unchanged(self, case_reader: 'SqliteCaseReader',
+                                             case_ids: List[str]) -> bool:
+        if self.num_cases_read == 0:
+            return True
+        if len(case_ids) < self.num_cases_read:
+            return False
+        last_read_case = case_reader.get_case(case_ids[self.num_cases_read - 1])
+        # the timestamp distinguishes a different run recorded to the same file
+        return (last_read_case.counter == self.last_case_counter
+                and last_read_case.timestamp == self.last_case_timestamp)
 
     def read_histories_from_recorder(self, recorder_filename: str, start_iteration=0):
-        objs = self._create_empty_dataframe()
-        dvs = self._create_empty_dataframe()
-        cons = self._create_empty_dataframe()
-        if os.path.exists(recorder_filename):
-            case_recorder = om.CaseReader(recorder_filename)
-            if len(case_recorder.get_cases()) > 0:
-                objs, dvs = self._parse_objective_and_dv_histories(case_recorder)
-                cons = self._parse_constraint_history(case_recorder)
+        objs, cons, dvs = self._read_histories(recorder_filename, start_iteration)
+        return objs.to_dataframe(), cons.to_dataframe(), dvs.to_dataframe()
 
-        self._add_iteration_column_to_dataframes(objs, start_iteration)
+    def _read_histories(self, recorder_filename: str, start_iteration=0):
+        objs, cons, dvs = self._create_empty_histories()
+        if os.path.exists(recorder_filename):
+            case_reader = _open_case_reader(recorder_filename)
+            self._read_cases(case_reader, 0, objs, cons, dvs, start_iteration)
         return objs, cons, dvs
 
-    def _create_empty_dataframe(self):
-        return pd.DataFrame({'empty': []})
+    def _read_cases(self, case_reader: 'SqliteCaseReader', first_case: int, objs: ColumnarHistory,
+                    cons: ColumnarHistory, dvs: ColumnarHistory, start_iteration=0,
+                    num_cases: int = None):
+        """
+        Read the driver cases from index first_case onward into the histories, or only
+        num_cases of them if it is given.
+        Returns the number of cases read and the counter and timestamp of the last one.
+        """
+        with instrumentation.timer('recorder_parser.read_cases'):
+            bulk_reader = SqliteBulkReader(case_reader)
+            result = None
+            if self.use_bulk_reader and bulk_reader.is_supported():
+                result = self._read_cases_in_bulk(bulk_reader, first_case, objs, cons, dvs,
+                                                  start_iteration, num_cases)
+            if result is None:
+                last_case = None if num_cases is None else first_case + num_cases
+                case_ids = self._list_driver_cases(case_reader)[first_case:last_case]
+                cases = self._generate_cases(case_reader, case_ids)
+                result = (len(case_ids),
+                          *self._parse_cases(cases, objs, cons, dvs, start_iteration))
+        instrumentation.count('recorder_parser.cases_read', result[0])
+        return result
 
-    def _parse_objective_and_dv_histories(self, case_recorder: SqliteCaseReader):
-        objs = self._create_empty_dataframe()
-        dvs = self._create_empty_dataframe()
+    def _read_cases_in_bulk(self, bulk_reader: SqliteBulkReader, first_case: int,
+                            objs: ColumnarHistory, cons: ColumnarHistory, dvs: ColumnarHistory,
+                            start_iteration=0, num_cases: int = None):
+        """
+        Returns None if the bulk reader failed, in which case the cases have to be read through
+        the case reader instead.
+        """
+        try:
+            counters, timestamps, obj_values, con_values, dv_values = bulk_reader.read_cases(
+                first_case, num_cases, self.variable_filter)
+        except UnsupportedRecorderError as error:
+            # the bulk reader relies on case reader internals that may change between
+            # OpenMDAO versions; stop using it for this parser
+            warnings.warn(f'om_dash: failed to read the cases in bulk ({error}), '
+                          'reading them one at a time instead', RuntimeWarning)
+            self.use_bulk_reader = False
+            return None
+        num_cases = counters.size
+        if num_cases == 0:
+            return 0, None, None
 
-        for icase, case in enumerate(case_recorder.get_cases()):
-            dv = self._to_dataframe(case.get_design_vars(scaled=False))
-            obj = self._to_dataframe(case.get_objectives(scaled=False))
+        objs.append_rows(num_cases, obj_values, index=np.arange(num_cases) + start_iteration)
+        cons.append_rows(num_cases, con_values)
+        dvs.append_rows(num_cases, dv_values)
+        return num_cases, int(counters[-1]), float(timestamps[-1])
 
-            if icase == 0:
-                dvs = dv
-                objs = obj
-            else:
-                dvs = pd.concat([dvs, dv], ignore_index=True)
-                objs = pd.concat([objs, obj], ignore_index=True)
-        return objs, dvs
+    def get_number_of_driver_cases(self, recorder_filename: str) -> int:
+        case_reader = _open_case_reader(recorder_filename)
+        return len(self._list_driver_cases(case_reader))
 
-    def _parse_constraint_history(self, case_recorder: SqliteCaseReader):
-        if self._there_are_no_constraints(case_recorder):
-            return self._create_empty_dataframe()
+    def generate_history_chunks(self, recorder_filename: str, chunk_size: int,
+                                start_iteration=0, num_cases: int = None) -> Iterator[tuple]:
+        """
+        Read the driver cases of a recorder chunk_size cases at a time and yield the objective,
+        constraint, and design variable histories of each chunk. Only the first num_cases cases
+        are read if it is given. The histories of the parser are not changed.
+        """
+        case_reader = _open_case_reader(recorder_filename)
+        num_recorded_cases = len(self._list_driver_cases(case_reader))
+        if num_cases is None or num_cases > num_recorded_cases:
+            num_cases = num_recorded_cases
+        for first_case in range(0, num_cases, chunk_size):
+            objs, cons, dvs = self._create_empty_histories()
+            self._read_cases(case_reader, first_case, objs, cons, dvs, start_iteration + first_case,
+                             num_cases=min(chunk_size, num_cases - first_case))
+            yield objs, cons, dvs
 
-        for icase, case in enumerate(case_recorder.get_cases()):
-            con = self._to_dataframe(case.get_constraints(scaled=False))
+    def _generate_cases(self, case_reader: 'SqliteCaseReader',
+                        case_ids: List[str]) -> Iterator['Case']:
+        for case_id in case_ids:
+            yield case_reader.get_case(case_id)
 
-            if icase == 0:
-                cons = con
-            else:
-                cons = pd.concat([cons, con], ignore_index=True)
-        return cons
+    def _parse_cases(self, cases: Iterable['Case'], objs: ColumnarHistory, cons: ColumnarHistory,
+                     dvs: ColumnarHistory, start_iteration=0):
+        """
+        Extract the objectives, constraints, and design variables of each case in a single pass
+        over the cases. Returns the counter and timestamp of the last case parsed.
+        """
+        counter = None
+        timestamp = None
+        for icase, case in enumerate(cases):
+            objs.append(self._get_filtered_values(case.get_objectives, 'objective'),
+                        index=start_iteration + icase)
+            cons.append(self._get_filtered_values(case.get_constraints, 'constraint'))
+            dvs.append(self._get_filtered_values(case.get_design_vars, 'desvar'))
+            counter = case.counter
+            timestamp = case.timestamp
+        return counter, timestamp
 
-    def _to_dataframe(self, values_dict: dict):
-        new_dict = {}
-        for key, vals in values_dict.items():
-            if vals.size == 1:
-                new_dict[key] = np.array(vals)
-            else:
-                for i, val in enumerate(vals.flatten()):
-                    new_dict[f'{key}_{i}'] = np.array([val])
-        return pd.DataFrame(new_dict)
+    def _get_filtered_values(self, get_values, var_type: str) -> dict:
+        if self.variable_filter is None:
+            return get_values(scaled=False)
+        if not self.variable_filter.includes_type(var_type):
+            return {}
+        return self.variable_filter.filter_values(get_values(scaled=False))
 
-    def _there_are_no_constraints(self, case_recorder: SqliteCaseReader) -> bool:
-        return len(case_recorder.get_case(0).get_constraints().keys()) == 0
+    def get_rows_since(self, version: int, include_constraints=True, include_dvs=True):
+        """
+        Rows are only appended to the histories until they are reset, so the number of rows a
+        client has already consumed serves as its version. history_id changes when the
+        histories are reset, after which the rows have to be consumed from version 0 again.
+        Returns the iterations of the new rows and a dictionary of the objective,
+        constraint and design variable values in them. The columns of a variable whose name
+        clashes with an earlier one are prefixed, see get_variable_prefixes.
+        """
+        histories = self.get_histories(include_constraints, include_dvs)
+        rows = {}
+        for (_, history), prefixes in zip(histories, get_variable_prefixes(histories)):
+            rows.update(history.get_rows_since(version, prefixes))
+        return self.obj_history.get_index_since(version), rows
+
+    def get_histories(self, include_constraints=True,
+                      include_dvs=True) -> List[Tuple[str, ColumnarHistory]]:
+        """
+        The objective, constraint and design variable histories with the prefixes that tell
+        their variables apart when the names clash
+        """
+        histories = [('obj:', self.obj_history)]
+        if include_constraints:
+            histories.append(('con:', self.con_history))
+        if include_dvs:
+            histories.append(('dv:', self.dv_history))
+        return histories
+
+    def _create_empty_dataframe(self):
+        return pd.DataFrame({'empty': []})
 
     def get_dataframe_of_all_data(self, include_constraints=True, include_dvs=True) -> pd.DataFrame:
         data = [self.objs]
@@ -93,11 +356,7 @@ class RecorderParser:
             return self.objs
 
     def _no_data_has_been_read(self):
-        return self.objs.size == 0
-
-    def _add_iteration_column_to_dataframes(self, var: pd.DataFrame, start_iteration=0):
-        size = var.shape[0]
-        var.insert(0, 'Iteration', np.arange(start_iteration, start_iteration + size))
+        return self.obj_history.num_rows == 0
 
     def write_data_to_tecplot(self, tecplot_filename):
         all_data = self.get_dataframe_of_all_data()
@@ -0,0 +1,182 @@
+import logging
+import os
+import threading
+from typing import Dict, Tuple, Union
+
+from om_dash.case_stream import CaseStreamListener, StreamedRecorder, is_stream_address
+from om_dash.instrumentation import instrumentation
+from om_dash.recorder_parser import RecorderParser
+from om_dash.variable_filter import VariableFilter
+
+logger = logging.getLogger(__name__)
+
+
+class WatchedRecorder:
+    def __init__(self, recorder_filename: str, variable_filter: VariableFilter = None):
+        """
+        A recorder parsed by the watcher thread.
+        Each time new cases are read, an immutable snapshot of the histories is published with
+        an incremented version number. Readers only use the latest snapshot, so they never
+        wait for a parse or see a partially updated history.
+        Only the variables selected by the variable_filter are parsed.
+        The last error the watcher thread hit reading the recorder is kept in last_error until
+        a read succeeds.
+        """
+        self.recorder_filename = recorder_filename
+        self.variable_filter = variable_filter
+        self.num_watchers = 0
+        self.last_error: str = None
+        self._parser = RecorderParser(variable_filter=variable_filter)
+        self._lock = threading.Lock()
+        self._last_stat = None
+        self._latest = (0, self._parser.snapshot())
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return _get_recorder_key(self.recorder_filename, self.variable_filter)
+
+    @property
+    def latest(self) -> Tuple[int, RecorderParser]:
+        """
+        The version number and snapshot most recently published
+        """
+        return self._latest
+
+    @instrumentation.timed('recorder_watcher.update')
+    def update(self) -> bool:
+        """
+        Parse the cases added since the last update if the recorder's size or modification time
+        changed. Returns True if a new snapshot was published.
+        """
+        with self._lock:
+            stat = self._stat_recorder()
+            if stat == self._last_stat:
+                return False
+            last_case_read = self._get_last_case_read()
+            self._parser.update_histories_from_recorder(self.recorder_filename)
+            self._last_stat = stat
+            if last_case_read == self._get_last_case_read():
+                return False
+
+            # replace the (version, snapshot) pair in one assignment so readers never see
+            # a new version with an old snapshot
+            version = self._latest[0]
+            self._latest = (version + 1, self._parser.snapshot())
+            return True
+
+    def _get_last_case_read(self):
+        parser = self._parser
+        return parser.num_cases_read, parser.last_case_counter, parser.last_case_timestamp
+
+    def _stat_recorder(self):
+        try:
+            stat = os.stat(self.recorder_filename)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+
+class RecorderWatcher:
+    def __init__(self, poll_interval_in_seconds=1.0):
+        """
+        Background thread that polls the size and modification time of each watched
+        recorder and parses new cases as soon as they land.
+        Recorders are keyed on their absolute path and variable filter so sessions watching the
+        same variables of a recorder share one parse, and a recorder is dropped once no session
+        watches it.
+        Stream addresses (tcp://host:port or unix://path) are listened on for the cases sent by
+        a SocketRecorder instead of polled.
+        """
+        self.poll_interval_in_seconds = poll_interval_in_seconds
+        self._recorders: Dict[Tuple[str, str], Union[WatchedRecorder, StreamedRecorder]] = {}
+        self._listeners: Dict[str, CaseStreamListener] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._recorders)
+
+    def watch(self, recorder_filename: str,
+              variable_filter: VariableFilter = None) -> Union[WatchedRecorder, StreamedRecorder]:
+        """
+        Start watching the variables of a recorder selected by the variable_filter.
+        The first parse happens before this returns so the caller can plot the existing history
+        right away.
+        """
+        key = _get_recorder_key(recorder_filename, variable_filter)
+        with self._lock:
+            if key not in self._recorders:
+                self._recorders[key] = self._create_recorder(recorder_filename, variable_filter)
+            recorder = self._recorders[key]
+            recorder.num_watchers += 1
+        recorder.update()
+        self._start_thread()
+        return recorder
+
+    def unwatch(self, recorder: Union[WatchedRecorder, StreamedRecorder]):
+        key = recorder.key
+        with self._lock:
+            recorder.num_watchers -= 1
+            if recorder.num_watchers <= 0 and self._recorders.get(key) is recorder:
+                del self._recorders[key]
+                if isinstance(recorder, StreamedRecorder):
+                    self._stop_listening(recorder)
+
+    def _create_recorder(self, recorder_filename: str, variable_filter: VariableFilter):
+        if not is_stream_address(recorder_filename):
+            return WatchedRecorder(recorder_filename, variable_filter)
+
+        recorder = StreamedRecorder(recorder_filename, variable_filter)
+        listener = self._listeners.get(recorder_filename)
+        if listener is None:
+            listener = CaseStreamListener(recorder_filename)
+            listener.start()
+            self._listeners[recorder_filename] = listener
+        listener.subscribe(recorder)
+        return recorder
+
+    def _stop_listening(self, recorder: StreamedRecorder):
+        listener = self._listeners[recorder.recorder_filename]
+        listener.unsubscribe(recorder)
+        if len(listener) == 0:
+            listener.close()
+            del self._listeners[recorder.recorder_filename]
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._poll_recorders,
+                                            name='om_dash_recorder_watcher', daemon=True)
+            self._thread.start()
+
+    def _poll_recorders(self):
+        while not self._stop_event.wait(self.poll_interval_in_seconds):
+            with self._lock:
+                recorders = list(self._recorders.values())
+            for recorder in recorders:
+                try:
+                    recorder.update()
+                except Exception as error:
+                    # the recorder may be mid-write; keep the last snapshot and retry next poll
+                    message = f'failed to read {recorder.recorder_filename}: {error}'
+                    if message != recorder.last_error:
+                        logger.warning('om_dash: %s', message)
+                    recorder.last_error = message
+                else:
+                    recorder.last_error = None
+
+
+def _get_recorder_key(recorder_filename: str, variable_filter: VariableFilter) -> Tuple[str, str]:
+    filter_key = '' if variable_filter is None else variable_filter.key
+    if is_stream_address(recorder_filename):
+        return recorder_filename, filter_key
+    return os.path.abspath(recorder_filename), filter_key
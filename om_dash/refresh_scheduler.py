@@ -0,0 +1,45 @@
+import time
+
+
+class AdaptiveRefreshScheduler:
+    def __init__(self, min_interval_in_seconds: float = 2.0, max_interval_in_seconds: float = 60.0,
+                 polls_per_case: float = 2.0, smoothing: float = 0.3):
+        """
+        Chooses how often the monitor refreshes from the rate new cases arrive.
+        The time between cases is a moving average with the given smoothing weight of the newest
+        observation, and the monitor polls polls_per_case times per expected case. While no case
+        arrives, the expected time between cases grows with the time since the last one, so the
+        polling backs off during long function evaluations. The interval always stays between
+        min_interval_in_seconds and max_interval_in_seconds.
+        """
+        self.min_interval_in_seconds = min_interval_in_seconds
+        self.max_interval_in_seconds = max(max_interval_in_seconds, min_interval_in_seconds)
+        self.polls_per_case = polls_per_case
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self, now: float = None):
+        """
+        Start observing again, e.g. after the cases already recorded were plotted
+        """
+        self._last_case_time = time.monotonic() if now is None else now
+        self._seconds_per_case = None
+
+    def record_new_cases(self, num_new_cases: int, now: float = None):
+        if num_new_cases <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        seconds_per_case = (now - self._last_case_time) / num_new_cases
+        if self._seconds_per_case is None:
+            self._seconds_per_case = seconds_per_case
+        else:
+            self._seconds_per_case += self.smoothing * (seconds_per_case - self._seconds_per_case)
+        self._last_case_time = now
+
+    def get_interval_in_seconds(self, now: float = None) -> float:
+        now = time.monotonic() if now is None else now
+        expected_seconds_per_case = now - self._last_case_time
+        if self._seconds_per_case is not None:
+            expected_seconds_per_case = max(expected_seconds_per_case, self._seconds_per_case)
+        interval = expected_seconds_per_case / self.polls_per_case
+        return min(max(interval, self.min_interval_in_seconds), self.max_interval_in_seconds)
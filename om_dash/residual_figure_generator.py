@@ -0,0 +1,93 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from om_dash.plotly_base import PlotlyBase
+from .bgs_residual_parser import BgsResidualFollower
+
+
+class ResidualHistoryFigureGenerator(PlotlyBase):
+    solvers = ['NLBGS', 'LNBGS']
+
+    def __init__(self, follower: BgsResidualFollower = None):
+        """
+        Live figure of the NLBGS and LNBGS residual convergence read from a growing log file.
+        All the solves of a solver are drawn as one absolute and one relative residual trace
+        with gaps between the solves so new iterations can be appended with extendData.
+        """
+        self.follower = follower
+        super().__init__()
+        self.plotted_iterations = {solver: 0 for solver in self.solvers}
+
+    def create_figure(self, add_update_menus=True):
+        return self._create_figure_from_records(self.follower.poll(), add_update_menus)
+
+    def _create_figure_from_records(self, new_records: dict, add_update_menus=True):
+        self.plotted_iterations = {solver: 0 for solver in self.solvers}
+
+        fig = go.Figure()
+        xaxis, yaxis = self.get_axis_settings()
+        xaxis['title'] = 'Cumulative Iteration'
+        yaxis['title'] = 'Residual'
+        yaxis['type'] = 'log'
+        self.set_default_figure_layout(fig, xaxis, yaxis, add_update_menus=add_update_menus)
+
+        for solver in self.solvers:
+            x, abs_resid, rel_resid = self._get_trace_points(solver, new_records[solver])
+            for label, y in [('Absolute', abs_resid), ('Relative', rel_resid)]:
+                fig.add_trace(go.Scattergl(x=x, y=y,
+                                           mode='lines+markers',
+                                           connectgaps=False,
+                                           name=f'{solver}: {label}'))
+        return fig
+
+    def generate_residual_trace_update(self):
+        """
+        The changes to the figure from the residuals written since the last update:
+        ([new data, trace indices], None) for the figure's extendData, or (None, figure) with
+        a new figure if the log was truncated or replaced and its residuals start over.
+        Returns (None, None) if nothing was written.
+        """
+        new_records = self.follower.poll()
+        if new_records['reset']:
+            return None, self._create_figure_from_records(new_records)
+        extend_data = self._generate_extend_data_for_residual_traces(new_records)
+        return extend_data, None
+
+    def _generate_extend_data_for_residual_traces(self, new_records: dict):
+        if all(new_records[solver].shape[0] == 0 for solver in self.solvers):
+            return None
+
+        new_data = dict(x=[], y=[])
+        for solver in self.solvers:
+            x, abs_resid, rel_resid = self._get_trace_points(solver, new_records[solver])
+            new_data['x'].extend([x, x])
+            new_data['y'].extend([abs_resid, rel_resid])
+        trace_indices = list(range(2 * len(self.solvers)))
+        return new_data, trace_indices
+
+    def _get_trace_points(self, solver: str, records: np.ndarray):
+        """
+        Convert new (iteration, absolute, relative) records into points on the cumulative
+        iteration axis with a NaN point ahead of each new solve to break the line
+        """
+        start_iteration = 1 if solver == 'NLBGS' else 0
+        num_records = records.shape[0]
+
+        starts_new_solve = records[:, 0] == start_iteration
+        if self.plotted_iterations[solver] == 0:
+            starts_new_solve[:1] = False
+        record_positions = np.arange(num_records) + np.cumsum(starts_new_solve)
+        num_points = num_records + np.count_nonzero(starts_new_solve)
+
+        x = np.empty(num_points)
+        abs_resid = np.full(num_points, np.nan)
+        rel_resid = np.full(num_points, np.nan)
+        x[record_positions] = self.plotted_iterations[solver] + np.arange(num_records)
+        abs_resid[record_positions] = records[:, 1]
+        rel_resid[record_positions] = records[:, 2]
+
+        separator_positions = record_positions[starts_new_solve] - 1
+        x[separator_positions] = x[separator_positions + 1]
+
+        self.plotted_iterations[solver] += num_records
+        return x, abs_resid, rel_resid
@@ -0,0 +1,124 @@
+import warnings
+import numpy as np
+from openmdao.core.driver import Driver
+from openmdao.recorders.case_recorder import CaseRecorder
+from openmdao.utils.units import unit_conversion
+
+from .case_stream import CaseLayout, CaseStreamSender
+
+
+class SocketRecorder(CaseRecorder):
+    def __init__(self, address: str, buffer_size: int = 1000,
+                 connect_interval_in_seconds: float = 1.0, shutdown_timeout_in_seconds=5.0):
+        """
+        OpenMDAO recorder that streams the objectives, constraints, and design variables of each
+        driver iteration to the om_dash monitor over a socket instead of writing them to a file.
+        Enter the same address, "tcp://host:port" or "unix://path", as the recorder in the
+        monitor. The values match those of Case.get_objectives(scaled=False) etc.
+
+        The cases are sent by a background thread. While the monitor is not connected, up to
+        buffer_size cases are held and the oldest are dropped after that, so the optimization
+        never waits for the monitor. Only drivers can be recorded.
+        """
+        super().__init__(record_viewer_data=False)
+        self.shutdown_timeout_in_seconds = shutdown_timeout_in_seconds
+        self.sender = CaseStreamSender(address, buffer_size, connect_interval_in_seconds)
+        self._num_cases = 0
+        self._variables = None
+        self._layout_size = 0
+        self._layout_id = None
+
+    @property
+    def num_dropped_cases(self) -> int:
+        return self.sender.num_dropped_frames
+
+    def startup(self, recording_requester, comm=None):
+        super().startup(recording_requester, comm)
+        if not isinstance(recording_requester, Driver):
+            raise TypeError('SocketRecorder can only be added to a driver')
+        # the counters restart and the variables are found from the first case of each run
+        self._num_cases = 0
+        self._variables = None
+        self.sender.start_new_run()
+        if self._record_on_proc is not False:
+            self.sender.start()
+
+    def record_iteration_driver(self, recording_requester, data, metadata):
+        outputs = data['output']
+        if self._variables is None:
+            self._find_variables_or_stop_streaming(recording_requester, outputs)
+        if self._layout_id is None:
+            return
+
+        values = np.empty(self._layout_size)
+        for src, start, end, indices, factor, offset in self._variables:
+            vals = np.ravel(outputs[src])
+            if indices is not None:
+                vals = vals[indices]
+            values[start:end] = (vals + offset) * factor
+
+        self.sender.send_case(self._layout_id, self._num_cases, self._counter,
+                              metadata['timestamp'], values)
+        self._num_cases += 1
+
+    def _find_variables_or_stop_streaming(self, driver: Driver, outputs: dict):
+        try:
+            self._find_variables(driver, outputs)
+        except (AttributeError, KeyError) as error:
+            # the variables come from driver and model internals that may change between
+            # OpenMDAO versions; the optimization goes on without streaming
+            warnings.warn(f'om_dash: failed to find the variables of the driver ({error!r}), '
+                          'its cases will not be streamed', RuntimeWarning)
+            self._variables = []
+            self._layout_id = None
+
+    def _find_variables(self, driver: Driver, outputs: dict):
+        """
+        The source, indices, and unit conversion of each variable that was recorded,
+        in the same way the case readers get them from the recorded outputs
+        """
+        abs2meta = driver._problem().model._var_allprocs_abs2meta['output']
+        self._variables = []
+        layout_variables = []
+        start = 0
+        for var_type, vois in [('objective', driver._objs), ('constraint', driver._cons),
+                               ('desvar', driver._designvars)]:
+            for name, meta in vois.items():
+                src = meta['source']
+                if src not in outputs or meta.get('discrete', False):
+                    continue
+                indices = None if meta['indices'] is None else meta['indices'].as_array()
+                factor, offset = 1.0, 0.0
+                if meta['units'] is not None and abs2meta[src]['units'] is not None:
+                    factor, offset = unit_conversion(abs2meta[src]['units'], meta['units'])
+                size = np.ravel(outputs[src]).size if indices is None else np.size(indices)
+                self._variables.append((src, start, start + size, indices, factor, offset))
+                layout_variables.append((name, var_type, size))
+                start += size
+
+        self._layout_size = start
+        self._layout_id = self.sender.add_layout(CaseLayout(layout_variables))
+
+    def shutdown(self):
+        self.sender.close(self.shutdown_timeout_in_seconds)
+
+    def record_iteration_system(self, recording_requester, data, metadata):
+        pass
+
+    def record_iteration_solver(self, recording_requester, data, metadata):
+        pass
+
+    def record_iteration_problem(self, recording_requester, data, metadata):
+        pass
+
+    def record_derivatives_driver(self, recording_requester, data, metadata):
+        pass
+
+    def record_metadata_system(self, system, run_number=None):
+        pass
+
+    def record_metadata_solver(self, solver, run_number=None):
+        pass
+
+    def record_viewer_data(self, model_viewer_data):
+        pass
@@ -0,0 +1,199 @@
+import json
+import sqlite3
+from contextlib import closing
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Tuple
+import numpy as np
+
+from .instrumentation import instrumentation
+
+if TYPE_CHECKING:
+    from openmdao.recorders.sqlite_reader import SqliteCaseReader
+    from .variable_filter import VariableFilter
+
+
+def read_driver_case_signature(recorder_filename: str, case_index: int) -> Tuple[int, int, float]:
+    """
+    The number of driver cases in a sqlite recorder and the counter and timestamp of the case at
+    case_index (None and None if there is no such case). Two small queries are much cheaper than
+    opening a case reader, which loads all of the recorder's metadata.
+    """
+    with closing(sqlite3.connect(str(recorder_filename))) as con:
+        cur = con.cursor()
+        cur.execute('SELECT COUNT(*) FROM driver_iterations')
+        num_cases = cur.fetchone()[0]
+        cur.execute('SELECT counter, timestamp FROM driver_iterations ORDER BY id LIMIT 1 OFFSET ?',
+                    (case_index,))
+        case = cur.fetchone()
+    counter, timestamp = (None, None) if case is None else case
+    return num_cases, counter, timestamp
+
+
+class UnsupportedRecorderError(Exception):
+    """
+    The case reader's internals are not laid out the way the bulk reader expects
+    """
+
+
+class _VariableMetadata(NamedTuple):
+    name: str
+    source: str
+    types: List[str]
+    indices: object
+    units: str
+    source_units: str
+
+
+class _RecorderMetadata(NamedTuple):
+    filename: str
+    variables: List[_VariableMetadata]
+    # the source of each promoted input, since auto_ivc outputs may be recorded by those names
+    promoted_input_sources: Dict[str, str]
+
+
+class SqliteBulkReader:
+    # driver iteration values are stored as JSON text from format version 3 onward
+    min_format_version = 3
+    max_format_version = 14
+
+    def __init__(self, case_reader: 'SqliteCaseReader'):
+        """
+        Fast path for reading the driver cases of an OpenMDAO sqlite recorder.
+        The driver_iterations table is queried directly and the objective, constraint, and
+        design variable values of all the cases are assembled into column arrays at once instead
+        of constructing an OpenMDAO Case for every iteration.
+        The variable metadata (sources, indices, and units) comes from the case reader.
+        """
+        self.case_reader = case_reader
+        self._metadata = None
+
+    def is_supported(self) -> bool:
+        version = getattr(self.case_reader, '_format_version', None)
+        if version is None:
+            return False
+        return self.min_format_version <= version <= self.max_format_version
+
+    def read_cases(self, first_case: int = 0, num_cases: int = None,
+                   variable_filter: 'VariableFilter' = None):
+        """
+        Read the driver cases starting from the index first_case, up to num_cases of them.
+        Returns the counters and timestamps of the cases that were read and dictionaries of the
+        objective, constraint, and design variable values with one row per case.
+        Only the variables selected by the variable_filter are stacked and converted.
+        Raises an UnsupportedRecorderError if the case reader's internals differ from what this
+        reader was written for.
+        """
+        metadata = self._get_metadata()
+        with instrumentation.timer('sqlite_bulk_reader.query'):
+            rows = self._query_driver_iterations(metadata.filename, first_case, num_cases)
+        with instrumentation.timer('sqlite_bulk_reader.decode_json'):
+            counters = np.array([row[0] for row in rows], dtype=int)
+            timestamps = np.array([row[1] for row in rows], dtype=float)
+            outputs = [json.loads(row[2]) for row in rows]
+
+        with instrumentation.timer('sqlite_bulk_reader.assemble_arrays'):
+            objs = self._get_variables_of_type(metadata, 'objective', outputs, variable_filter)
+            cons = self._get_variables_of_type(metadata, 'constraint', outputs, variable_filter)
+            dvs = self._get_variables_of_type(metadata, 'desvar', outputs, variable_filter)
+        return counters, timestamps, objs, cons, dvs
+
+    def _get_metadata(self) -> _RecorderMetadata:
+        """
+        The variable metadata (sources, indices, and units) from the case reader. It is read
+        from the case reader's private attributes, which may be renamed or laid out differently
+        in other OpenMDAO versions.
+        """
+        if self._metadata is None:
+            try:
+                self._metadata = self._read_metadata()
+            except (AttributeError, KeyError) as error:
+                raise UnsupportedRecorderError(
+                    f'unexpected OpenMDAO case reader internals ({error!r})') from error
+        return self._metadata
+
+    def _read_metadata(self) -> _RecorderMetadata:
+        case_reader = self.case_reader
+        abs2meta = case_reader._abs2meta
+        conns = case_reader._conns
+
+        variables = []
+        for name, meta in case_reader.problem_metadata['variables'].items():
+            if name == 'execution_order':
+                continue
+            src = meta['source']
+            variables.append(_VariableMetadata(name, src, abs2meta[src]['type'], meta['indices'],
+                                               meta['units'], abs2meta[src]['units']))
+
+        promoted_input_sources = {}
+        for promoted_name, abs_names in case_reader._prom2abs['input'].items():
+            if abs_names and abs_names[0] in conns:
+                promoted_input_sources[promoted_name] = conns[abs_names[0]]
+        return _RecorderMetadata(str(case_reader._filename), variables, promoted_input_sources)
+
+    def _query_driver_iterations(self, filename: str, first_case: int, num_cases: int = None):
+        limit = -1 if num_cases is None else num_cases
+        with closing(sqlite3.connect(filename)) as con:
+            cur = con.cursor()
+            cur.execute('SELECT counter, timestamp, outputs FROM driver_iterations '
+                        'ORDER BY id LIMIT ? OFFSET ?', (limit, first_case))
+            return cur.fetchall()
+
+    def _get_variables_of_type(self, metadata: _RecorderMetadata, var_type: str,
+                               outputs: List[dict],
+                               variable_filter: 'VariableFilter' = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized equivalent of Case._get_variables_of_type over all the cases
+        """
+        from openmdao.utils.units import convert_units
+
+        values = {}
+        if len(outputs) == 0:
+            return values
+        if variable_filter is not None and not variable_filter.includes_type(var_type):
+            return values
+
+        recorded_names = self._map_sources_to_recorded_names(metadata, outputs[0])
+        for var in metadata.variables:
+            if var_type not in var.types or var.source not in recorded_names:
+                continue
+            if variable_filter is not None and not variable_filter.matches(var.name):
+                continue
+
+            vals = self._stack_recorded_values(outputs, recorded_names[var.source])
+            if var.indices is not None:
+                flat_indices = np.arange(vals.shape[1])[var.indices]
+                vals = vals[:, flat_indices]
+            if var.units is not None:
+                vals = convert_units(vals, var.source_units, var.units)
+            values[var.name] = vals
+        return values
+
+    def _map_sources_to_recorded_names(self, metadata: _RecorderMetadata,
+                                       recorded_values: dict) -> Dict[str, str]:
+        """
+        Outputs are recorded by absolute name except for auto_ivc outputs which may be
+        recorded with the promoted name of the input they are connected to.
+        """
+        sources = {var.source for var in metadata.variables}
+        recorded_names = {}
+        for name in recorded_values.keys():
+            if name in sources:
+                recorded_names[name] = name
+            elif name in metadata.promoted_input_sources:
+                recorded_names[metadata.promoted_input_sources[name]] = name
+        return recorded_names
+
+    def _stack_recorded_values(self, outputs: List[dict], recorded_name: str) -> np.ndarray:
+        try:
+            vals = np.array([values[recorded_name] for values in outputs], dtype=float)
+            return vals.reshape(len(outputs), -1)
+        except KeyError:
+            return self._stack_partially_recorded_values(outputs, recorded_name)
+
+    def _stack_partially_recorded_values(self, outputs: List[dict], recorded_name: str):
+        size = next(np.size(values[recorded_name]) for values in outputs
+                    if recorded_name in values)
+        vals = np.full((len(outputs), size), np.nan)
+        for icase, values in enumerate(outputs):
+            if recorded_name in values:
+                vals[icase, :] = np.ravel(values[recorded_name])
+        return vals
@@ -0,0 +1,85 @@
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+
+from .history_store import ColumnarHistory
+from .history_writers import get_streaming_history_writer
+from .recorder_parser import RecorderParser, get_variable_prefixes
+from .variable_filter import VariableFilter
+
+# the prefixes that tell the objective, constraint, and design variable columns apart
+_history_prefixes = ['obj:', 'con:', 'dv:']
+
+
+class StreamingHistoryConverter:
+    def __init__(self, recorder_filenames: List[str], chunk_size: int = 1000,
+                 variable_filter: VariableFilter = None):
+        """
+        Convert the concatenated histories of a chain of OpenMDAO recorders to a file
+        chunk_size cases at a time, so the memory used depends on the chunk size rather than
+        the length of the histories.
+        A first pass counts the cases and finds the variables from the first case of each
+        recorder so the file's header can be written before the rows. A ValueError is raised if
+        a later case of a recorder has a variable its first case does not have.
+        Columns whose names clash, e.g. of a design variable that is also constrained, are
+        prefixed like the rows of a RecorderParser.
+        Only the variables selected by the variable_filter are converted.
+        """
+        self.recorder_filenames = recorder_filenames
+        self.chunk_size = chunk_size
+        self.parser = RecorderParser(variable_filter=variable_filter)
+
+    def convert(self, filename: str):
+        num_cases, prefixes, column_names = self._scan_recorders()
+        writer_class = get_streaming_history_writer(filename)
+        writer = writer_class(filename, column_names, sum(num_cases))
+        try:
+            for columns in self._generate_column_chunks(column_names, prefixes, num_cases):
+                writer.write_rows(columns)
+        finally:
+            writer.close()
+
+    def _scan_recorders(self) -> Tuple[List[int], List[Dict[str, str]], List[str]]:
+        num_cases = []
+        # the objective, constraint, and design variables in the order they first appear
+        first_cases = [ColumnarHistory(index_name='Iteration'), ColumnarHistory(),
+                       ColumnarHistory()]
+        for recorder_filename in self.recorder_filenames:
+            num_cases.append(self.parser.get_number_of_driver_cases(recorder_filename))
+            for histories in self.parser.generate_history_chunks(recorder_filename, 1,
+                                                                 num_cases=1):
+                for first_case, history in zip(first_cases, histories):
+                    first_case.extend(history)
+
+        histories = list(zip(_history_prefixes, first_cases))
+        prefixes = get_variable_prefixes(histories)
+        column_names = ['Iteration']
+        for (_, history), history_prefixes in zip(histories, prefixes):
+            for key in history.variable_sizes:
+                column_names.extend(history.get_column_names(key, history_prefixes))
+        return num_cases, prefixes, column_names
+
+    def _generate_column_chunks(self, column_names: List[str], prefixes: List[Dict[str, str]],
+                                num_cases: List[int]) -> Iterator[List[np.ndarray]]:
+        start_iteration = 0
+        for recorder_filename, num_recorder_cases in zip(self.recorder_filenames, num_cases):
+            chunks = self.parser.generate_history_chunks(recorder_filename, self.chunk_size,
+                                                         start_iteration, num_recorder_cases)
+            for objs, cons, dvs in chunks:
+                rows = {}
+                for history, history_prefixes in zip([objs, cons, dvs], prefixes):
+                    self._check_variables(recorder_filename, history, history_prefixes)
+                    rows.update(history.get_rows_since(0, history_prefixes))
+                missing_values = np.full(objs.num_rows, np.nan)
+                yield [objs.get_index_since(0)] + [rows.get(name, missing_values)
+                                                   for name in column_names[1:]]
+
+            # subtract one since the first iteration of the next opt will have the final dvs of
+            # the previous
+            start_iteration += num_recorder_cases - 1
+
+    def _check_variables(self, recorder_filename: str, history: ColumnarHistory,
+                         prefixes: Dict[str, str]):
+        new_variables = [key for key in history.variable_sizes if key not in prefixes]
+        if new_variables:
+            raise ValueError(f'The variables {", ".join(new_variables)} of {recorder_filename} '
+                             'are not in its first case, so they have no columns in the file')
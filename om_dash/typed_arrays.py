@@ -0,0 +1,46 @@
+import base64
+import numpy as np
+
+# plotly.js typed array names of the dtypes the figures are sent with
+_typed_array_dtypes = {np.dtype('float64'): 'f8', np.dtype('float32'): 'f4',
+                       np.dtype('int32'): 'i4'}
+
+
+def encode_typed_array(values: np.ndarray) -> dict:
+    """
+    A plotly typed array spec of a float64, float32, or int32 array: the dtype and the
+    base64-encoded little-endian bytes of the values
+    """
+    values = np.ascontiguousarray(values)
+    dtype = _typed_array_dtypes[values.dtype]
+    data = values.astype(values.dtype.newbyteorder('<'), copy=False).tobytes()
+    return {'dtype': dtype, 'bdata': base64.b64encode(data).decode('ascii')}
+
+
+# plotly.js decodes typed array specs in figures but not in extendTraces, so the extendData
+# arrays are decoded in the browser. They are converted to plain arrays, which extend both the
+# typed arrays of a binary figure and the plain arrays of a JSON one.
+decode_extend_data_js = """
+function(extendData) {
+    if (!extendData) {
+        return window.dash_clientside.no_update;
+    }
+    var arrayTypes = {f8: Float64Array, f4: Float32Array, i4: Int32Array};
+    function decode(values) {
+        if (values === null || Array.isArray(values) || !values.bdata) {
+            return values;
+        }
+        var binary = atob(values.bdata);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return Array.from(new arrayTypes[values.dtype](bytes.buffer));
+    }
+    var newData = {};
+    Object.keys(extendData[0]).forEach(function(key) {
+        newData[key] = extendData[0][key].map(decode);
+    });
+    return [newData].concat(extendData.slice(1));
+}
+"""
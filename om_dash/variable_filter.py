@@ -0,0 +1,80 @@
+import argparse
+from fnmatch import fnmatchcase
+from typing import Dict, List
+
+variable_types = ['objective', 'constraint', 'desvar']
+
+
+def add_variable_filter_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument('--include', nargs='+', type=str, default=None,
+                            help='Only read the variables whose names match one of these '
+                                 'wildcard patterns, e.g. "comp.x*"')
+    arg_parser.add_argument('--exclude', nargs='+', type=str, default=None,
+                            help='Do not read the variables whose names match one of these '
+                                 'wildcard patterns')
+
+
+def create_variable_filter(args: argparse.Namespace) -> 'VariableFilter':
+    if not args.include and not args.exclude:
+        return None
+    return VariableFilter(args.include, args.exclude)
+
+
+class VariableFilter:
+    def __init__(self, includes: List[str] = None, excludes: List[str] = None,
+                 types: List[str] = None):
+        """
+        Selects the variables read from a recorder with shell-style wildcard patterns on their
+        names, like the includes and excludes of OpenMDAO's recorders. A variable is read if it
+        matches any of the include patterns (or there are none) and none of the exclude
+        patterns. Only variables of the given types (objective, constraint, desvar) are read.
+        """
+        self.includes = list(includes) if includes else []
+        self.excludes = list(excludes) if excludes else []
+        self.types = list(types) if types is not None else list(variable_types)
+        self._matches: Dict[str, bool] = {}
+
+    @classmethod
+    def from_text(cls, includes: str, excludes: str, types: List[str] = None):
+        """
+        Create a filter from comma or whitespace separated patterns
+        """
+        return cls(_split_patterns(includes), _split_patterns(excludes), types)
+
+    def __eq__(self, other):
+        return isinstance(other, VariableFilter) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    @property
+    def key(self) -> str:
+        """
+        A description of the filter that is equal for filters that select the same variables
+        """
+        return (f'includes={",".join(self.includes)};excludes={",".join(self.excludes)};'
+                f'types={",".join(sorted(self.types))}')
+
+    def is_selecting_everything(self) -> bool:
+        return not self.includes and not self.excludes and set(self.types) >= set(variable_types)
+
+    def includes_type(self, var_type: str) -> bool:
+        return var_type in self.types
+
+    def matches(self, name: str) -> bool:
+        if name not in self._matches:
+            self._matches[name] = (
+                (not self.includes or any(fnmatchcase(name, p) for p in self.includes))
+                and not any(fnmatchcase(name, p) for p in self.excludes))
+        return self._matches[name]
+
+    def filter_values(self, values: dict) -> dict:
+        if not self.includes and not self.excludes:
+            return values
+        return {name: vals for name, vals in values.items() if self.matches(name)}
+
+
+def _split_patterns(text: str) -> List[str]:
+    if not text:
+        return []
+    return text.replace(',', ' ').split()
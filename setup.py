@@ -12,6 +12,7 @@ setup(
              'om_dash/om_convert_recorder_hist.py',
              'om_dash/om_plot_recorder_hist.py',
              'om_dash/om_plot_bgs_history.py'],
+    entry_points={'console_scripts': ['om_dash=om_dash.cli:main']},
     author="Kevin Jacobson",
     author_email="kevin.e.jacobson@nasa.gov",
     zip_safe=False,
@@ -0,0 +1,156 @@
+import base64
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import closing
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def record_optimization(recorder_filename: str, maxiter: int = 20, extra_recorders=(),
+                        constrain_dvs: bool = False):
+    """
+    Record a small optimization with indexed array, unit-converted, and aliased
+    design variables, constraints, and objectives. x and y are auto_ivc outputs.
+    The extra_recorders are added to the driver too.
+    If constrain_dvs is True, the design variables x and z are constrained as well.
+    """
+    import openmdao.api as om
+
+    cwd = os.getcwd()
+    # keep the problem's output directory out of the working directory
+    os.chdir(os.path.dirname(recorder_filename))
+    try:
+        _run_optimization(om, recorder_filename, maxiter, extra_recorders, constrain_dvs)
+    finally:
+        os.chdir(cwd)
+
+
+def _run_optimization(om, recorder_filename: str, maxiter: int, extra_recorders,
+                      constrain_dvs: bool):
+    prob = om.Problem(reports=False)
+    model = prob.model
+    ivc = model.add_subsystem('ivc', om.IndepVarComp(), promotes=['*'])
+    ivc.add_output('z', 2.0, units='m')
+    model.add_subsystem('f', om.ExecComp('f = sum((x-3)**2) + y**2 + (z-1)**2', x=np.ones(3),
+                                         y={'units': 'm'}, z={'units': 'm'},
+                                         f={'units': 'm**2'}),
+                        promotes=['*'])
+    model.add_subsystem('g', om.ExecComp('g = x*2', x=np.ones(3), g=np.ones(3)), promotes=['*'])
+    model.add_subsystem('h', om.ExecComp('h = y + z', y={'units': 'm'}, z={'units': 'm'},
+                                         h={'units': 'm'}),
+                        promotes=['*'])
+    prob.driver = om.ScipyOptimizeDriver(optimizer='SLSQP', maxiter=maxiter, disp=False)
+    model.add_design_var('x', lower=-5, upper=5, indices=[0, 2])
+    model.add_design_var('y', lower=-500, upper=500, units='cm')
+    model.add_design_var('z', lower=-20, upper=20, units='ft')
+    model.add_objective('f', units='cm**2')
+    model.add_constraint('g', upper=5.0, alias='g_upper', indices=[2])
+    model.add_constraint('g', lower=-5.0, indices=[0])
+    model.add_constraint('h', lower=0.5, units='cm')
+    if constrain_dvs:
+        model.add_constraint('x', upper=4.0, indices=[0, 2])
+        model.add_constraint('z', upper=10.0, units='ft')
+    prob.driver.add_recorder(om.SqliteRecorder(recorder_filename))
+    for recorder in extra_recorders:
+        prob.driver.add_recorder(recorder)
+    prob.setup()
+    prob.set_val('y', 1.0, units='m')
+    prob.run_driver()
+    prob.cleanup()
+
+
+def count_driver_cases(recorder_filename: str) -> int:
+    with closing(sqlite3.connect(recorder_filename)) as con:
+        return con.execute('SELECT COUNT(*) FROM driver_iterations').fetchone()[0]
+
+
+def copy_first_driver_cases(recorder_filename: str, copy_filename: str, num_cases: int):
+    """
+    Copy a recorder as it was when only its first num_cases driver cases were recorded
+    """
+    shutil.copyfile(recorder_filename, copy_filename)
+    with closing(sqlite3.connect(copy_filename)) as con:
+        con.execute('DELETE FROM driver_iterations WHERE id NOT IN '
+                    '(SELECT id FROM driver_iterations ORDER BY id LIMIT ?)', (num_cases,))
+        con.commit()
+
+
+def nlbgs_line(iteration, absolute, relative):
+    return f'NL: NLBGS {iteration} ; {absolute:.8e} {relative:.8e}\n'
+
+
+def lnbgs_line(iteration, absolute, relative):
+    return f'|  LN: LNBGS {iteration} ; {absolute:.8e} {relative:.8e}\n'
+
+
+def write_solver_log(filename):
+    """
+    Two nonlinear iterations, each with a two iteration linear solve, between other output
+    """
+    lines = ['=====\n', 'some_group\n',
+             nlbgs_line(1, 1.0, 1.0), lnbgs_line(0, 2.0, 1.0), lnbgs_line(1, 0.2, 0.1),
+             'NL: NLBGS Converged in 3 iterations\n',
+             nlbgs_line(2, 0.1, 0.1), lnbgs_line(0, 1.5, 1.0), lnbgs_line(1, 0.3, 0.2),
+             'NL: NLBGS 3 ;  2.00000000e-03  2.00000000e-03\r\n']
+    with open(filename, 'w', newline='') as f:
+        f.write(''.join(lines))
+
+
+def wait_until(condition, timeout_in_seconds=5.0):
+    end = time.monotonic() + timeout_in_seconds
+    while not condition():
+        if time.monotonic() > end:
+            raise TimeoutError('the condition was not met in time')
+        time.sleep(0.01)
+
+
+def assert_same_histories(parser, expected):
+    pd.testing.assert_frame_equal(parser.objs, expected.objs)
+    pd.testing.assert_frame_equal(parser.cons, expected.cons)
+    pd.testing.assert_frame_equal(parser.dvs, expected.dvs)
+    assert parser.num_cases_read == expected.num_cases_read
+    assert parser.last_case_counter == expected.last_case_counter
+    assert parser.last_case_timestamp == expected.last_case_timestamp
+
+
+def decode_typed_array(spec: dict) -> np.ndarray:
+    dtype = {'f8': '<f8', 'f4': '<f4', 'i4': '<i4'}[spec['dtype']]
+    return np.frombuffer(base64.b64decode(spec['bdata']), dtype=dtype)
+
+
+@pytest.fixture(scope='session')
+def recorder_file(tmp_path_factory) -> str:
+    recorder_filename = str(tmp_path_factory.mktemp('recorder') / 'opt.sql')
+    record_optimization(recorder_filename)
+    return recorder_filename
+
+
+@pytest.fixture(scope='session')
+def constrained_dv_recorder_file(tmp_path_factory) -> str:
+    """
+    A recorder whose design variables x and z are constraints too
+    """
+    recorder_filename = str(tmp_path_factory.mktemp('recorder') / 'opt.sql')
+    record_optimization(recorder_filename, constrain_dvs=True)
+    return recorder_filename
+
+
+@pytest.fixture
+def recorder_reads(monkeypatch) -> list:
+    """
+    The first case of each read of the recorder by a parser
+    """
+    from om_dash.recorder_parser import RecorderParser
+
+    reads = []
+    read_cases = RecorderParser._read_cases
+
+    def read_cases_and_record_first_case(self, case_reader, first_case, *args, **kwargs):
+        reads.append(first_case)
+        return read_cases(self, case_reader, first_case, *args, **kwargs)
+
+    monkeypatch.setattr(RecorderParser, '_read_cases', read_cases_and_record_first_case)
+    return reads
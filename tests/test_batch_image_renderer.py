@@ -0,0 +1,116 @@
+import sys
+import types
+import pytest
+
+from om_dash.batch_image_renderer import BatchImageRenderer, set_figure_file_name
+
+
+class FakeFigure:
+    def __init__(self, written: list):
+        self.written = written
+
+    def write_image(self, filename):
+        self.written.append(filename)
+
+
+class FakeKaleido:
+    """
+    Stand-in for the kaleido>=1 engine that records what it is asked to do
+    """
+    instances = []
+
+    def __init__(self, n):
+        self.n = n
+        self.events = []
+        FakeKaleido.instances.append(self)
+
+    async def open(self):
+        self.events.append('open')
+
+    async def close(self):
+        self.events.append('close')
+
+    async def write_fig_from_object(self, specs, cancel_on_error=False):
+        self.events.append([(spec['path'], spec['opts']['format']) for spec in specs])
+
+
+@pytest.fixture
+def kaleido_engine(monkeypatch):
+    FakeKaleido.instances = []
+    monkeypatch.setitem(sys.modules, 'kaleido', types.SimpleNamespace(Kaleido=FakeKaleido))
+    return FakeKaleido
+
+
+def test_engine_renders_batches_and_is_opened_once(kaleido_engine):
+    written = []
+    filenames = [f'fig{i}.{ext}' for i, ext in enumerate(['png', 'svg', 'pdf', 'png', 'png'])]
+    with BatchImageRenderer(render_workers=3, batch_size=2) as renderer:
+        for filename in filenames:
+            renderer.add(FakeFigure(written), filename)
+
+    assert written == []
+    [engine] = kaleido_engine.instances
+    assert engine.n == 3
+    assert engine.events == ['open',
+                             [('fig0.png', 'png'), ('fig1.svg', 'svg')],
+                             [('fig2.pdf', 'pdf'), ('fig3.png', 'png')],
+                             [('fig4.png', 'png')],
+                             'close']
+
+
+def test_engine_is_closed_when_building_a_figure_fails(kaleido_engine):
+    with pytest.raises(RuntimeError):
+        with BatchImageRenderer(batch_size=1) as renderer:
+            renderer.add(FakeFigure([]), 'fig0.png')
+            raise RuntimeError('failed to build the next figure')
+
+    [engine] = kaleido_engine.instances
+    assert engine.events[0] == 'open'
+    assert engine.events[-1] == 'close'
+
+
+@pytest.mark.parametrize('kaleido_module', [None, types.SimpleNamespace()],
+                         ids=['not installed', 'before 1.0'])
+def test_falls_back_to_write_image_without_an_engine(monkeypatch, kaleido_module):
+    # a None entry in sys.modules makes the import raise ImportError
+    monkeypatch.setitem(sys.modules, 'kaleido', kaleido_module)
+    written = []
+    with BatchImageRenderer(batch_size=2) as renderer:
+        for i in range(3):
+            renderer.add(FakeFigure(written), f'fig{i}.png')
+    assert written == ['fig0.png', 'fig1.png', 'fig2.png']
+
+
+def test_flush_without_context_manager_writes_immediately(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'kaleido', None)
+    written = []
+    renderer = BatchImageRenderer(batch_size=10)
+    renderer.add(FakeFigure(written), 'fig.svg')
+    assert written == []
+    renderer.flush()
+    assert written == ['fig.svg']
+
+
+def test_figure_file_names():
+    assert set_figure_file_name('runs/opt.sql', 'png') == 'runs/opt.png'
+    assert set_figure_file_name('runs/opt.sql', 'pdf', 'figs', '_hist') == 'figs/opt_hist.pdf'
+
+
+def test_batch_plots_have_no_update_menus(kaleido_engine, recorder_file, tmp_path, monkeypatch):
+    import argparse
+    from om_dash import om_plot_recorder_hist
+
+    figures = []
+
+    async def write_fig_from_object(self, specs, cancel_on_error=False):
+        figures.extend(spec['fig'] for spec in specs)
+
+    monkeypatch.setattr(kaleido_engine, 'write_fig_from_object', write_fig_from_object)
+    arg_parser = argparse.ArgumentParser()
+    om_plot_recorder_hist.add_arguments(arg_parser)
+    om_plot_recorder_hist.run(arg_parser.parse_args(
+        ['-i', recorder_file, '--batch', '--no-cache', '--formats', 'png',
+         '--output-dir', str(tmp_path)]))
+
+    [fig] = figures
+    assert len(fig.layout.updatemenus) == 0
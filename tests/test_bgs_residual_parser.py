@@ -0,0 +1,179 @@
+import os
+import numpy as np
+import pytest
+
+from om_dash.bgs_residual_parser import BgsResidualFollower, BgsResidualParser, SolveHistory
+from conftest import lnbgs_line, nlbgs_line, write_solver_log
+
+
+def test_parser_reads_both_solvers_in_one_pass(tmp_path):
+    log = tmp_path / 'solver.log'
+    write_solver_log(log)
+    parser = BgsResidualParser()
+    parser.parse_all_residuals(str(log))
+
+    np.testing.assert_array_equal(parser.nlbgs_data.records,
+                                  [[1, 1.0, 1.0], [2, 0.1, 0.1], [3, 2e-3, 2e-3]])
+    assert len(parser.nlbgs_data) == 1
+    np.testing.assert_array_equal(parser.lnbgs_data.records,
+                                  [[0, 2.0, 1.0], [1, 0.2, 0.1], [0, 1.5, 1.0], [1, 0.3, 0.2]])
+    assert len(parser.lnbgs_data) == 2
+
+    parser.parse_residuals(str(log), doing_nlbgs=False)
+    assert parser.all_data is parser.lnbgs_data
+
+
+def test_parser_finds_records_split_across_chunks(tmp_path):
+    log = tmp_path / 'solver.log'
+    write_solver_log(log)
+    whole = BgsResidualParser()
+    whole.parse_all_residuals(str(log))
+
+    for chunk_size in [1, 7, 32]:
+        parser = BgsResidualParser()
+        parser.chunk_size = chunk_size
+        parser.parse_all_residuals(str(log))
+        np.testing.assert_array_equal(parser.nlbgs_data.records, whole.nlbgs_data.records)
+        np.testing.assert_array_equal(parser.lnbgs_data.records, whole.lnbgs_data.records)
+        np.testing.assert_array_equal(parser.lnbgs_data.offsets, whole.lnbgs_data.offsets)
+        # the records of the chunks are copied into one array that owns its memory
+        assert parser.lnbgs_data.records.flags.owndata
+
+
+def test_parser_reads_a_last_line_without_a_newline(tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text(nlbgs_line(1, 1.0, 1.0) + nlbgs_line(2, 0.5, 0.5).rstrip())
+    parser = BgsResidualParser()
+    parser.parse_all_residuals(str(log))
+    np.testing.assert_array_equal(parser.nlbgs_data.records, [[1, 1.0, 1.0], [2, 0.5, 0.5]])
+
+
+def test_parser_of_a_log_without_residuals(tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text('nothing to see here\n')
+    parser = BgsResidualParser()
+    parser.parse_all_residuals(str(log))
+    assert parser.nlbgs_data.records.shape == (0, 3)
+    assert len(parser.nlbgs_data) == 0 and len(parser.lnbgs_data) == 0
+
+
+def three_solves():
+    """
+    A three iteration solve, a single record solve, and a six iteration solve that stalls
+    """
+    records = np.array([[0, 8.0, 1.0], [1, 4.0, 0.5], [2, 2.0, 0.25],
+                        [0, 3.0, 1.0],
+                        [0, 1.0, 1.0], [1, 0.5, 0.5], [2, 0.4, 0.4], [3, 0.35, 0.35],
+                        [4, 0.3, 0.3], [5, 0.27, 0.27]])
+    return SolveHistory.from_records(records, start_iteration=0)
+
+
+def test_solve_history_splits_records_into_solves():
+    solves = three_solves()
+    np.testing.assert_array_equal(solves.offsets, [0, 3, 4, 10])
+    assert len(solves) == 3
+    np.testing.assert_array_equal(solves.get_num_records(), [3, 1, 6])
+    np.testing.assert_array_equal(solves.get_solve_ids(), [0, 0, 0, 1, 2, 2, 2, 2, 2, 2])
+
+    np.testing.assert_array_equal(solves[1], [[0, 3.0, 1.0]])
+    np.testing.assert_array_equal(solves[-1][:, 0], np.arange(6))
+    assert [solve.shape[0] for solve in solves] == [3, 1, 6]
+    with pytest.raises(IndexError):
+        solves[3]
+
+    np.testing.assert_array_equal(solves.absolute[:3], [8.0, 4.0, 2.0])
+    np.testing.assert_array_equal(solves.relative[:3], [1.0, 0.5, 0.25])
+
+
+def test_solve_history_per_solve_quantities():
+    solves = three_solves()
+    np.testing.assert_array_equal(solves.get_iteration_counts(), [2, 0, 5])
+    final_absolute, final_relative = solves.get_final_residuals()
+    np.testing.assert_array_equal(final_absolute, [2.0, 3.0, 0.27])
+    np.testing.assert_array_equal(final_relative, [0.25, 1.0, 0.27])
+
+    rates = solves.get_convergence_rates()
+    np.testing.assert_allclose(rates[[0, 2]], [0.5, 0.27 ** 0.2])
+    assert np.isnan(rates[1])
+
+    np.testing.assert_array_equal(solves.find_stalled_solves(window=3), [False, False, True])
+    np.testing.assert_array_equal(solves.find_stalled_solves(window=5, max_reduction=0.3),
+                                  [False, False, False])
+    # none of the solves has more records than the window
+    np.testing.assert_array_equal(solves.find_stalled_solves(window=6, max_reduction=0.01),
+                                  [False, False, False])
+
+
+def test_empty_solve_history():
+    for solves in [SolveHistory(), SolveHistory.from_records(np.zeros((0, 3)), 1)]:
+        assert len(solves) == 0
+        assert list(solves) == []
+        assert solves.get_iteration_counts().size == 0
+        assert solves.get_convergence_rates().size == 0
+        assert solves.find_stalled_solves().size == 0
+
+
+def test_follower_reads_only_appended_lines(tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text(nlbgs_line(1, 1.0, 1.0) + 'some other output\n' + lnbgs_line(0, 2.0, 1.0))
+    follower = BgsResidualFollower(str(log))
+
+    records = follower.poll()
+    np.testing.assert_array_equal(records['NLBGS'], [[1, 1.0, 1.0]])
+    np.testing.assert_array_equal(records['LNBGS'], [[0, 2.0, 1.0]])
+    assert not records['reset']
+
+    records = follower.poll()
+    assert records['NLBGS'].shape == (0, 3) and records['LNBGS'].shape == (0, 3)
+
+    with open(log, 'a') as f:
+        f.write(nlbgs_line(2, 0.5, 0.5))
+    records = follower.poll()
+    np.testing.assert_array_equal(records['NLBGS'], [[2, 0.5, 0.5]])
+    assert records['LNBGS'].shape == (0, 3)
+
+
+def test_follower_holds_a_partial_line_until_it_is_complete(tmp_path):
+    log = tmp_path / 'solver.log'
+    line = nlbgs_line(1, 1.0, 1.0)
+    log.write_text(line[:12])
+    follower = BgsResidualFollower(str(log))
+    assert follower.poll()['NLBGS'].shape == (0, 3)
+
+    with open(log, 'a') as f:
+        f.write(line[12:])
+    np.testing.assert_array_equal(follower.poll()['NLBGS'], [[1, 1.0, 1.0]])
+
+
+def test_follower_reports_a_truncated_log(tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text(nlbgs_line(1, 1.0, 1.0) + nlbgs_line(2, 0.1, 0.1))
+    follower = BgsResidualFollower(str(log))
+    follower.poll()
+
+    log.write_text(nlbgs_line(1, 3.0, 1.0))
+    records = follower.poll()
+    assert records['reset']
+    np.testing.assert_array_equal(records['NLBGS'], [[1, 3.0, 1.0]])
+    assert not follower.poll()['reset']
+
+
+def test_follower_reports_a_replaced_log(tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text(nlbgs_line(1, 1.0, 1.0))
+    follower = BgsResidualFollower(str(log))
+    follower.poll()
+
+    # log rotation: the old file is moved away and a longer one takes its place
+    os.rename(log, tmp_path / 'solver.log.1')
+    log.write_text(nlbgs_line(1, 5.0, 1.0) + nlbgs_line(2, 4.0, 0.8))
+    records = follower.poll()
+    assert records['reset']
+    np.testing.assert_array_equal(records['NLBGS'][:, 1], [5.0, 4.0])
+
+
+def test_follower_of_a_missing_file_returns_no_records(tmp_path):
+    follower = BgsResidualFollower(str(tmp_path / 'not_written_yet.log'))
+    records = follower.poll()
+    assert records['NLBGS'].shape == (0, 3)
+    assert not records['reset']
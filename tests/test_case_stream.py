@@ -0,0 +1,152 @@
+import logging
+import numpy as np
+import pytest
+
+from om_dash.case_stream import (CaseLayout, CaseStreamListener, CaseStreamSender, FrameDecoder,
+                                 StreamedRecorder, encode_frame, is_stream_address,
+                                 parse_stream_address)
+from om_dash.variable_filter import VariableFilter
+from conftest import wait_until
+
+
+def test_stream_addresses():
+    assert is_stream_address('tcp://127.0.0.1:5007')
+    assert is_stream_address('unix:///tmp/opt.sock')
+    assert not is_stream_address('opt.sql')
+    assert parse_stream_address('tcp://localhost:5007')[1] == ('localhost', 5007)
+    assert parse_stream_address('unix:///tmp/opt.sock')[1] == '/tmp/opt.sock'
+    with pytest.raises(ValueError):
+        parse_stream_address('tcp://localhost')
+
+
+def test_frames_are_decoded_from_any_split_of_the_bytes():
+    values = np.array([1.5, -2.0, 1e300])
+    data = (encode_frame({'kind': 'layout', 'layout_id': 0}) +
+            encode_frame({'kind': 'case', 'layout_id': 0}, values))
+
+    for split in range(len(data) + 1):
+        decoder = FrameDecoder()
+        frames = decoder.feed(data[:split]) + decoder.feed(data[split:])
+        assert [header['kind'] for header, _ in frames] == ['layout', 'case']
+        assert frames[0][1] == b''
+        np.testing.assert_array_equal(np.frombuffer(frames[1][1], dtype='<f8'), values)
+
+
+def test_layout_splits_values_by_type_and_filter():
+    layout = CaseLayout([('obj', 'objective', 1), ('con', 'constraint', 2),
+                         ('x', 'desvar', 3), ('y', 'desvar', 1)])
+    values = np.arange(14.0).reshape(2, 7)
+    assert layout.size == 7
+
+    objs, cons, dvs = layout.split(values)
+    np.testing.assert_array_equal(objs['obj'], [[0.0], [7.0]])
+    np.testing.assert_array_equal(cons['con'], [[1.0, 2.0], [8.0, 9.0]])
+    np.testing.assert_array_equal(dvs['x'], [[3.0, 4.0, 5.0], [10.0, 11.0, 12.0]])
+
+    objs, cons, dvs = layout.split(values, VariableFilter(excludes=['x'],
+                                                          types=['objective', 'desvar']))
+    assert list(objs) == ['obj'] and cons == {} and list(dvs) == ['y']
+
+
+class StreamTest:
+    def __init__(self, tmp_path, **listener_options):
+        self.address = f'unix://{tmp_path}/cases.sock'
+        self.listener = CaseStreamListener(self.address, **listener_options)
+        assert self.listener.start()
+        self.sender = CaseStreamSender(self.address, connect_interval_in_seconds=0.05)
+        self.sender.start()
+        self.layout = CaseLayout([('obj', 'objective', 1), ('x', 'desvar', 2)])
+        self.layout_id = self.sender.add_layout(self.layout)
+        self.num_sent = 0
+
+    def send_cases(self, num_cases):
+        for _ in range(num_cases):
+            i = self.num_sent
+            self.sender.send_case(self.layout_id, i, i + 1, float(i), [i, 10.0 * i, -i])
+            self.num_sent += 1
+
+    def subscribe(self, variable_filter=None):
+        recorder = StreamedRecorder(self.address, variable_filter)
+        self.listener.subscribe(recorder)
+        return recorder
+
+    def close(self):
+        self.sender.close()
+        self.listener.close()
+
+
+@pytest.fixture
+def stream(tmp_path):
+    stream = StreamTest(tmp_path, max_replayed_cases=4)
+    yield stream
+    stream.close()
+
+
+def get_history(recorder):
+    return recorder.latest[1]
+
+
+def test_subscribed_recorders_receive_the_cases(stream):
+    recorder = stream.subscribe()
+    stream.send_cases(6)
+    wait_until(lambda: get_history(recorder).num_cases_read == 6)
+
+    parser = get_history(recorder)
+    np.testing.assert_array_equal(parser.objs['Iteration'], np.arange(6))
+    np.testing.assert_array_equal(parser.objs['obj'], np.arange(6.0))
+    np.testing.assert_array_equal(parser.dvs['x_1'], -np.arange(6.0))
+    assert parser.last_case_counter == 6
+
+
+def test_late_subscribers_get_only_the_replayed_cases(stream):
+    first = stream.subscribe()
+    # one case per batch so the replayed cases can be counted exactly
+    for num_cases in range(1, 11):
+        stream.send_cases(1)
+        wait_until(lambda: get_history(first).num_cases_read == num_cases)
+
+    late = stream.subscribe(VariableFilter(includes=['obj']))
+    parser = get_history(late)
+    assert parser.num_cases_read == 4
+    np.testing.assert_array_equal(parser.objs['Iteration'], np.arange(6, 10))
+    assert list(parser.dvs.columns) == ['empty']
+    # the recorder subscribed from the start still has the whole history
+    assert get_history(first).num_cases_read == 10
+
+
+def test_new_run_resets_the_histories(stream):
+    recorder = stream.subscribe()
+    stream.send_cases(3)
+    wait_until(lambda: get_history(recorder).num_cases_read == 3)
+
+    stream.sender.start_new_run()
+    stream.layout_id = stream.sender.add_layout(stream.layout)
+    stream.num_sent = 0
+    stream.send_cases(2)
+    wait_until(lambda: get_history(recorder).last_case_counter == 2)
+
+    parser = get_history(recorder)
+    assert parser.num_cases_read == 2
+    np.testing.assert_array_equal(parser.objs['Iteration'], [0, 1])
+
+
+def test_listener_logs_when_it_cannot_listen(tmp_path, caplog):
+    listener = CaseStreamListener(f'unix://{tmp_path}/missing_directory/cases.sock')
+    with caplog.at_level(logging.WARNING, logger='om_dash.case_stream'):
+        assert not listener.start()
+    assert 'failed to listen on unix://' in caplog.text
+
+
+def test_cases_are_buffered_until_the_monitor_listens(tmp_path):
+    stream = StreamTest(tmp_path)
+    stream.listener.close()
+    stream.send_cases(5)
+
+    stream.listener = CaseStreamListener(stream.address)
+    recorder = stream.subscribe()
+    assert stream.listener.start()
+    try:
+        wait_until(lambda: get_history(recorder).num_cases_read == 5)
+        assert stream.sender.num_dropped_frames == 0
+    finally:
+        stream.close()
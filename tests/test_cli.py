@@ -0,0 +1,62 @@
+import importlib
+import os
+import subprocess
+import sys
+import pytest
+
+from om_dash import cli
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(*args) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=repo_dir)
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env,
+                          timeout=120)
+
+
+def test_parsing_arguments_does_not_import_the_heavy_libraries():
+    script = ('import sys\n'
+              'from om_dash.cli import create_arg_parser\n'
+              'create_arg_parser().parse_args(["convert", "-i", "opt.sql"])\n'
+              'print(sorted(name for name in ("openmdao", "pandas", "plotly", "dash")\n'
+              '             if name in sys.modules))\n')
+    result = run_python('-c', script)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '[]'
+
+
+def test_module_help_lists_the_subcommands():
+    result = run_python('-m', 'om_dash', '--help')
+    assert result.returncode == 0, result.stderr
+    for subcommand in cli.subcommands:
+        assert subcommand in result.stdout
+
+
+@pytest.mark.parametrize('subcommand, argv', [('monitor', ['--listen', 'tcp://localhost:5000']),
+                                              ('plot', ['-i', 'opt.sql']),
+                                              ('convert', ['-i', 'a.sql', 'b.sql', '--stream']),
+                                              ('plot-bgs', ['-i', 'screen_output.txt'])])
+def test_subcommands_run_their_script(monkeypatch, subcommand, argv):
+    module = importlib.import_module(cli.subcommands[subcommand][0])
+    runs = []
+    monkeypatch.setattr(module, 'run', runs.append)
+
+    cli.main([subcommand] + argv)
+    assert len(runs) == 1
+    assert runs[0].subcommand == subcommand
+
+
+def test_convert_arguments_are_parsed_by_its_script():
+    args = cli.create_arg_parser().parse_args(['convert', '-i', 'a.sql', 'b.sql', '--stream',
+                                               '--chunk-size', '10'])
+    assert args.inputs == ['a.sql', 'b.sql']
+    assert args.stream and args.chunk_size == 10
+    assert args.run.__module__ == 'om_dash.om_convert_recorder_hist'
+
+
+def test_a_subcommand_is_required(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main([])
+    assert exit_info.value.code == 2
+    assert 'subcommand' in capsys.readouterr().err
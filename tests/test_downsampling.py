@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from om_dash.downsampling import lttb_downsample_indices, minmax_downsample_indices
+
+
+@pytest.fixture
+def noisy_history():
+    rng = np.random.default_rng(0)
+    y = np.exp(-np.linspace(0.0, 5.0, 1000)) + 0.01 * rng.standard_normal(1000)
+    # a spike and a dip that a uniform stride would skip
+    y[401] = 3.0
+    y[757] = -2.0
+    return np.arange(1000), y
+
+
+def assert_valid_indices(indices, num_points):
+    assert indices[0] == 0 and indices[-1] == num_points - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize('downsample', [lambda x, y, n: minmax_downsample_indices(y, n),
+                                        lttb_downsample_indices])
+def test_short_histories_are_not_downsampled(downsample):
+    x = np.arange(5)
+    y = np.linspace(1.0, 0.0, 5)
+    np.testing.assert_array_equal(downsample(x, y, 5), x)
+    np.testing.assert_array_equal(downsample(x, y, 100), x)
+    assert downsample(x[:0], y[:0], 10).size == 0
+
+
+@pytest.mark.parametrize('max_points', [4, 10, 101, 999])
+def test_minmax_keeps_the_extremes(noisy_history, max_points):
+    _, y = noisy_history
+    indices = minmax_downsample_indices(y, max_points)
+
+    assert_valid_indices(indices, y.size)
+    assert indices.size <= max_points
+    assert 401 in indices and 757 in indices
+
+
+def test_minmax_keeps_the_minimum_and_maximum_of_each_bucket():
+    y = np.array([0.0, 5.0, 1.0, 2.0, -1.0, 4.0, 3.0, 0.0])
+    # three interior points per bucket
+    np.testing.assert_array_equal(minmax_downsample_indices(y, 6), [0, 1, 2, 4, 5, 7])
+
+
+def test_minmax_ignores_missing_values():
+    y = np.array([1.0, np.nan, np.nan, np.nan, 2.0, np.nan, 7.0, -3.0, 0.0])
+    indices = minmax_downsample_indices(y, 4)
+    assert_valid_indices(indices, y.size)
+    assert 6 in indices and 7 in indices
+    assert not np.isnan(y[indices[1:-1]]).any()
+
+
+@pytest.mark.parametrize('max_points', [3, 10, 101, 999])
+def test_lttb_selects_max_points(noisy_history, max_points):
+    x, y = noisy_history
+    indices = lttb_downsample_indices(x, y, max_points)
+
+    assert_valid_indices(indices, y.size)
+    assert indices.size == max_points
+    if max_points >= 10:
+        assert 401 in indices and 757 in indices
+
+
+def test_lttb_keeps_the_corner_of_a_line():
+    x = np.arange(101, dtype=float)
+    y = np.where(x < 60, x, 120 - x)
+    indices = lttb_downsample_indices(x, y, 3)
+    np.testing.assert_array_equal(indices, [0, 60, 100])
+
+
+def test_lttb_of_a_history_with_missing_values(noisy_history):
+    x, y = noisy_history
+    y = y.copy()
+    y[::7] = np.nan
+    indices = lttb_downsample_indices(x, y, 50)
+    assert_valid_indices(indices, y.size)
+    assert indices.size == 50
@@ -0,0 +1,99 @@
+import os
+import shutil
+import pytest
+
+from om_dash.history_cache import HistoryCache
+from om_dash.recorder_parser import RecorderParser
+from om_dash.variable_filter import VariableFilter
+from conftest import (assert_same_histories, copy_first_driver_cases, count_driver_cases,
+                      record_optimization)
+
+
+@pytest.fixture
+def recorder_copy(recorder_file, tmp_path) -> str:
+    copy = str(tmp_path / 'opt.sql')
+    shutil.copyfile(recorder_file, copy)
+    return copy
+
+
+@pytest.mark.parametrize('in_cache_dir', [False, True])
+def test_constructed_parser_restores_an_unchanged_recorder(recorder_copy, tmp_path,
+                                                           recorder_reads, in_cache_dir):
+    cache = HistoryCache(str(tmp_path / 'cache') if in_cache_dir else None)
+    expected = RecorderParser(recorder_copy, history_cache=cache)
+    assert os.path.exists(cache.get_cache_filename(recorder_copy))
+    assert recorder_reads == [0]
+
+    parser = RecorderParser(recorder_copy, history_cache=cache)
+    assert recorder_reads == [0]
+    assert_same_histories(parser, expected)
+
+
+def test_grown_recorder_appends_to_the_cached_cases(recorder_file, recorder_copy,
+                                                    recorder_reads):
+    num_cases = count_driver_cases(recorder_file)
+    copy_first_driver_cases(recorder_file, recorder_copy, num_cases // 2)
+    cache = HistoryCache()
+    RecorderParser(recorder_copy, history_cache=cache)
+
+    shutil.copyfile(recorder_file, recorder_copy)
+    parser = RecorderParser(recorder_copy, history_cache=cache)
+
+    assert recorder_reads == [0, num_cases // 2]
+    expected = RecorderParser(recorder_file)
+    expected.recorder_filename = recorder_copy
+    assert_same_histories(parser, expected)
+
+
+def test_cases_replaced_by_a_new_run_are_read_again(recorder_copy, tmp_path, recorder_reads):
+    cache = HistoryCache()
+    RecorderParser(recorder_copy, history_cache=cache)
+
+    # the same optimization run again into the same file has new timestamps
+    rerun = str(tmp_path / 'rerun.sql')
+    record_optimization(rerun)
+    os.replace(rerun, recorder_copy)
+    parser = RecorderParser(recorder_copy, history_cache=cache)
+
+    assert recorder_reads[-1] == 0
+    assert_same_histories(parser, RecorderParser(recorder_copy))
+
+
+@pytest.mark.parametrize('change', ['shrunk', 'version', 'moved', 'corrupt'])
+def test_invalid_caches_are_not_restored(recorder_copy, tmp_path, recorder_reads, change):
+    cache = HistoryCache()
+    RecorderParser(recorder_copy, history_cache=cache)
+    cache_filename = cache.get_cache_filename(recorder_copy)
+
+    if change == 'shrunk':
+        shorter_run = str(tmp_path / 'shorter.sql')
+        record_optimization(shorter_run, maxiter=2)
+        os.replace(shorter_run, recorder_copy)
+    elif change == 'version':
+        cache.cache_version += 1
+    elif change == 'moved':
+        moved = str(tmp_path / 'moved.sql')
+        shutil.copyfile(recorder_copy, moved)
+        shutil.copyfile(cache_filename, cache.get_cache_filename(moved))
+        recorder_copy = moved
+    elif change == 'corrupt':
+        with open(cache_filename, 'wb') as f:
+            f.write(b'not a zip file')
+
+    parser = RecorderParser(recorder_copy, history_cache=cache)
+    assert recorder_reads == [0, 0]
+    assert_same_histories(parser, RecorderParser(recorder_copy))
+
+
+def test_filtered_histories_are_cached_separately(recorder_copy, recorder_reads):
+    cache = HistoryCache()
+    variable_filter = VariableFilter(includes=['f', 'x'])
+    RecorderParser(recorder_copy, history_cache=cache)
+
+    parser = RecorderParser(recorder_copy, variable_filter, history_cache=cache)
+    assert recorder_reads == [0, 0]
+    assert list(parser.dvs.columns) == ['x_0', 'x_1']
+
+    restored = RecorderParser(recorder_copy, variable_filter, history_cache=cache)
+    assert recorder_reads == [0, 0]
+    assert_same_histories(restored, parser)
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from om_dash.history_store import ColumnarHistory
+
+
+def baseline_dataframe(cases):
+    """
+    The history as the original parser built it: one dataframe per case with a column per
+    element of the array-valued variables, concatenated with a new index
+    """
+    frames = []
+    for values in cases:
+        columns = {}
+        for key, vals in values.items():
+            vals = np.asarray(vals)
+            if vals.size == 1:
+                columns[key] = vals.reshape(1)
+            else:
+                columns.update({f'{key}_{i}': np.array([val])
+                                for i, val in enumerate(vals.flatten())})
+        frames.append(pd.DataFrame(columns))
+    return pd.concat(frames, ignore_index=True)
+
+
+def make_cases(num_cases, offset=0.0):
+    return [{'a': np.array([offset + icase]),
+             'b': offset + np.arange(3.0) * icase,
+             'c': offset + np.arange(4.0).reshape(2, 2) + icase}
+            for icase in range(num_cases)]
+
+
+def append_cases(history, cases, first_iteration=0):
+    for icase, values in enumerate(cases):
+        history.append(values, index=first_iteration + icase)
+
+
+def test_append_matches_baseline_dataframe():
+    cases = make_cases(100)
+    history = ColumnarHistory(initial_capacity=4)
+    append_cases(history, cases)
+
+    assert history.num_rows == 100
+    assert history.variable_sizes == {'a': 1, 'b': 3, 'c': 4}
+    pd.testing.assert_frame_equal(history.to_dataframe(), baseline_dataframe(cases))
+
+
+def test_index_column_comes_first():
+    cases = make_cases(5)
+    history = ColumnarHistory(index_name='Iteration')
+    append_cases(history, cases, first_iteration=10)
+
+    expected = baseline_dataframe(cases)
+    expected.insert(0, 'Iteration', np.arange(10, 15))
+    pd.testing.assert_frame_equal(history.to_dataframe(), expected)
+    assert history.columns == list(expected.columns)
+
+
+def test_append_rows_matches_append():
+    cases = make_cases(70)
+    history = ColumnarHistory(index_name='Iteration', initial_capacity=8)
+    append_cases(history, cases[:3])
+    block = {key: np.array([np.ravel(values[key]) for values in cases[3:]])
+             for key in cases[0]}
+    history.append_rows(67, block, index=np.arange(3, 70))
+
+    expected = ColumnarHistory(index_name='Iteration')
+    append_cases(expected, cases)
+    pd.testing.assert_frame_equal(history.to_dataframe(), expected.to_dataframe())
+
+
+def test_variables_added_later_are_nan_in_earlier_rows():
+    history = ColumnarHistory()
+    history.append({'a': 1.0})
+    history.append({'a': 2.0, 'b': np.array([3.0, 4.0])})
+
+    expected = pd.DataFrame({'a': [1.0, 2.0], 'b_0': [np.nan, 3.0], 'b_1': [np.nan, 4.0]})
+    pd.testing.assert_frame_equal(history.to_dataframe(), expected)
+
+
+def test_extend_offsets_the_index():
+    first = ColumnarHistory(index_name='Iteration')
+    append_cases(first, make_cases(5))
+    second = ColumnarHistory(index_name='Iteration')
+    append_cases(second, make_cases(4, offset=100.0))
+
+    first.extend(second, index_offset=4)
+
+    expected = baseline_dataframe(make_cases(5) + make_cases(4, offset=100.0))
+    expected.insert(0, 'Iteration', np.concatenate([np.arange(5), np.arange(4, 8)]))
+    pd.testing.assert_frame_equal(first.to_dataframe(), expected)
+
+
+def test_snapshot_is_a_read_only_view_of_the_rows_so_far():
+    history = ColumnarHistory(index_name='Iteration', initial_capacity=4)
+    append_cases(history, make_cases(4))
+    snapshot = history.snapshot()
+    expected = history.to_dataframe().copy()
+
+    append_cases(history, make_cases(10, offset=1.0), first_iteration=4)
+
+    assert snapshot.num_rows == 4
+    pd.testing.assert_frame_equal(snapshot.to_dataframe(), expected)
+    with pytest.raises(ValueError):
+        snapshot.get_values('a')[0, 0] = 1.0
+
+
+def test_arrays_round_trip():
+    history = ColumnarHistory(index_name='Iteration')
+    append_cases(history, make_cases(20), first_iteration=3)
+
+    arrays = history.to_arrays(prefix='obj_')
+    restored = ColumnarHistory(index_name='Iteration')
+    restored.load_arrays(arrays, prefix='obj_')
+
+    pd.testing.assert_frame_equal(restored.to_dataframe(), history.to_dataframe())
+    append_cases(restored, make_cases(1), first_iteration=23)
+    assert restored.num_rows == 21
+
+
+def test_rows_since():
+    history = ColumnarHistory(index_name='Iteration')
+    append_cases(history, make_cases(6))
+
+    rows = history.get_rows_since(4)
+    assert list(rows.keys()) == ['a', 'b_0', 'b_1', 'b_2', 'c_0', 'c_1', 'c_2', 'c_3']
+    np.testing.assert_array_equal(rows['b_2'], [8.0, 10.0])
+    np.testing.assert_array_equal(history.get_index_since(4), [4, 5])
+    assert history.get_rows_since(6)['a'].size == 0
+
+
+def test_history_without_variables_keeps_the_baseline_empty_dataframe():
+    history = ColumnarHistory()
+    pd.testing.assert_frame_equal(history.to_dataframe(), pd.DataFrame({'empty': []}))
+
+    # e.g. the constraints of a problem without constraints
+    for _ in range(3):
+        history.append({})
+    assert history.num_rows == 3
+    pd.testing.assert_frame_equal(history.to_dataframe(), pd.DataFrame({'empty': []}))
+
+
+def test_index_survives_when_every_variable_is_filtered_out():
+    history = ColumnarHistory(index_name='Iteration')
+    for iteration in range(3):
+        history.append({}, index=iteration)
+    np.testing.assert_array_equal(history.to_dataframe()['Iteration'], [0, 1, 2])
+
+
+def test_dataframe_is_cached_until_the_next_append():
+    history = ColumnarHistory()
+    append_cases(history, make_cases(2))
+    dataframe = history.to_dataframe()
+    assert history.to_dataframe() is dataframe
+
+    append_cases(history, make_cases(1))
+    assert history.to_dataframe() is not dataframe
+    assert history.to_dataframe().shape[0] == 3
+
+
+def test_values_are_views_of_the_blocks():
+    history = ColumnarHistory(initial_capacity=2)
+    append_cases(history, make_cases(5))
+    values = history.get_values('c')
+    assert values.shape == (5, 4)
+    np.testing.assert_array_equal(values[:, 0], np.arange(5.0))
+    assert history.get_column_names('c') == ['c_0', 'c_1', 'c_2', 'c_3']
+    assert np.shares_memory(values, history.get_values('c'))
+
+
+def test_snapshot_does_not_see_rows_or_variables_appended_in_place():
+    history = ColumnarHistory(index_name='Iteration', initial_capacity=64)
+    append_cases(history, make_cases(3))
+    snapshot = history.snapshot()
+    expected = history.to_dataframe().copy()
+
+    # the new rows fit in the capacity, so they are written to the memory the snapshot shares
+    append_cases(history, make_cases(2, offset=5.0), first_iteration=3)
+    history.append({'a': 0.0, 'd': 1.0}, index=5)
+
+    assert history.num_rows == 6 and history.has_column('d')
+    assert snapshot.num_rows == 3 and not snapshot.has_column('d')
+    pd.testing.assert_frame_equal(snapshot.to_dataframe(), expected)
+    np.testing.assert_array_equal(snapshot.get_index_since(0), [0, 1, 2])
+    assert snapshot.get_values('b').shape == (3, 3)
@@ -0,0 +1,218 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+from om_dash.history_writers import (CsvStreamWriter, NpzStreamWriter, TecplotAsciiStreamWriter,
+                                     TecplotBinaryStreamWriter, get_history_writer,
+                                     get_streaming_history_writer, write_npz,
+                                     write_tecplot_binary)
+
+
+def read_tecplot_binary(filename: str):
+    """
+    Read the variable names, value ranges, and columns of a single zone version 112 .plt file
+    """
+    with open(filename, 'rb') as f:
+        assert f.read(8) == b'#!TDV112'
+        assert read_int32s(f, 2).tolist() == [1, 0]
+        assert read_tecplot_string(f) == 'OpenMDAO Record'
+        num_columns = int(read_int32s(f, 1)[0])
+        names = [read_tecplot_string(f) for _ in range(num_columns)]
+
+        assert read_float32(f) == 299.0
+        assert read_tecplot_string(f) == 'OpenMDAO'
+        read_int32s(f, 2)
+        f.read(8)
+        read_int32s(f, 5)
+        num_rows = int(read_int32s(f, 3)[0])
+        read_int32s(f, 1)
+        assert read_float32(f) == 357.0
+
+        assert read_float32(f) == 299.0
+        assert read_int32s(f, num_columns).tolist() == [2] * num_columns
+        assert read_int32s(f, 3).tolist() == [0, 0, -1]
+        min_max = np.frombuffer(f.read(16 * num_columns), dtype='<f8').reshape(num_columns, 2)
+        data = np.frombuffer(f.read(8 * num_columns * num_rows), dtype='<f8')
+        assert f.read() == b''
+    return names, min_max, list(data.reshape(num_columns, num_rows))
+
+
+def read_int32s(f, count: int) -> np.ndarray:
+    return np.frombuffer(f.read(4 * count), dtype='<i4')
+
+
+def read_float32(f) -> float:
+    return float(np.frombuffer(f.read(4), dtype='<f4')[0])
+
+
+def read_tecplot_string(f) -> str:
+    characters = []
+    character = read_int32s(f, 1)[0]
+    while character != 0:
+        characters.append(chr(character))
+        character = read_int32s(f, 1)[0]
+    return ''.join(characters)
+
+
+def write_in_blocks(writer, columns, block_size: int):
+    for start in range(0, columns[0].size, block_size):
+        writer.write_rows([column[start:start + block_size] for column in columns])
+    writer.close()
+
+
+@pytest.fixture
+def columns():
+    iterations = np.arange(7)
+    return ['Iteration', 'obj', 'x[0]'], [iterations, 1.0 / (iterations + 1.0),
+                                         np.linspace(-2.0, 4.0, 7)]
+
+
+def test_tecplot_binary_round_trip(tmp_path, columns):
+    names, values = columns
+    filename = str(tmp_path / 'opt.plt')
+    write_tecplot_binary(filename, names, values)
+
+    read_names, min_max, read_values = read_tecplot_binary(filename)
+    assert read_names == names
+    for value, read_value, (value_min, value_max) in zip(values, read_values, min_max):
+        np.testing.assert_array_equal(read_value, value)
+        assert value_min == value.min() and value_max == value.max()
+
+
+def test_tecplot_binary_stream_matches_whole_file(tmp_path, columns):
+    names, values = columns
+    write_tecplot_binary(str(tmp_path / 'whole.plt'), names, values)
+    write_in_blocks(TecplotBinaryStreamWriter(str(tmp_path / 'blocks.plt'), names, 7), values, 3)
+
+    assert (tmp_path / 'blocks.plt').read_bytes() == (tmp_path / 'whole.plt').read_bytes()
+
+
+def test_tecplot_binary_ranges_skip_missing_values(tmp_path):
+    filename = str(tmp_path / 'opt.plt')
+    write_tecplot_binary(filename, ['a', 'b'], [np.array([np.nan, 2.0, -1.0]),
+                                                np.full(3, np.nan)])
+
+    _, min_max, read_values = read_tecplot_binary(filename)
+    np.testing.assert_array_equal(min_max, [[-1.0, 2.0], [0.0, 0.0]])
+    assert np.isnan(read_values[1]).all()
+
+
+def test_tecplot_binary_stream_drops_extra_rows(tmp_path, columns):
+    names, values = columns
+    filename = str(tmp_path / 'opt.plt')
+    write_in_blocks(TecplotBinaryStreamWriter(filename, names, 5), values, 4)
+
+    _, min_max, read_values = read_tecplot_binary(filename)
+    for value, read_value in zip(values, read_values):
+        np.testing.assert_array_equal(read_value, value[:5])
+    assert min_max[0].tolist() == [0.0, 4.0]
+
+
+def test_npz_round_trip(tmp_path, columns):
+    names, values = columns
+    # np.savez can't write arrays named after its own arguments
+    names = names + ['file']
+    values = values + [np.array([1.0, 2.0])]
+    filename = str(tmp_path / 'opt.npz')
+    write_npz(filename, names, values)
+
+    with np.load(filename) as npz:
+        assert list(npz.keys()) == names
+        for name, value in zip(names, values):
+            np.testing.assert_array_equal(npz[name], value)
+
+
+@pytest.mark.parametrize('num_rows', [7, 5])
+def test_npz_stream_matches_whole_file(tmp_path, columns, num_rows):
+    names, values = columns
+    filename = str(tmp_path / 'opt.npz')
+    write_in_blocks(NpzStreamWriter(filename, names, num_rows), values, 3)
+
+    with np.load(filename) as npz:
+        assert list(npz.keys()) == names
+        for name, value in zip(names, values):
+            np.testing.assert_array_equal(npz[name], value[:num_rows])
+        assert npz['Iteration'].dtype == np.int64
+        assert npz['obj'].dtype == np.float64
+    assert list(tmp_path.iterdir()) == [tmp_path / 'opt.npz']
+
+
+def test_npz_stream_without_rows(tmp_path):
+    filename = str(tmp_path / 'opt.npz')
+    NpzStreamWriter(filename, ['Iteration', 'obj'], 0).close()
+
+    with np.load(filename) as npz:
+        assert npz['obj'].shape == (0,)
+
+
+def test_csv_stream_matches_dataframe(tmp_path, columns):
+    names, values = columns
+    filename = str(tmp_path / 'opt.csv')
+    write_in_blocks(CsvStreamWriter(filename, names, 7), values, 3)
+
+    expected = io.StringIO()
+    pd.DataFrame(dict(zip(names, values))).to_csv(expected)
+    with open(filename) as f:
+        assert f.read() == expected.getvalue()
+
+
+def test_tecplot_ascii_stream(tmp_path, columns):
+    names, values = columns
+    filename = str(tmp_path / 'opt.dat')
+    write_in_blocks(TecplotAsciiStreamWriter(filename, names, 7), values, 3)
+
+    with open(filename) as f:
+        lines = f.read().splitlines()
+    assert lines[:3] == ['TITLE     = "OpenMDAO Record"',
+                         'VARIABLES = "Iteration" "obj" "x[0]"',
+                         'ZONE T="OpenMDAO"  I=7, ZONETYPE=Ordered DATAPACKING=POINT']
+    np.testing.assert_allclose(np.loadtxt(lines[3:]), np.column_stack(values))
+
+
+def test_get_history_writer(monkeypatch):
+    assert get_history_writer('opt.PLT') is write_tecplot_binary
+    assert get_history_writer('opt.npz') is write_npz
+    assert get_history_writer('opt.dat') is None
+    assert get_history_writer('opt.csv') is None
+
+    monkeypatch.setattr('importlib.util.find_spec', lambda package: None)
+    with pytest.raises(ImportError, match='pyarrow'):
+        get_history_writer('opt.feather')
+
+
+def test_get_streaming_history_writer():
+    assert get_streaming_history_writer('opt.dat') is TecplotAsciiStreamWriter
+    assert get_streaming_history_writer('opt.plt') is TecplotBinaryStreamWriter
+    assert get_streaming_history_writer('opt.npz') is NpzStreamWriter
+    assert get_streaming_history_writer('opt.txt') is CsvStreamWriter
+    with pytest.raises(ValueError, match='parquet'):
+        get_streaming_history_writer('opt.parquet')
+
+
+@pytest.mark.parametrize('extension', ['plt', 'npz'])
+def test_binary_files_have_the_columns_of_the_ascii_file(constrained_dv_recorder_file,
+                                                         tmp_path, extension):
+    from om_dash.om_convert_recorder_hist import write_data_to_file
+    from om_dash.recorder_history_stacker import RecorderHistoryStacker
+
+    parser = RecorderHistoryStacker([constrained_dv_recorder_file], num_workers=1)
+    write_data_to_file(parser, str(tmp_path / 'history.dat'))
+    with open(tmp_path / 'history.dat') as f:
+        f.readline()
+        ascii_names = f.readline().split('=', 1)[1].split()
+    ascii_values = np.loadtxt(tmp_path / 'history.dat', skiprows=3, ndmin=2)
+
+    filename = str(tmp_path / f'history.{extension}')
+    write_data_to_file(parser, filename)
+    if extension == 'plt':
+        names, _, values = read_tecplot_binary(filename)
+    else:
+        with np.load(filename) as npz:
+            names = list(npz.keys())
+            values = [npz[name] for name in names]
+
+    # the design variables x and z are constraints too, so they appear twice
+    assert len(names) == len(ascii_names) == parser.get_dataframe_of_all_data().shape[1]
+    assert names[-2:] == ['y', 'dv:z']
+    np.testing.assert_array_equal(np.column_stack(values), ascii_values)
@@ -0,0 +1,80 @@
+import pytest
+
+from om_dash.cli import main
+from om_dash.instrumentation import Instrumentation, instrumentation
+
+
+def test_timer_records_each_call():
+    timings = Instrumentation(num_recent_timings=2)
+    for _ in range(3):
+        with timings.timer('read'):
+            pass
+    timings.record_time('plot', 0.5)
+
+    plot, read = timings.get_stage_summaries()
+    assert plot == {'stage': 'plot', 'calls': 1, 'total_seconds': 0.5, 'mean_seconds': 0.5,
+                    'last_seconds': 0.5, 'recent_max_seconds': 0.5}
+    assert read['calls'] == 3
+    assert read['mean_seconds'] == pytest.approx(read['total_seconds'] / 3)
+    assert len(timings._recent_times['read']) == 2
+
+
+def test_timer_records_calls_that_raise():
+    timings = Instrumentation()
+    with pytest.raises(RuntimeError):
+        with timings.timer('read'):
+            raise RuntimeError('recorder is locked')
+    assert timings.get_stage_summaries()[0]['calls'] == 1
+
+
+def test_timed_functions_keep_their_name_and_result():
+    timings = Instrumentation()
+
+    @timings.timed('stage')
+    def add(a, b=1):
+        return a + b
+
+    assert add(2, b=3) == 5
+    assert add.__name__ == 'add'
+    assert timings.get_stage_summaries()[0]['stage'] == 'stage'
+
+
+def test_disabled_instrumentation_records_nothing():
+    timings = Instrumentation()
+    timings.enabled = False
+    with timings.timer('read'):
+        pass
+    timings.count('cases')
+    assert timings.get_stage_summaries() == []
+    assert timings.counters == {}
+
+
+def test_report_lists_the_slowest_stages_first_and_the_counters():
+    timings = Instrumentation()
+    timings.record_time('fast', 0.001)
+    timings.record_time('slow', 2.0)
+    timings.count('cases_read', 40)
+    timings.count('cases_read', 2)
+
+    lines = timings.format_report().splitlines()
+    assert lines[0].split() == ['stage', 'calls', 'total', '[s]', 'mean', '[ms]', 'last',
+                                '[ms]', 'max', '[ms]']
+    assert lines[1].split() == ['slow', '1', '2.0000', '2000.00', '2000.00', '2000.00']
+    assert lines[2].split()[0] == 'fast'
+    assert lines[-1].split() == ['cases_read', '42']
+
+    timings.reset()
+    assert timings.format_report().splitlines()[1:] == []
+
+
+@pytest.mark.parametrize('profile', [True, False])
+def test_convert_prints_the_profile_report(recorder_file, tmp_path, capsys, profile):
+    instrumentation.reset()
+    argv = ['convert', '-i', recorder_file, '-o', str(tmp_path / 'opt.csv'), '--no-cache']
+    main(argv + ['--profile'] if profile else argv)
+
+    output = capsys.readouterr().out
+    assert ('convert.read_recorders' in output) == profile
+    if profile:
+        assert 'convert.write_file' in output
+        assert 'recorder_parser.cases_read' in output
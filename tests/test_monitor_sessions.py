@@ -0,0 +1,87 @@
+import threading
+import pytest
+
+from om_dash.monitor_sessions import SessionRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = SessionRegistry(max_sessions=3, poll_interval_in_seconds=0.05)
+    yield registry
+    registry.recorder_watcher.stop()
+
+
+def test_least_recently_used_sessions_are_evicted(registry, recorder_file):
+    sessions = [registry.create_session() for _ in range(3)]
+    sessions[0].watch_recorder(recorder_file, registry.recorder_watcher)
+    registry.get(sessions[0].session_id)
+
+    registry.create_session()
+    assert len(registry) == 3
+    assert sessions[1].session_id not in registry
+    assert sessions[0].session_id in registry
+    assert len(registry.recorder_watcher) == 1
+
+    for _ in range(3):
+        registry.create_session()
+    assert sessions[0].session_id not in registry
+    assert sessions[0].recorder is None
+    assert len(registry.recorder_watcher) == 0
+
+
+def test_idle_sessions_are_evicted(registry):
+    registry.idle_timeout_in_seconds = 60.0
+    idle, active = registry.create_session(), registry.create_session()
+    idle.last_access_time -= 61.0
+
+    registry.get(active.session_id)
+    assert idle.session_id not in registry
+    assert active.session_id in registry
+
+
+def test_evicted_session_is_recreated_as_expired(registry):
+    session = registry.create_session()
+    assert not session.expired
+    assert registry.get(session.session_id) is session
+
+    for _ in range(3):
+        registry.create_session()
+    recreated = registry.get(session.session_id)
+    assert recreated is not session
+    assert recreated.expired
+    assert recreated.recorder is None
+
+
+def run_in_threads(function, num_threads=8):
+    barrier = threading.Barrier(num_threads)
+    errors = []
+
+    def run():
+        barrier.wait()
+        try:
+            function()
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_concurrent_gets_share_one_session(registry):
+    session_id = registry.create_session_id()
+    sessions = []
+    run_in_threads(lambda: sessions.extend(registry.get(session_id) for _ in range(50)))
+    assert len(sessions) == 400
+    assert len({id(session) for session in sessions}) == 1
+    assert sessions[0].expired
+
+
+def test_concurrent_gets_keep_the_registry_bounded(registry):
+    sessions = []
+    run_in_threads(lambda: sessions.extend(registry.create_session() for _ in range(50)))
+    assert len(registry) == registry.max_sessions
+    assert sum(session.session_id in registry for session in sessions) == registry.max_sessions
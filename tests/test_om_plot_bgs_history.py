@@ -0,0 +1,74 @@
+import numpy as np
+
+from om_dash.bgs_residual_parser import BgsResidualParser
+from om_dash.om_plot_bgs_history import (create_arg_parser, create_compact_residual_figure,
+                                         create_residual_figure, create_solve_summary_figure, run)
+from conftest import write_solver_log
+
+
+def parse_solver_log(tmp_path) -> BgsResidualParser:
+    log = tmp_path / 'solver.log'
+    write_solver_log(log)
+    parser = BgsResidualParser()
+    parser.parse_all_residuals(str(log))
+    return parser
+
+
+def test_compact_figure_has_one_trace_per_residual_with_gaps_between_solves(tmp_path):
+    solves = parse_solver_log(tmp_path).lnbgs_data
+    fig = create_compact_residual_figure(solves, 'lnbgs.html', False, True, True)
+
+    absolute, relative = fig.data
+    assert (absolute.name, relative.name) == ('Absolute', 'Relative')
+    np.testing.assert_array_equal(absolute.x, [0, 1, 2, 2, 3])
+    np.testing.assert_array_equal(absolute.y, [2.0, 0.2, np.nan, 1.5, 0.3])
+    np.testing.assert_array_equal(relative.y, [1.0, 0.1, np.nan, 1.0, 0.2])
+    np.testing.assert_array_equal(absolute.customdata,
+                                  [[0, 0], [0, 1], [-1, -1], [1, 0], [1, 1]])
+    assert absolute.connectgaps is False
+
+    # the same points as the figure with two traces per solve
+    per_solve = create_residual_figure(solves, 'lnbgs.html', False, True, True)
+    per_solve_absolute = np.concatenate([trace.y for trace in per_solve.data[::2]])
+    np.testing.assert_array_equal(absolute.y[~np.isnan(absolute.y)], per_solve_absolute)
+
+
+def test_compact_figure_of_a_single_kind_of_residual(tmp_path):
+    solves = parse_solver_log(tmp_path).nlbgs_data
+    fig = create_compact_residual_figure(solves, 'nlbgs.png', True, False, True)
+    assert [trace.name for trace in fig.data] == ['Relative']
+    np.testing.assert_array_equal(fig.data[0].y, [1.0, 0.1, 2e-3])
+    # images get no log scale menus
+    assert fig.layout.updatemenus == ()
+
+    empty = BgsResidualParser().lnbgs_data
+    assert create_compact_residual_figure(empty, 'lnbgs.html', False, True, True).data == ()
+
+
+def test_summary_figure_plots_each_statistic_in_its_row(tmp_path):
+    summary = parse_solver_log(tmp_path).summarize_solves(doing_nlbgs=False)
+    summary['stalled'] = np.array([False, True])
+    fig = create_solve_summary_figure(summary)
+
+    traces = {trace.name: trace for trace in fig.data}
+    assert list(traces) == ['Iterations', 'Final Absolute', 'Final Relative',
+                            'Reduction per Iteration', 'Stalled']
+    assert [traces[name].yaxis for name in traces] == ['y', 'y2', 'y2', 'y3', 'y']
+    np.testing.assert_array_equal(traces['Final Absolute'].y, [0.2, 0.3])
+    np.testing.assert_allclose(traces['Reduction per Iteration'].y, [0.1, 0.2])
+    np.testing.assert_array_equal(traces['Stalled'].x, [1])
+    assert fig.layout.yaxis2.type == 'log'
+
+
+def test_compact_and_summary_plots_are_written(tmp_path):
+    log = tmp_path / 'solver.log'
+    write_solver_log(log)
+    output_dir = tmp_path / 'plots'
+    output_dir.mkdir()
+    args = create_arg_parser().parse_args(['-i', str(log), '--compact', '--summary',
+                                           '--output-dir', str(output_dir)])
+    run(args)
+
+    assert sorted(path.name for path in output_dir.iterdir()) == [
+        'solver_lnbgs.html', 'solver_lnbgs_summary.html',
+        'solver_nlbgs.html', 'solver_nlbgs_summary.html']
@@ -0,0 +1,277 @@
+import numpy as np
+import pytest
+
+from om_dash.opt_hist_figure_generator import OptHistoryFigureGenerator
+from om_dash.recorder_parser import RecorderParser
+from conftest import decode_typed_array
+
+
+def append_cases(parser: RecorderParser, first_iteration: int, num_cases: int):
+    """
+    Append cases with an objective, a scalar and an array constraint, and an array DV
+    """
+    for iteration in range(first_iteration, first_iteration + num_cases):
+        parser.obj_history.append({'obj': 1.0 / (iteration + 1)}, index=iteration)
+        parser.con_history.append({'c': 0.5 * iteration,
+                                   'g': np.array([iteration, -iteration, 2.0])})
+        parser.dv_history.append({'x': np.array([1.0, 2.0]) * iteration})
+
+
+def make_parser(num_cases: int) -> RecorderParser:
+    parser = RecorderParser()
+    append_cases(parser, 0, num_cases)
+    return parser
+
+
+def trace_names(fig):
+    return [trace.name for trace in fig.data]
+
+
+def trace_x(trace):
+    if trace.x is None:
+        return trace.x0 + trace.dx * np.arange(len(trace.y))
+    return np.asarray(trace.x)
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_long_histories_are_downsampled(method):
+    generator = OptHistoryFigureGenerator(make_parser(500))
+    generator.max_points_per_trace = 50
+    generator.downsampling_method = method
+    fig = generator.create_figure()
+
+    for trace in fig.data:
+        x = trace_x(trace)
+        assert 2 < x.size <= 50
+        assert x[0] == 0 and x[-1] == 499
+    obj = fig.data[trace_names(fig).index('obj')]
+    np.testing.assert_allclose(obj.y, 1.0 / (trace_x(obj) + 1))
+
+
+def test_short_histories_keep_every_point():
+    generator = OptHistoryFigureGenerator(make_parser(20))
+    generator.max_points_per_trace = 50
+    fig = generator.create_figure()
+
+    for trace in fig.data:
+        np.testing.assert_array_equal(trace_x(trace), np.arange(20))
+
+
+def test_zooming_in_refines_the_downsampled_range():
+    generator = OptHistoryFigureGenerator(make_parser(1000))
+    generator.max_points_per_trace = 50
+    fig = generator.create_figure(x_range=[100.5, 120.5])
+
+    # every point in the range plus one beyond each end
+    np.testing.assert_array_equal(trace_x(fig.data[0]), np.arange(100, 122))
+    assert list(fig.layout.xaxis.range) == [100.5, 120.5]
+
+
+def test_x_range_from_relayout_data():
+    generator = OptHistoryFigureGenerator(make_parser(1))
+    assert generator.get_x_range_from_relayout_data(None) is False
+    assert generator.get_x_range_from_relayout_data({'autosize': True}) is False
+    assert generator.get_x_range_from_relayout_data({'xaxis.autorange': True}) is None
+    assert generator.get_x_range_from_relayout_data({'xaxis.range[0]': 1.5,
+                                                     'xaxis.range[1]': 9}) == [1.5, 9]
+    assert generator.get_x_range_from_relayout_data({'xaxis.range': (2, 3)}) == [2, 3]
+
+
+def test_array_variables_are_plotted_per_element_by_default():
+    generator = OptHistoryFigureGenerator(make_parser(4))
+    fig = generator.create_figure()
+    assert trace_names(fig) == ['obj', 'c', 'g_0', 'g_1', 'g_2', 'x_0', 'x_1']
+    assert generator.get_array_variable_names() == ['g', 'x']
+
+    generator.include_dvs = False
+    assert trace_names(generator.create_figure()) == ['obj', 'c', 'g_0', 'g_1', 'g_2']
+    assert generator.get_array_variable_names() == ['g']
+
+
+def test_aggregated_array_variables_are_summarized():
+    generator = OptHistoryFigureGenerator(make_parser(4))
+    generator.aggregate_arrays = True
+    fig = generator.create_figure()
+
+    assert trace_names(fig) == ['obj', 'c',
+                                'g (min)', 'g (max)', 'g (mean)', 'g (norm)',
+                                'x (min)', 'x (max)', 'x (mean)', 'x (norm)']
+    traces = dict(zip(trace_names(fig), fig.data))
+    iterations = np.arange(4)
+    np.testing.assert_allclose(traces['g (min)'].y, np.minimum(-iterations, 2.0))
+    np.testing.assert_allclose(traces['g (max)'].y, np.maximum(iterations, 2.0))
+    np.testing.assert_allclose(traces['g (mean)'].y, [2.0 / 3] * 4)
+    np.testing.assert_allclose(traces['g (norm)'].y, np.sqrt(2.0 * iterations ** 2 + 4.0))
+    np.testing.assert_allclose(traces['x (norm)'].y, np.sqrt(5.0) * iterations)
+
+    # the min and max of a variable are drawn as a shaded band
+    assert traces['g (min)'].showlegend is False
+    assert traces['g (max)'].fill == 'tonexty'
+    assert traces['g (max)'].legendgroup == 'g'
+    assert traces['g (norm)'].line.dash == 'dash'
+    assert traces['c'].mode == 'lines+markers'
+
+
+def test_expanded_variables_are_plotted_per_element():
+    generator = OptHistoryFigureGenerator(make_parser(4))
+    generator.aggregate_arrays = True
+    generator.expanded_variables = {'x'}
+    fig = generator.create_figure()
+    assert trace_names(fig)[-2:] == ['x_0', 'x_1']
+    assert 'x (min)' not in trace_names(fig)
+
+    generator.summary_statistics = ['norm']
+    assert trace_names(generator.create_figure()) == ['obj', 'c', 'g (norm)', 'x_0', 'x_1']
+
+
+def test_aggregated_figure_is_extended_with_summaries():
+    parser = make_parser(4)
+    generator = OptHistoryFigureGenerator(parser)
+    generator.aggregate_arrays = True
+    generator.binary_arrays = False
+    generator.create_figure()
+
+    append_cases(parser, 4, 2)
+    new_data, trace_indices = generator.generate_extend_data_for_opt_hist_traces()
+    assert trace_indices == list(range(10))
+    assert new_data['y'][2] == [-4.0, -5.0]
+    assert new_data['y'][3] == [4.0, 5.0]
+
+
+def test_parser_rows_since_a_version():
+    parser = make_parser(5)
+    iterations, rows = parser.get_rows_since(3)
+    np.testing.assert_array_equal(iterations, [3, 4])
+    assert list(rows.keys()) == ['obj', 'c', 'g_0', 'g_1', 'g_2', 'x_0', 'x_1']
+    np.testing.assert_array_equal(rows['x_1'], [6.0, 8.0])
+
+    _, rows = parser.get_rows_since(3, include_constraints=False, include_dvs=False)
+    assert list(rows.keys()) == ['obj']
+    iterations, rows = parser.get_rows_since(5)
+    assert iterations.size == 0 and rows['obj'].size == 0
+
+
+def test_constrained_design_variables_keep_their_own_traces():
+    parser = make_parser(3)
+    for iteration in range(3, 5):
+        parser.obj_history.append({'obj': 1.0}, index=iteration)
+        parser.con_history.append({'c': 1.0, 'g': np.zeros(3), 'x': np.array([4.0, 4.0])})
+        parser.dv_history.append({'x': np.array([1.0, 2.0]) * iteration})
+
+    iterations, rows = parser.get_rows_since(3)
+    assert list(rows.keys()) == ['obj', 'c', 'g_0', 'g_1', 'g_2', 'x_0', 'x_1',
+                                 'dv:x_0', 'dv:x_1']
+    np.testing.assert_array_equal(rows['x_1'], [4.0, 4.0])
+    np.testing.assert_array_equal(rows['dv:x_1'], [6.0, 8.0])
+
+    generator = OptHistoryFigureGenerator(parser)
+    generator.aggregate_arrays = True
+    generator.summary_statistics = ['min', 'max']
+    assert generator.get_array_variable_names() == ['g', 'x', 'dv:x']
+    fig = generator.create_figure()
+    traces = dict(zip(trace_names(fig), fig.data))
+    assert list(traces) == ['obj', 'c', 'g (min)', 'g (max)', 'x (min)', 'x (max)',
+                            'dv:x (min)', 'dv:x (max)']
+    assert traces['dv:x (max)'].legendgroup == 'dv:x'
+
+    generator.expanded_variables = {'dv:x'}
+    assert trace_names(generator.create_figure())[-2:] == ['dv:x_0', 'dv:x_1']
+
+
+def test_figure_is_extended_with_the_new_rows():
+    parser = make_parser(3)
+    generator = OptHistoryFigureGenerator(parser)
+    generator.binary_arrays = False
+    fig = generator.create_figure()
+    # consecutive iterations are implied by x0 and dx
+    assert fig.data[0].x is None and fig.data[0].x0 == 0
+
+    append_cases(parser, 3, 2)
+    new_data, trace_indices, max_points = \
+        generator.generate_extend_data_for_opt_hist_traces(max_points=100)
+    assert trace_indices == list(range(7))
+    assert max_points == 100
+    assert 'x' not in new_data
+    assert new_data['y'][0] == [0.25, 0.2]
+    assert new_data['y'][-1] == [6.0, 8.0]
+    assert generator.num_plotted_rows == 5
+
+    new_data, _ = generator.generate_extend_data_for_opt_hist_traces()
+    assert new_data['y'] == [[]] * 7
+
+
+def test_figure_with_repeated_iterations_is_extended_with_x_values():
+    parser = make_parser(3)
+    # a stacked recorder starts with the last iteration of the previous one
+    append_cases(parser, 2, 2)
+    generator = OptHistoryFigureGenerator(parser)
+    generator.binary_arrays = False
+    fig = generator.create_figure()
+    assert list(fig.data[0].x) == [0, 1, 2, 2, 3]
+
+    append_cases(parser, 4, 1)
+    new_data, trace_indices = generator.generate_extend_data_for_opt_hist_traces()
+    assert new_data['x'] == [[4]] * len(trace_indices)
+
+
+def test_figure_has_to_be_recreated_after_a_reset():
+    parser = make_parser(3)
+    generator = OptHistoryFigureGenerator(parser)
+    generator.create_figure()
+
+    parser._reset_histories(parser.recorder_filename)
+    append_cases(parser, 0, 4)
+    assert generator.generate_extend_data_for_opt_hist_traces() is None
+
+    generator.create_figure()
+    assert generator.num_plotted_rows == 4
+    assert generator.generate_extend_data_for_opt_hist_traces() is not None
+
+
+def test_figure_has_to_be_recreated_when_the_traces_change():
+    parser = make_parser(3)
+    generator = OptHistoryFigureGenerator(parser)
+    generator.create_figure()
+
+    parser.con_history.append({'c': 1.0, 'g': np.zeros(3), 'new_con': 1.0})
+    parser.obj_history.append({'obj': 1.0}, index=3)
+    parser.dv_history.append({'x': np.zeros(2)})
+    assert generator.generate_extend_data_for_opt_hist_traces() is None
+
+    generator.create_figure()
+    generator.include_dvs = False
+    assert generator.generate_extend_data_for_opt_hist_traces() is None
+
+
+@pytest.mark.parametrize('float32_arrays', [False, True])
+def test_figure_data_is_sent_as_typed_arrays(float32_arrays):
+    parser = make_parser(3)
+    append_cases(parser, 2, 1)
+    generator = OptHistoryFigureGenerator(parser)
+    generator.float32_arrays = float32_arrays
+    fig = generator.create_figure()
+
+    value_dtype = np.float32 if float32_arrays else np.float64
+    assert fig.data[0].y.dtype == value_dtype
+    assert fig.data[0].x.dtype == np.int32
+    spec = fig.to_plotly_json()['data'][0]['y']
+    assert spec['dtype'] == ('f4' if float32_arrays else 'f8')
+
+    append_cases(parser, 3, 2)
+    new_data, _ = generator.generate_extend_data_for_opt_hist_traces()
+    np.testing.assert_array_equal(decode_typed_array(new_data['x'][0]), [3, 4])
+    obj = decode_typed_array(new_data['y'][0])
+    assert obj.dtype == value_dtype
+    np.testing.assert_allclose(obj, [0.25, 0.2], rtol=1e-7)
+
+
+def test_figure_data_is_sent_as_lists():
+    parser = make_parser(3)
+    generator = OptHistoryFigureGenerator(parser)
+    generator.binary_arrays = False
+    fig = generator.create_figure()
+    assert isinstance(fig.to_plotly_json()['data'][0]['y'], (list, tuple))
+
+    append_cases(parser, 3, 1)
+    new_data, _ = generator.generate_extend_data_for_opt_hist_traces()
+    assert new_data['y'][0] == [0.25]
@@ -0,0 +1,102 @@
+import dash
+import pytest
+
+from om_dash.opt_hist_gui_core import GuiOptHistoryCore, add_callbacks
+from conftest import nlbgs_line
+
+
+class GuiClient:
+    def __init__(self, max_sessions=32):
+        """
+        Calls the monitor's callbacks through the dash server like a browser page does
+        """
+        self.core = GuiOptHistoryCore(max_sessions=max_sessions)
+        self.app = dash.Dash(__name__)
+        self.app.layout = self.core.serve_layout
+        add_callbacks(self.app, self.core)
+        self.client = self.app.server.test_client()
+        layout = self.client.get('/_dash-layout').get_json()
+        self.session_id = layout['props']['children'][0]['props']['data']
+
+    def call(self, first_output: str, inputs: dict, states: dict = None) -> dict:
+        """
+        Call the callback whose first output is first_output, triggered by the first of the
+        inputs. The values are keyed on 'component_id.property'.
+        """
+        callback_id = next(key for key in self.app.callback_map
+                           if key.lstrip('.').startswith(first_output))
+        callback = self.app.callback_map[callback_id]
+        values = dict(inputs, **(states or {}), **{'session_id.data': self.session_id})
+        outputs = [self._get_output(spec) for spec in callback_id.strip('.').split('...')]
+        body = {'output': callback_id,
+                'outputs': outputs if callback_id.startswith('..') else outputs[0],
+                'inputs': [self._get_value(spec, values) for spec in callback['inputs']],
+                'state': [self._get_value(spec, values) for spec in callback['state']],
+                'changedPropIds': [next(iter(inputs))]}
+        response = self.client.post('/_dash-update-component', json=body)
+        assert response.status_code in (200, 204), response.data
+        return {} if response.status_code == 204 else response.get_json()['response']
+
+    def _get_output(self, spec: str) -> dict:
+        component_id, component_property = spec.split('@')[0].rsplit('.', 1)
+        return {'id': component_id, 'property': component_property}
+
+    def _get_value(self, spec: dict, values: dict) -> dict:
+        return dict(spec, value=values.get(f'{spec["id"]}.{spec["property"]}'))
+
+
+@pytest.fixture
+def gui():
+    gui = GuiClient()
+    yield gui
+    gui.core.sessions.recorder_watcher.stop()
+
+
+def start(gui: GuiClient, recorder_file: str, residual_log_file: str = '') -> dict:
+    states = {'refresh_interval_input.value': 2, 'max_refresh_interval_input.value': 60,
+              'recorder_file.value': recorder_file, 'residual_log_file.value': residual_log_file,
+              'include_dvs_checklist.value': ['DVS'], 'include_variables_input.value': '',
+              'exclude_variables_input.value': '', 'max_points_input.value': None,
+              'aggregate_arrays_checklist.value': [], 'expand_variables_dropdown.value': [],
+              'array_encoding_checklist.value': ['BINARY']}
+    return gui.call('live_update_interval.interval', {'start_button.n_clicks': 1}, states)
+
+
+def test_residual_panel_refreshes_at_the_minimum_interval(gui, recorder_file, tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text(nlbgs_line(1, 1.0, 1.0))
+    response = start(gui, recorder_file, str(log))
+    assert response['residual_update_interval'] == {'interval': 2000.0}
+
+    # the optimization's interval backs off when no cases arrive, but the residual panel is
+    # still extended from its own interval
+    with open(log, 'a') as f:
+        f.write(nlbgs_line(2, 0.1, 0.1))
+    response = gui.call('residual_hist_graph.extendData',
+                        {'residual_update_interval.n_intervals': 1})
+    assert response['residual_hist_graph']['extendData'] is not None
+
+
+def test_residual_panel_does_not_refresh_without_a_log(gui, recorder_file):
+    response = start(gui, recorder_file)
+    assert response['residual_update_interval'] == {'interval': 1e9}
+
+
+def test_page_of_an_evicted_session_presses_start_again(recorder_file):
+    gui = GuiClient(max_sessions=1)
+    try:
+        start(gui, recorder_file)
+        # loading another page evicts the session of the first one
+        gui.client.get('/_dash-layout')
+        assert gui.session_id not in gui.core.sessions
+
+        response = gui.call('opt_hist_extend_data.data', {'live_update_interval.n_intervals': 1},
+                            {'start_button.n_clicks': 1})
+        assert response == {'start_button': {'n_clicks': 2}}
+
+        start(gui, recorder_file)
+        session = gui.core.sessions.get(gui.session_id)
+        assert not session.expired
+        assert session.recorder_file == recorder_file
+    finally:
+        gui.core.sessions.recorder_watcher.stop()
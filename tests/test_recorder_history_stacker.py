@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from om_dash.recorder_history_stacker import RecorderHistoryStacker
+from om_dash.recorder_parser import RecorderParser
+from conftest import copy_first_driver_cases
+
+
+@pytest.fixture(scope='module')
+def restart_chain(recorder_file, tmp_path_factory):
+    """
+    Three recorders of different lengths standing in for an optimization and its restarts
+    """
+    directory = tmp_path_factory.mktemp('chain')
+    filenames = []
+    for irecorder, num_cases in enumerate([4, 7]):
+        filename = str(directory / f'opt_{irecorder}.sql')
+        copy_first_driver_cases(recorder_file, filename, num_cases)
+        filenames.append(filename)
+    return filenames + [recorder_file]
+
+
+def assert_same_stacked_histories(stacker, expected):
+    pd.testing.assert_frame_equal(stacker.objs, expected.objs)
+    pd.testing.assert_frame_equal(stacker.cons, expected.cons)
+    pd.testing.assert_frame_equal(stacker.dvs, expected.dvs)
+
+
+def test_process_pool_matches_serial_read(restart_chain):
+    serial = RecorderHistoryStacker(restart_chain, num_workers=1)
+    pooled = RecorderHistoryStacker(restart_chain, num_workers=3)
+    assert pooled._get_number_of_workers(len(restart_chain)) == 3
+    assert_same_stacked_histories(pooled, serial)
+
+
+def test_stacked_iterations_continue_across_recorders(restart_chain):
+    stacker = RecorderHistoryStacker(restart_chain, num_workers=2)
+    num_cases = [RecorderParser(filename).num_cases_read for filename in restart_chain]
+    assert stacker.obj_history.num_rows == sum(num_cases)
+
+    # each recorder starts with the final design of the previous one, so its first iteration
+    # repeats the last iteration of the previous recorder
+    expected_iterations = np.concatenate([np.arange(4), np.arange(3, 10),
+                                          np.arange(9, 9 + num_cases[2])])
+    np.testing.assert_array_equal(stacker.objs['Iteration'], expected_iterations)
+
+    expected_f = np.concatenate([RecorderParser(filename).objs['f'] for filename in restart_chain])
+    np.testing.assert_array_equal(stacker.objs['f'], expected_f)
+
+
+def test_number_of_workers():
+    stacker = RecorderHistoryStacker([], num_workers=8)
+    assert stacker._get_number_of_workers(3) == 3
+    assert stacker._get_number_of_workers(0) == 1
+    stacker.num_workers = None
+    assert 1 <= stacker._get_number_of_workers(100)
@@ -0,0 +1,160 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+
+from om_dash.recorder_parser import RecorderParser, _open_case_reader
+from conftest import (assert_same_histories, copy_first_driver_cases, count_driver_cases,
+                      record_optimization)
+
+
+@pytest.fixture
+def recorder_copy(recorder_file, tmp_path) -> str:
+    copy = str(tmp_path / 'opt.sql')
+    copy_first_driver_cases(recorder_file, copy, count_driver_cases(recorder_file) // 2)
+    return copy
+
+
+def get_last_driver_case(recorder_filename: str):
+    case_reader = _open_case_reader(recorder_filename)
+    case_ids = case_reader.list_cases('driver', recurse=False, out_stream=None)
+    return case_reader.get_case(case_ids[-1])
+
+
+def test_constrained_design_variables_are_not_merged_with_their_constraints(
+        constrained_dv_recorder_file):
+    parser = RecorderParser(constrained_dv_recorder_file)
+    assert parser.cons.columns[:3].tolist() == ['x_0', 'x_1', 'z']
+
+    iterations, rows = parser.get_rows_since(0)
+    all_data = parser.get_dataframe_of_all_data()
+    assert len(rows) + 1 == all_data.shape[1]
+    np.testing.assert_array_equal(iterations, all_data['Iteration'])
+    np.testing.assert_array_equal(rows['z'], parser.cons['z'])
+    np.testing.assert_array_equal(rows['dv:z'], parser.dvs['z'])
+    np.testing.assert_array_equal(rows['dv:x_1'], parser.dvs['x_1'])
+    assert 'y' in rows and 'dv:y' not in rows
+
+
+def test_parser_remembers_the_last_case_read(recorder_copy):
+    parser = RecorderParser(recorder_copy)
+    last_case = get_last_driver_case(recorder_copy)
+    assert parser.num_cases_read == count_driver_cases(recorder_copy)
+    assert parser.obj_history.num_rows == parser.num_cases_read
+    assert parser.last_case_counter == last_case.counter
+    assert parser.last_case_timestamp == last_case.timestamp
+
+
+def test_update_reads_only_the_new_cases(recorder_file, recorder_copy, recorder_reads):
+    parser = RecorderParser(recorder_copy)
+    num_cases_read = parser.num_cases_read
+    history_id = parser.history_id
+
+    shutil.copyfile(recorder_file, recorder_copy)
+    parser.update_histories_from_recorder(recorder_copy)
+    assert recorder_reads == [0, num_cases_read]
+    assert parser.history_id == history_id
+    assert parser.last_case_counter == get_last_driver_case(recorder_file).counter
+
+    expected = RecorderParser(recorder_file)
+    expected.recorder_filename = recorder_copy
+    assert_same_histories(parser, expected)
+
+
+def test_update_without_new_cases_reads_nothing(recorder_copy, recorder_reads):
+    parser = RecorderParser(recorder_copy)
+    parser.update_histories_from_recorder(recorder_copy)
+    assert recorder_reads == [0]
+
+
+def test_new_run_into_the_same_file_is_read_from_the_start(recorder_file, tmp_path,
+                                                          recorder_reads):
+    filename = str(tmp_path / 'opt.sql')
+    shutil.copyfile(recorder_file, filename)
+    parser = RecorderParser(filename)
+    history_id = parser.history_id
+
+    record_optimization(filename, maxiter=2)
+    parser.update_histories_from_recorder(filename)
+    assert recorder_reads == [0, 0]
+    assert parser.history_id != history_id
+    assert parser.num_cases_read == count_driver_cases(filename)
+    assert parser.last_case_counter == get_last_driver_case(filename).counter
+
+
+def test_parser_is_reset_when_the_recorder_changes_or_disappears(recorder_file, recorder_copy):
+    parser = RecorderParser(recorder_copy)
+    history_id = parser.history_id
+
+    parser.update_histories_from_recorder(recorder_file)
+    assert parser.history_id != history_id
+    assert parser.num_cases_read == count_driver_cases(recorder_file)
+
+    history_id = parser.history_id
+    os.remove(recorder_copy)
+    parser.update_histories_from_recorder(recorder_copy)
+    assert parser.history_id != history_id
+    assert parser.num_cases_read == 0
+    assert parser.last_case_counter is None
+    assert parser.obj_history.num_rows == 0
+
+
+class FakeCase:
+    def __init__(self, counter: int, constraints: dict):
+        self.counter = counter
+        self.timestamp = 100.0 + counter
+        self.constraints = constraints
+        self.num_visits = 0
+
+    def get_objectives(self, scaled):
+        self.num_visits += 1
+        return {'obj': np.array([float(self.counter)])}
+
+    def get_constraints(self, scaled):
+        return self.constraints
+
+    def get_design_vars(self, scaled):
+        return {'x': np.array([1.0, 2.0]) * self.counter}
+
+
+def test_cases_are_parsed_in_one_pass_over_a_generator():
+    cases = [FakeCase(counter, {'c': np.array([0.5 * counter])}) for counter in range(1, 4)]
+    parser = RecorderParser()
+    objs, cons, dvs = parser._create_empty_histories()
+
+    counter, timestamp = parser._parse_cases(iter(cases), objs, cons, dvs, start_iteration=5)
+    assert (counter, timestamp) == (3, 103.0)
+    assert [case.num_visits for case in cases] == [1, 1, 1]
+    np.testing.assert_array_equal(objs.get_index_since(0), [5, 6, 7])
+    np.testing.assert_array_equal(cons.get_values('c')[:, 0], [0.5, 1.0, 1.5])
+    np.testing.assert_array_equal(dvs.get_values('x')[:, 1], [2.0, 4.0, 6.0])
+
+
+def test_cases_without_constraints_have_an_empty_constraint_history():
+    parser = RecorderParser()
+    objs, cons, dvs = parser._create_empty_histories()
+    parser._parse_cases(iter([FakeCase(1, {}), FakeCase(2, {})]), objs, cons, dvs)
+    assert objs.num_rows == cons.num_rows == 2
+    pd.testing.assert_frame_equal(cons.to_dataframe(), pd.DataFrame({'empty': []}))
+
+
+def test_case_reader_reads_each_case_once(recorder_file, monkeypatch):
+    from openmdao.recorders.sqlite_reader import SqliteCaseReader
+
+    case_ids = []
+    get_case = SqliteCaseReader.get_case
+
+    def get_case_and_record_id(self, case_id, *args, **kwargs):
+        case_ids.append(case_id)
+        return get_case(self, case_id, *args, **kwargs)
+
+    def get_all_cases(self, *args, **kwargs):
+        raise AssertionError('all the cases were loaded at once')
+
+    monkeypatch.setattr(SqliteCaseReader, 'get_case', get_case_and_record_id)
+    monkeypatch.setattr(SqliteCaseReader, 'get_cases', get_all_cases)
+    parser = RecorderParser(recorder_file, use_bulk_reader=False)
+
+    assert parser.num_cases_read == count_driver_cases(recorder_file)
+    assert len(case_ids) == len(set(case_ids)) == parser.num_cases_read
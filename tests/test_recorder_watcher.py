@@ -0,0 +1,98 @@
+import logging
+import shutil
+import time
+import pytest
+
+from om_dash.monitor_sessions import MonitorSession
+from om_dash.recorder_parser import RecorderParser
+from om_dash.recorder_watcher import RecorderWatcher
+from om_dash.variable_filter import VariableFilter
+from conftest import (assert_same_histories, copy_first_driver_cases, count_driver_cases,
+                      wait_until)
+
+
+@pytest.fixture
+def watcher():
+    watcher = RecorderWatcher(poll_interval_in_seconds=0.02)
+    yield watcher
+    watcher.stop()
+
+
+@pytest.fixture
+def growing_recorder(recorder_file, tmp_path) -> str:
+    filename = str(tmp_path / 'growing.sql')
+    copy_first_driver_cases(recorder_file, filename, count_driver_cases(recorder_file) // 2)
+    return filename
+
+
+def test_watch_parses_the_recorder_before_returning(watcher, growing_recorder):
+    recorder = watcher.watch(growing_recorder)
+    version, snapshot = recorder.latest
+    assert version == 1
+    assert snapshot.num_cases_read == count_driver_cases(growing_recorder)
+    assert not recorder.update()
+    assert recorder.latest[0] == 1
+
+
+def test_watcher_thread_publishes_new_cases(watcher, recorder_file, growing_recorder):
+    recorder = watcher.watch(growing_recorder)
+    version, snapshot = recorder.latest
+    num_cases = snapshot.num_cases_read
+    objs = snapshot.objs.copy()
+
+    shutil.copyfile(recorder_file, growing_recorder)
+    wait_until(lambda: recorder.latest[0] > version)
+
+    latest = recorder.latest[1]
+    expected = RecorderParser(recorder_file)
+    expected.recorder_filename = growing_recorder
+    assert_same_histories(latest, expected)
+    # the earlier snapshot is not changed by the parse
+    assert snapshot.num_cases_read == num_cases
+    assert snapshot.objs.equals(objs)
+
+
+def test_sessions_share_the_recorders_they_both_watch(watcher, recorder_file):
+    first = watcher.watch(recorder_file, VariableFilter(includes=['f']))
+    second = watcher.watch(recorder_file, VariableFilter(includes=['f']))
+    other = watcher.watch(recorder_file)
+    assert first is second and first is not other
+    assert len(watcher) == 2
+
+    watcher.unwatch(first)
+    assert len(watcher) == 2
+    watcher.unwatch(second)
+    watcher.unwatch(other)
+    assert len(watcher) == 0
+
+
+def test_read_errors_are_logged_and_kept_until_a_read_succeeds(watcher, recorder_file,
+                                                               growing_recorder, monkeypatch,
+                                                               caplog):
+    recorder = watcher.watch(growing_recorder)
+    session = MonitorSession('session')
+    session.recorder = recorder
+    update_histories = RecorderParser.update_histories_from_recorder
+
+    def fail_to_update(self, recorder_filename):
+        raise OSError('database is locked')
+
+    monkeypatch.setattr(RecorderParser, 'update_histories_from_recorder', fail_to_update)
+    with caplog.at_level(logging.WARNING, logger='om_dash.recorder_watcher'):
+        shutil.copyfile(recorder_file, growing_recorder)
+        wait_until(lambda: recorder.last_error is not None)
+        time.sleep(0.1)
+    assert 'database is locked' in recorder.last_error
+    # the error is logged once rather than on every poll
+    assert len(caplog.records) == 1
+    assert recorder.latest[0] == 1
+
+    assert session.update_recorder_status()
+    assert 'database is locked' in session.recorder_status
+    assert not session.update_recorder_status()
+
+    monkeypatch.setattr(RecorderParser, 'update_histories_from_recorder', update_histories)
+    wait_until(lambda: recorder.latest[0] == 2)
+    wait_until(lambda: recorder.last_error is None)
+    assert session.update_recorder_status()
+    assert session.recorder_status == ''
@@ -0,0 +1,61 @@
+import pytest
+
+from om_dash.refresh_scheduler import AdaptiveRefreshScheduler
+
+
+def make_scheduler(**kwargs) -> AdaptiveRefreshScheduler:
+    scheduler = AdaptiveRefreshScheduler(**kwargs)
+    scheduler.reset(now=0.0)
+    return scheduler
+
+
+def test_interval_starts_at_the_minimum():
+    scheduler = make_scheduler(min_interval_in_seconds=2.0)
+    assert scheduler.get_interval_in_seconds(now=0.0) == 2.0
+    assert scheduler.get_interval_in_seconds(now=3.0) == 2.0
+
+
+def test_interval_follows_the_time_between_cases():
+    scheduler = make_scheduler(min_interval_in_seconds=1.0, max_interval_in_seconds=100.0,
+                               polls_per_case=2.0, smoothing=0.5)
+    scheduler.record_new_cases(1, now=20.0)
+    assert scheduler.get_interval_in_seconds(now=20.0) == 10.0
+
+    # two cases in 10 seconds averaged with the 20 seconds per case before
+    scheduler.record_new_cases(2, now=30.0)
+    assert scheduler.get_interval_in_seconds(now=30.0) == pytest.approx(6.25)
+
+
+def test_fast_cases_are_polled_at_the_minimum_interval():
+    scheduler = make_scheduler(min_interval_in_seconds=2.0)
+    for now in range(1, 10):
+        scheduler.record_new_cases(5, now=float(now))
+    assert scheduler.get_interval_in_seconds(now=9.5) == 2.0
+
+
+def test_polling_backs_off_while_no_case_arrives():
+    scheduler = make_scheduler(min_interval_in_seconds=1.0, max_interval_in_seconds=60.0)
+    scheduler.record_new_cases(1, now=4.0)
+    assert scheduler.get_interval_in_seconds(now=5.0) == 2.0
+    assert scheduler.get_interval_in_seconds(now=44.0) == 20.0
+    assert scheduler.get_interval_in_seconds(now=1000.0) == 60.0
+
+
+def test_no_new_cases_are_not_recorded():
+    scheduler = make_scheduler(min_interval_in_seconds=1.0)
+    scheduler.record_new_cases(1, now=10.0)
+    scheduler.record_new_cases(0, now=12.0)
+    assert scheduler.get_interval_in_seconds(now=12.0) == 5.0
+
+
+def test_reset_forgets_the_rate():
+    scheduler = make_scheduler(min_interval_in_seconds=1.0)
+    scheduler.record_new_cases(1, now=50.0)
+    scheduler.reset(now=60.0)
+    assert scheduler.get_interval_in_seconds(now=61.0) == 1.0
+
+
+def test_max_interval_is_at_least_the_min_interval():
+    scheduler = make_scheduler(min_interval_in_seconds=10.0, max_interval_in_seconds=5.0)
+    assert scheduler.max_interval_in_seconds == 10.0
+    assert scheduler.get_interval_in_seconds(now=1000.0) == 10.0
@@ -0,0 +1,57 @@
+import numpy as np
+
+from om_dash.bgs_residual_parser import BgsResidualFollower
+from om_dash.residual_figure_generator import ResidualHistoryFigureGenerator
+from conftest import lnbgs_line, nlbgs_line
+
+
+def create_generator(log):
+    generator = ResidualHistoryFigureGenerator(BgsResidualFollower(str(log)))
+    return generator, generator.create_figure()
+
+
+def test_new_solves_extend_the_traces_with_a_gap(tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text(nlbgs_line(1, 1.0, 1.0) + nlbgs_line(2, 0.1, 0.1))
+    generator, fig = create_generator(log)
+    np.testing.assert_array_equal(fig.data[0].x, [0, 1])
+    np.testing.assert_array_equal(fig.data[0].y, [1.0, 0.1])
+
+    with open(log, 'a') as f:
+        f.write(nlbgs_line(1, 0.5, 1.0) + lnbgs_line(0, 2.0, 1.0))
+    extend_data, new_fig = generator.generate_residual_trace_update()
+
+    assert new_fig is None
+    new_data, trace_indices = extend_data
+    assert trace_indices == [0, 1, 2, 3]
+    # a NaN point separates the new NLBGS solve from the previous one
+    np.testing.assert_array_equal(new_data['x'][0], [2, 2])
+    np.testing.assert_array_equal(new_data['y'][0], [np.nan, 0.5])
+    np.testing.assert_array_equal(new_data['y'][2], [2.0])
+
+
+def test_no_update_without_new_residuals(tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text(nlbgs_line(1, 1.0, 1.0))
+    generator, _ = create_generator(log)
+    assert generator.generate_residual_trace_update() == (None, None)
+
+
+def test_truncated_log_creates_a_new_figure(tmp_path):
+    log = tmp_path / 'solver.log'
+    log.write_text(nlbgs_line(1, 1.0, 1.0) + nlbgs_line(2, 0.1, 0.1) + nlbgs_line(3, 0.01, 0.01))
+    generator, _ = create_generator(log)
+
+    log.write_text(nlbgs_line(1, 7.0, 1.0))
+    extend_data, fig = generator.generate_residual_trace_update()
+
+    assert extend_data is None
+    # only the new run is plotted, starting from the first iteration again
+    np.testing.assert_array_equal(fig.data[0].x, [0])
+    np.testing.assert_array_equal(fig.data[0].y, [7.0])
+
+    with open(log, 'a') as f:
+        f.write(nlbgs_line(2, 0.7, 0.1))
+    extend_data, fig = generator.generate_residual_trace_update()
+    assert fig is None
+    np.testing.assert_array_equal(extend_data[0]['x'][0], [1])
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from om_dash.case_stream import CaseStreamListener, StreamedRecorder
+from om_dash.recorder_parser import RecorderParser
+from om_dash.socket_recorder import SocketRecorder
+from conftest import record_optimization, wait_until
+
+
+def test_streamed_cases_match_the_recorder_file(tmp_path):
+    address = f'unix://{tmp_path}/cases.sock'
+    listener = CaseStreamListener(address)
+    assert listener.start()
+    streamed = StreamedRecorder(address)
+    listener.subscribe(streamed)
+    recorder = SocketRecorder(address, connect_interval_in_seconds=0.05)
+    recorder_file = str(tmp_path / 'opt.sql')
+    try:
+        record_optimization(recorder_file, extra_recorders=[recorder])
+        expected = RecorderParser(recorder_file)
+        wait_until(lambda: streamed.latest[1].num_cases_read == expected.num_cases_read)
+    finally:
+        listener.close()
+
+    parser = streamed.latest[1]
+    pd.testing.assert_frame_equal(parser.objs, expected.objs)
+    pd.testing.assert_frame_equal(parser.cons, expected.cons)
+    pd.testing.assert_frame_equal(parser.dvs, expected.dvs)
+    assert parser.last_case_counter == expected.last_case_counter
+
+
+def test_each_run_restarts_the_streamed_history(tmp_path):
+    address = f'unix://{tmp_path}/cases.sock'
+    listener = CaseStreamListener(address)
+    assert listener.start()
+    streamed = StreamedRecorder(address)
+    listener.subscribe(streamed)
+    recorder = SocketRecorder(address, connect_interval_in_seconds=0.05)
+    try:
+        record_optimization(str(tmp_path / 'first.sql'), extra_recorders=[recorder])
+        first_run_id = recorder.sender.run_id
+        wait_until(lambda: streamed.latest[1].num_cases_read > 0)
+
+        record_optimization(str(tmp_path / 'second.sql'), maxiter=3,
+                            extra_recorders=[recorder])
+        expected = RecorderParser(str(tmp_path / 'second.sql'))
+        wait_until(lambda: streamed.latest[1].num_cases_read == expected.num_cases_read
+                   and streamed.latest[1].last_case_counter == expected.last_case_counter)
+    finally:
+        listener.close()
+
+    assert recorder.sender.run_id != first_run_id
+    parser = streamed.latest[1]
+    pd.testing.assert_frame_equal(parser.objs, expected.objs)
+
+
+def test_recorder_stops_streaming_when_driver_internals_change(tmp_path, monkeypatch):
+    def find_variables_with_missing_internals(self, driver, outputs):
+        raise AttributeError("'ScipyOptimizeDriver' object has no attribute '_designvars'")
+
+    monkeypatch.setattr(SocketRecorder, '_find_variables', find_variables_with_missing_internals)
+    recorder = SocketRecorder(f'unix://{tmp_path}/cases.sock')
+    with pytest.warns(RuntimeWarning, match='its cases will not be streamed'):
+        record_optimization(str(tmp_path / 'opt.sql'), maxiter=3, extra_recorders=[recorder])
+
+    assert len(recorder.sender._frames) == 0
@@ -0,0 +1,107 @@
+import shutil
+import pytest
+
+from om_dash.recorder_parser import RecorderParser, _open_case_reader
+from om_dash.sqlite_bulk_reader import (SqliteBulkReader, UnsupportedRecorderError,
+                                        read_driver_case_signature)
+from om_dash.variable_filter import VariableFilter
+from conftest import assert_same_histories, copy_first_driver_cases, count_driver_cases
+
+
+def test_bulk_reader_supports_the_recorder(recorder_file):
+    assert SqliteBulkReader(_open_case_reader(recorder_file)).is_supported()
+
+
+def test_full_read_matches_case_reader(recorder_file):
+    bulk = RecorderParser(recorder_file, use_bulk_reader=True)
+    per_case = RecorderParser(recorder_file, use_bulk_reader=False)
+
+    assert bulk.num_cases_read == count_driver_cases(recorder_file)
+    assert list(bulk.objs.columns) == ['Iteration', 'f']
+    assert list(bulk.cons.columns) == ['g_upper', 'g', 'h']
+    assert list(bulk.dvs.columns) == ['x_0', 'x_1', 'y', 'z']
+    assert_same_histories(bulk, per_case)
+
+
+def test_unit_conversion_and_indices_are_applied(recorder_file):
+    parser = RecorderParser(recorder_file, use_bulk_reader=True)
+    x = parser.dvs[['x_0', 'x_1']].to_numpy()
+    # g = 2 x, so g_upper is g[2] and g is g[0]
+    assert parser.cons['g_upper'].to_numpy() == pytest.approx(2.0 * x[:, 1])
+    assert parser.cons['g'].to_numpy() == pytest.approx(2.0 * x[:, 0])
+    # y is recorded in m and plotted in cm, z in m and ft, h in m and cm
+    y_in_m = parser.dvs['y'].to_numpy() / 100.0
+    z_in_m = parser.dvs['z'].to_numpy() * 0.3048
+    assert parser.cons['h'].to_numpy() == pytest.approx(100.0 * (y_in_m + z_in_m))
+    assert parser.objs['f'].iloc[0] == pytest.approx(1e4 * (3 * 2**2 + 1.0 + 1.0))
+
+
+@pytest.mark.parametrize('use_bulk_reader', [True, False])
+def test_incremental_read_matches_full_read(recorder_file, tmp_path, use_bulk_reader):
+    num_cases = count_driver_cases(recorder_file)
+    growing_file = str(tmp_path / 'growing.sql')
+    copy_first_driver_cases(recorder_file, growing_file, num_cases // 2)
+
+    parser = RecorderParser(growing_file, use_bulk_reader=use_bulk_reader)
+    assert parser.num_cases_read == num_cases // 2
+    history_id = parser.history_id
+
+    shutil.copyfile(recorder_file, growing_file)
+    parser.update_histories_from_recorder(growing_file)
+
+    assert parser.history_id == history_id
+    expected = RecorderParser(recorder_file, use_bulk_reader=False)
+    expected.recorder_filename = growing_file
+    assert_same_histories(parser, expected)
+
+
+def test_filtered_read_matches_case_reader(recorder_file):
+    variable_filter = VariableFilter(includes=['g*', 'f', 'y'], excludes=['g'])
+    bulk = RecorderParser(recorder_file, variable_filter, use_bulk_reader=True)
+    per_case = RecorderParser(recorder_file, variable_filter, use_bulk_reader=False)
+
+    assert list(bulk.cons.columns) == ['g_upper']
+    assert list(bulk.dvs.columns) == ['y']
+    assert_same_histories(bulk, per_case)
+
+
+def test_unexpected_internals_are_reported(recorder_file):
+    case_reader = _open_case_reader(recorder_file)
+    del case_reader._abs2meta
+    with pytest.raises(UnsupportedRecorderError, match='_abs2meta'):
+        SqliteBulkReader(case_reader).read_cases()
+
+    case_reader = _open_case_reader(recorder_file)
+    case_reader.problem_metadata = {'variable_metadata': {}}
+    with pytest.raises(UnsupportedRecorderError, match='variables'):
+        SqliteBulkReader(case_reader).read_cases()
+
+
+def test_falls_back_to_case_reader_when_internals_change(recorder_file, monkeypatch):
+    def read_metadata_with_missing_internals(self):
+        raise AttributeError("'SqliteCaseReader' object has no attribute '_abs2meta'")
+
+    monkeypatch.setattr(SqliteBulkReader, '_read_metadata', read_metadata_with_missing_internals)
+    with pytest.warns(RuntimeWarning, match='failed to read the cases in bulk'):
+        parser = RecorderParser(recorder_file, use_bulk_reader=True)
+
+    assert not parser.use_bulk_reader
+    assert_same_histories(parser, RecorderParser(recorder_file, use_bulk_reader=False))
+
+
+def test_other_errors_are_not_hidden_by_the_fallback(recorder_file, monkeypatch):
+    def read_cases_with_a_bug(self, *args, **kwargs):
+        raise KeyError('a bug in the bulk reader')
+
+    monkeypatch.setattr(SqliteBulkReader, 'read_cases', read_cases_with_a_bug)
+    with pytest.raises(KeyError):
+        RecorderParser(recorder_file, use_bulk_reader=True)
+
+
+def test_driver_case_signature(recorder_file):
+    parser = RecorderParser(recorder_file)
+    num_cases, counter, timestamp = read_driver_case_signature(recorder_file,
+                                                               parser.num_cases_read - 1)
+    assert num_cases == parser.num_cases_read
+    assert (counter, timestamp) == (parser.last_case_counter, parser.last_case_timestamp)
+    assert read_driver_case_signature(recorder_file, num_cases)[1:] == (None, None)
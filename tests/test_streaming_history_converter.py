@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from om_dash.history_store import ColumnarHistory
+from om_dash.om_convert_recorder_hist import write_data_to_file
+from om_dash.recorder_history_stacker import RecorderHistoryStacker
+from om_dash.streaming_history_converter import StreamingHistoryConverter
+from om_dash.variable_filter import VariableFilter
+
+from conftest import copy_first_driver_cases, count_driver_cases
+
+
+@pytest.fixture(scope='module')
+def recorder_files(recorder_file, tmp_path_factory):
+    """
+    A chain of two recorders of different lengths
+    """
+    short_filename = str(tmp_path_factory.mktemp('short') / 'short.sql')
+    copy_first_driver_cases(recorder_file, short_filename, 5)
+    return [short_filename, recorder_file]
+
+
+def convert(recorder_files, tmp_path, filename, variable_filter=None):
+    streamed_filename = str(tmp_path / f'streamed_{filename}')
+    converter = StreamingHistoryConverter(recorder_files, chunk_size=3,
+                                          variable_filter=variable_filter)
+    converter.convert(streamed_filename)
+
+    read_filename = str(tmp_path / f'read_{filename}')
+    stacker = RecorderHistoryStacker(recorder_files, num_workers=1,
+                                     variable_filter=variable_filter)
+    write_data_to_file(stacker, read_filename)
+    return streamed_filename, read_filename
+
+
+@pytest.mark.parametrize('chain', [False, True])
+def test_streamed_csv_matches_converted_histories(recorder_files, tmp_path, chain):
+    recorder_files = recorder_files if chain else recorder_files[1:]
+    streamed_filename, read_filename = convert(recorder_files, tmp_path, 'opt.csv')
+
+    streamed = pd.read_csv(streamed_filename, index_col=0)
+    read = pd.read_csv(read_filename, index_col=0)
+    num_cases = sum(count_driver_cases(filename) for filename in recorder_files)
+    assert streamed.shape[0] == num_cases
+    pd.testing.assert_frame_equal(streamed, read)
+
+
+def test_streamed_npz_matches_converted_histories(recorder_files, tmp_path):
+    streamed_filename, read_filename = convert(recorder_files, tmp_path, 'opt.npz')
+
+    with np.load(streamed_filename) as streamed, np.load(read_filename) as read:
+        assert list(streamed.keys()) == list(read.keys())
+        for name in read.keys():
+            np.testing.assert_array_equal(streamed[name], read[name])
+        # the first iteration of the second recorder repeats the last of the first
+        assert streamed['Iteration'][4:7].tolist() == [4, 4, 5]
+
+
+def test_streamed_conversion_reads_filtered_variables(recorder_files, tmp_path):
+    variable_filter = VariableFilter(['f', 'g*'])
+    streamed_filename, read_filename = convert(recorder_files, tmp_path, 'opt.csv',
+                                               variable_filter)
+
+    streamed = pd.read_csv(streamed_filename, index_col=0)
+    assert list(streamed.columns) == ['Iteration', 'f', 'g_upper', 'g']
+    pd.testing.assert_frame_equal(streamed, pd.read_csv(read_filename, index_col=0))
+
+
+def test_streamed_conversion_rejects_unsupported_formats(recorder_files, tmp_path):
+    converter = StreamingHistoryConverter(recorder_files)
+    with pytest.raises(ValueError):
+        converter.convert(str(tmp_path / 'opt.parquet'))
+
+
+def test_streamed_constrained_design_variables_keep_their_columns(constrained_dv_recorder_file,
+                                                                  tmp_path):
+    streamed_filename, read_filename = convert([constrained_dv_recorder_file], tmp_path,
+                                               'opt.npz')
+
+    with np.load(streamed_filename) as streamed, np.load(read_filename) as read:
+        assert list(streamed.keys()) == list(read.keys())
+        assert {'x_0', 'dv:x_0', 'z', 'dv:z'} <= set(streamed.keys())
+        for name in read.keys():
+            np.testing.assert_array_equal(streamed[name], read[name])
+
+
+def test_variables_missing_from_the_first_case_are_reported(recorder_file, tmp_path,
+                                                             monkeypatch):
+    converter = StreamingHistoryConverter([recorder_file], chunk_size=3)
+    generate_history_chunks = converter.parser.generate_history_chunks
+
+    def generate_chunks_with_a_new_variable(recorder_filename, chunk_size, *args, **kwargs):
+        for ichunk, (objs, cons, dvs) in enumerate(
+                generate_history_chunks(recorder_filename, chunk_size, *args, **kwargs)):
+            if chunk_size > 1 and ichunk == 1:
+                values = {key: dvs.get_values(key) for key in dvs.variable_sizes}
+                values['w'] = np.ones((dvs.num_rows, 1))
+                dvs = ColumnarHistory()
+                dvs.append_rows(objs.num_rows, values)
+            yield objs, cons, dvs
+
+    monkeypatch.setattr(converter.parser, 'generate_history_chunks',
+                        generate_chunks_with_a_new_variable)
+    with pytest.raises(ValueError, match='The variables w of .* are not in its first case'):
+        converter.convert(str(tmp_path / 'opt.npz'))
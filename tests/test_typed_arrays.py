@@ -0,0 +1,47 @@
+import base64
+import json
+import shutil
+import subprocess
+import numpy as np
+import pytest
+
+from om_dash.typed_arrays import decode_extend_data_js, encode_typed_array
+from conftest import decode_typed_array
+
+
+@pytest.mark.parametrize('values', [np.array([1.5, -2.0, np.nan, 1e300]),
+                                    np.array([1.5, -2.0, 3.25], dtype=np.float32),
+                                    np.array([0, -7, 2 ** 31 - 1], dtype=np.int32),
+                                    np.zeros(0)])
+def test_typed_array_round_trip(values):
+    spec = encode_typed_array(values)
+    assert spec['dtype'] == {'f': f'f{values.itemsize}', 'i': 'i4'}[values.dtype.kind]
+    np.testing.assert_array_equal(decode_typed_array(spec), values)
+
+
+def test_typed_arrays_of_strided_views():
+    spec = encode_typed_array(np.arange(6.0)[::2])
+    assert base64.b64decode(spec['bdata']) == np.array([0.0, 2.0, 4.0], dtype='<f8').tobytes()
+
+
+def test_unsupported_dtypes_are_rejected():
+    with pytest.raises(KeyError):
+        encode_typed_array(np.arange(3, dtype=np.int64))
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_extend_data_is_decoded_in_the_browser():
+    extend_data = [{'x': [encode_typed_array(np.array([3, 4], dtype=np.int32))] * 2,
+                    'y': [encode_typed_array(np.array([0.5, -1.0])),
+                          encode_typed_array(np.array([0.25, 2.0], dtype=np.float32))]},
+                   [0, 1], 100]
+    script = ('var window = {dash_clientside: {no_update: "no_update"}};\n'
+              f'var decode = {decode_extend_data_js};\n'
+              f'console.log(JSON.stringify([decode({json.dumps(extend_data)}),'
+              ' decode(null), decode([{"y": [[1, 2]]}, [0]])]));\n')
+    output = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True)
+
+    decoded, no_update, plain = json.loads(output.stdout)
+    assert decoded == [{'x': [[3, 4], [3, 4]], 'y': [[0.5, -1.0], [0.25, 2.0]]}, [0, 1], 100]
+    assert no_update == 'no_update'
+    assert plain == [{'y': [[1, 2]]}, [0]]
@@ -0,0 +1,90 @@
+import argparse
+
+from om_dash.recorder_parser import RecorderParser
+from om_dash.variable_filter import (VariableFilter, add_variable_filter_arguments,
+                                     create_variable_filter)
+
+
+def test_filter_matches_includes_and_excludes():
+    variable_filter = VariableFilter(['traj.*', 'obj'], ['*.defect'])
+    assert variable_filter.matches('traj.x')
+    assert variable_filter.matches('obj')
+    assert not variable_filter.matches('traj.phase0.defect')
+    assert not variable_filter.matches('other')
+    # patterns are case sensitive
+    assert not variable_filter.matches('OBJ')
+
+    assert VariableFilter(excludes=['big*']).matches('x')
+    assert not VariableFilter(excludes=['big*']).matches('big_dv')
+
+
+def test_filter_values():
+    values = {'traj.x': 1.0, 'traj.y.defect': 2.0, 'obj': 3.0}
+    variable_filter = VariableFilter(['traj.*'], ['*.defect'])
+    assert variable_filter.filter_values(values) == {'traj.x': 1.0}
+
+    everything = VariableFilter()
+    assert everything.filter_values(values) is values
+    assert everything.is_selecting_everything()
+
+
+def test_filter_types():
+    variable_filter = VariableFilter(types=['objective', 'constraint'])
+    assert variable_filter.includes_type('constraint')
+    assert not variable_filter.includes_type('desvar')
+    assert not variable_filter.is_selecting_everything()
+    assert VariableFilter(types=[]).includes_type('objective') is False
+
+
+def test_filter_from_text():
+    variable_filter = VariableFilter.from_text('traj.*, obj  c*', '')
+    assert variable_filter.includes == ['traj.*', 'obj', 'c*']
+    assert variable_filter.excludes == []
+    assert VariableFilter.from_text('', None).is_selecting_everything()
+
+
+def test_filters_selecting_the_same_variables_are_equal():
+    a = VariableFilter(['a*'], ['b'], ['desvar', 'objective'])
+    b = VariableFilter.from_text('a*', 'b', ['objective', 'desvar'])
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a.key == b.key
+    assert len({a, b}) == 1
+
+    assert a != VariableFilter(['a*'], ['b'])
+    assert a != VariableFilter(['a*'], [], ['desvar', 'objective'])
+    assert a != 'a*'
+
+
+def test_filter_from_command_line_arguments():
+    arg_parser = argparse.ArgumentParser()
+    add_variable_filter_arguments(arg_parser)
+
+    assert create_variable_filter(arg_parser.parse_args([])) is None
+    variable_filter = create_variable_filter(
+        arg_parser.parse_args(['--include', 'traj.*', 'obj', '--exclude', '*.defect']))
+    assert variable_filter == VariableFilter(['traj.*', 'obj'], ['*.defect'])
+
+
+def test_parser_reads_only_the_selected_types(recorder_file):
+    variable_filter = VariableFilter(excludes=['g'], types=['objective', 'constraint'])
+    parser = RecorderParser(recorder_file, variable_filter)
+    assert parser.obj_history.columns == ['Iteration', 'f']
+    assert parser.con_history.columns == ['g_upper', 'h']
+    assert parser.dv_history.num_rows == parser.obj_history.num_rows
+    assert parser.dv_history.columns == []
+
+
+def test_changing_the_filter_resets_the_histories(recorder_file):
+    parser = RecorderParser(recorder_file, VariableFilter(['f']))
+    history_id = parser.history_id
+
+    parser.set_variable_filter(VariableFilter.from_text('f', ''))
+    assert parser.history_id == history_id
+    assert parser.obj_history.num_rows > 0
+
+    parser.set_variable_filter(None)
+    assert parser.history_id != history_id
+    assert parser.obj_history.num_rows == 0
+    parser.update_histories_from_recorder(recorder_file)
+    assert parser.dv_history.columns == ['x_0', 'x_1', 'y', 'z']